@@ -0,0 +1,389 @@
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Optional, Union
+
+from .logger import logger
+from .models import IndexEntry
+
+SCHEMA_VERSION = "2"  # bump when cached contents would be read differently
+
+# files modified this recently may still change within the same mtime tick
+# ("racy" entries), they are read every time until they are older
+RACY_NS = 2 * 10**9
+
+
+def content_digest(content: Union[str, bytes]) -> str:
+    """
+    Hash of a file content, the same for `str` and its UTF-8 bytes.
+
+    Args:
+        content (str | bytes): Decoded text or UTF-8 bytes.
+
+    Returns:
+        str: BLAKE2b hex digest (16 bytes).
+    """
+    if isinstance(content, str):
+        content = content.encode("utf-8", "surrogatepass")
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+class DirFingerprints:
+    """
+    Directory listings of the previous walk, keyed by directory fingerprint.
+
+    A fingerprint is the directory mtime plus a hash of its child listing
+    (names and kinds). Creating, removing or renaming a child changes the
+    mtime, so a directory with the same mtime can reuse its listing and
+    filter verdicts without `scandir`. If only the mtime changed (editors
+    saving by rename), the listing hash still matches and the verdicts are
+    reused after listing it again.
+
+    Thread-safe for the parallel walk: lookups only read `previous`, every
+    directory is recorded once.
+
+    Attributes:
+        previous (dict): Fingerprint per relative directory from the last walk.
+        current (dict): Fingerprints recorded in this walk.
+        reused (int): Directories served without `scandir`.
+    """
+
+    def __init__(self, previous: dict[str, tuple[int, str, list]] = None):
+        """
+        Initialize DirFingerprints.
+
+        Args:
+            previous (dict[str, tuple[int, str, list]], optional): Relative
+                directory -> (mtime_ns, listing hash, listing) from the last walk.
+        """
+        self.previous = previous or {}
+        self.current = {}
+        self.reused = 0
+
+    @staticmethod
+    def listing_hash(children: list[tuple[str, bool]]) -> str:
+        """
+        Hash of a directory listing.
+
+        Args:
+            children (list[tuple[str, bool]]): (name, is_dir) per child, sorted.
+
+        Returns:
+            str: BLAKE2b hex digest.
+        """
+        text = "\0".join(f"{'d' if is_dir else 'f'}{name}" for name, is_dir in children)
+        return content_digest(text)
+
+    def listing(self, rel_dir: str, mtime_ns: int) -> Optional[list]:
+        """
+        Listing of a directory whose mtime did not change.
+
+        Args:
+            rel_dir (str): Relative POSIX path of the directory ("" for root).
+            mtime_ns (int): Current mtime of the directory.
+
+        Returns:
+            list | None: `[name, is_dir, is_symlink, included]` per child, or
+                None if the directory has to be listed.
+        """
+        previous = self.previous.get(rel_dir)
+        if previous is None or previous[0] != mtime_ns:
+            return None
+        self.reused += 1
+        self.current[rel_dir] = previous
+        return previous[2]
+
+    def verdicts(self, rel_dir: str, digest: str) -> Optional[list[bool]]:
+        """
+        Filter verdicts of a re-listed directory whose children did not change.
+
+        Args:
+            rel_dir (str): Relative POSIX path of the directory.
+            digest (str): `listing_hash` of the current listing.
+
+        Returns:
+            list[bool] | None: Verdict per child (listing order), or None.
+        """
+        previous = self.previous.get(rel_dir)
+        if previous is None or previous[1] != digest:
+            return None
+        return [child[3] for child in previous[2]]
+
+    def record(self, rel_dir: str, mtime_ns: int, digest: str, listing: list):
+        """
+        Record the listing of a directory for the next walk.
+
+        Directories modified in the last seconds are not recorded, as a
+        change within the same mtime tick would go unnoticed.
+
+        Args:
+            rel_dir (str): Relative POSIX path of the directory.
+            mtime_ns (int): Mtime of the directory before it was listed.
+            digest (str): `listing_hash` of the listing.
+            listing (list): `[name, is_dir, is_symlink, included]` per child.
+        """
+        if time.time_ns() - mtime_ns >= RACY_NS:
+            self.current[rel_dir] = (mtime_ns, digest, listing)
+
+
+class ScanCache:
+    """
+    Persistent cache of file contents and token counts between scans.
+
+    A single SQLite file (e.g. `prompts/.snib-cache/scan.sqlite`) stores per
+    file its stat fingerprint `(inode, size, mtime_ns)`, the reader settings
+    it was read with, a content hash and the decoded text (NULL for binary
+    files), plus token counts by content hash. A file whose fingerprint and
+    settings still match is served from the cache without being opened.
+    Directory listings of the last walk are kept as well (see
+    `DirFingerprints`).
+
+    Entries not used for `max_age_days` are evicted on `close`, then the least
+    recently used files until the stored text fits into `max_size_mb`.
+
+    Attributes:
+        path (Path): SQLite database file.
+        max_size_mb (int): Upper bound for the stored text (0 = no cap).
+        max_age_days (int): Entries unused for longer are evicted (0 = never).
+        hits (int): Files served from the cache.
+        misses (int): Files that had to be read.
+    """
+
+    def __init__(self, path: Path, max_size_mb: int = 256, max_age_days: int = 30):
+        """
+        Open (or create) a scan cache.
+
+        An unreadable or outdated database is replaced by an empty one.
+
+        Args:
+            path (Path): SQLite database file.
+            max_size_mb (int, optional): Size cap of the stored text in MB.
+                Defaults to 256.
+            max_age_days (int, optional): Evict entries unused for this many
+                days. Defaults to 30.
+        """
+        self.path = Path(path)
+        self.max_size_mb = max_size_mb
+        self.max_age_days = max_age_days
+        self.hits = 0
+        self.misses = 0
+        self._now = int(time.time())
+        self._used = []  # paths of hits, their timestamp is refreshed on close
+        self._filters = None  # include/exclude the directory verdicts belong to
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            self._db = self._open()
+        except sqlite3.DatabaseError as e:
+            logger.debug(f"Replacing unreadable scan cache {self.path}: {e}")
+            self.path.unlink(missing_ok=True)
+            self._db = self._open()
+
+    def _open(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path)
+        db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        row = db.execute("SELECT value FROM meta WHERE key = 'schema'").fetchone()
+        if row and row[0] != SCHEMA_VERSION:
+            db.execute("DROP TABLE IF EXISTS files")
+            db.execute("DROP TABLE IF EXISTS tokens")
+            db.execute("DROP TABLE IF EXISTS dirs")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "path TEXT PRIMARY KEY, inode INTEGER, size INTEGER, mtime_ns INTEGER, "
+            "variant TEXT, digest TEXT, content BLOB, stored INTEGER, used INTEGER)"
+        )
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS tokens "
+            "(key TEXT PRIMARY KEY, count INTEGER, used INTEGER)"
+        )
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS dirs "
+            "(path TEXT PRIMARY KEY, mtime_ns INTEGER, digest TEXT, listing TEXT)"
+        )
+        db.execute(
+            "INSERT OR REPLACE INTO meta VALUES ('schema', ?)", (SCHEMA_VERSION,)
+        )
+        db.commit()
+        return db
+
+    def get(
+        self, entry: IndexEntry, variant: str
+    ) -> tuple[bool, Optional[Union[str, bytes]]]:
+        """
+        Look up the content of an unchanged file.
+
+        Args:
+            entry (IndexEntry): File entry from the scan index.
+            variant (str): Reader settings the content depends on (size cap,
+                bytes mode), a different variant is a miss.
+
+        Returns:
+            tuple[bool, str | bytes | None]: Whether the file was found, and its
+                content (None for binary files).
+        """
+        row = self._db.execute(
+            "SELECT inode, size, mtime_ns, variant, content FROM files WHERE path = ?",
+            (entry.path,),
+        ).fetchone()
+        if row is None or row[:4] != (entry.inode, entry.size, entry.mtime_ns, variant):
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        self._used.append(entry.path)
+        return True, row[4]
+
+    def put(
+        self, entry: IndexEntry, variant: str, content: Optional[Union[str, bytes]]
+    ):
+        """
+        Store the content of a file that was just read.
+
+        Files modified in the last seconds are not stored, as a change within
+        the same mtime tick would go unnoticed.
+
+        Args:
+            entry (IndexEntry): File entry from the scan index.
+            variant (str): Reader settings the content depends on.
+            content (str | bytes | None): Content as returned by the reader
+                (None for binary files).
+        """
+        if time.time_ns() - entry.mtime_ns < RACY_NS:
+            return
+        self._db.execute(
+            "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                entry.path,
+                entry.inode,
+                entry.size,
+                entry.mtime_ns,
+                variant,
+                None if content is None else content_digest(content),
+                content,
+                0 if content is None else len(content),
+                self._now,
+            ),
+        )
+
+    def load_tokens(self) -> dict[str, int]:
+        """
+        Token counts of earlier scans.
+
+        Returns:
+            dict[str, int]: Count per `tokenizer:digest` key (see `TokenCounter`).
+        """
+        return dict(self._db.execute("SELECT key, count FROM tokens"))
+
+    def save_tokens(self, counts: dict[str, int]):
+        """
+        Store the token counts used in this scan.
+
+        Args:
+            counts (dict[str, int]): Count per `tokenizer:digest` key.
+        """
+        self._db.executemany(
+            "INSERT OR REPLACE INTO tokens VALUES (?, ?, ?)",
+            ((key, n, self._now) for key, n in counts.items()),
+        )
+
+    def load_dirs(self, include: list[str], exclude: list[str]) -> DirFingerprints:
+        """
+        Directory fingerprints of the last walk with the same filters.
+
+        Verdicts depend on the patterns, so any change of `include` or
+        `exclude` starts from scratch.
+
+        Args:
+            include (list[str]): Include patterns of this scan.
+            exclude (list[str]): Exclude patterns of this scan.
+
+        Returns:
+            DirFingerprints: Fingerprints (empty if the filters changed).
+        """
+        self._filters = json.dumps([sorted(include or []), sorted(exclude or [])])
+        row = self._db.execute(
+            "SELECT value FROM meta WHERE key = 'filters'"
+        ).fetchone()
+        if not row or row[0] != self._filters:
+            self._db.execute("DELETE FROM dirs")
+            return DirFingerprints()
+        return DirFingerprints(
+            {
+                path: (mtime_ns, digest, json.loads(listing))
+                for path, mtime_ns, digest, listing in self._db.execute(
+                    "SELECT path, mtime_ns, digest, listing FROM dirs"
+                )
+            }
+        )
+
+    def save_dirs(self, fingerprints: DirFingerprints):
+        """
+        Replace the stored fingerprints with the ones of this walk.
+
+        Directories that were not walked this time (removed or now excluded)
+        are dropped.
+
+        Args:
+            fingerprints (DirFingerprints): Fingerprints from `load_dirs`.
+        """
+        previous, current = fingerprints.previous, fingerprints.current
+        # reused listings are the same objects, only changes are written
+        self._db.executemany(
+            "DELETE FROM dirs WHERE path = ?",
+            ((path,) for path in previous if path not in current),
+        )
+        self._db.executemany(
+            "INSERT OR REPLACE INTO dirs VALUES (?, ?, ?, ?)",
+            (
+                (path, mtime_ns, digest, json.dumps(listing))
+                for path, (mtime_ns, digest, listing) in current.items()
+                if previous.get(path) is not current[path]
+            ),
+        )
+        self._db.execute(
+            "INSERT OR REPLACE INTO meta VALUES ('filters', ?)", (self._filters,)
+        )
+        logger.debug(
+            f"Reused {fingerprints.reused} of {len(fingerprints.current)} directory listing(s)"
+        )
+
+    @property
+    def hit_ratio(self) -> float:
+        """float: Share of files served from the cache (0 if nothing was looked up)."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def close(self):
+        """
+        Refresh the entries used in this scan, evict old ones and save.
+        """
+        self._db.executemany(
+            "UPDATE files SET used = ? WHERE path = ?",
+            ((self._now, p) for p in self._used),
+        )
+        if self.max_age_days:
+            cutoff = self._now - self.max_age_days * 86400
+            self._db.execute("DELETE FROM files WHERE used < ?", (cutoff,))
+            self._db.execute("DELETE FROM tokens WHERE used < ?", (cutoff,))
+        if self.max_size_mb:
+            budget = self.max_size_mb * 1024**2
+            stored = self._db.execute(
+                "SELECT COALESCE(SUM(stored), 0) FROM files"
+            ).fetchone()[0]
+            if stored > budget:
+                evict = []
+                for path, size in self._db.execute(
+                    "SELECT path, stored FROM files ORDER BY used, stored DESC"
+                ):
+                    if stored <= budget:
+                        break
+                    evict.append((path,))
+                    stored -= size
+                self._db.executemany("DELETE FROM files WHERE path = ?", evict)
+                logger.debug(f"Evicted {len(evict)} file(s) from the scan cache")
+        self._db.commit()
+        self._db.close()
+        logger.info(
+            f"Scan cache: {self.hits} hit(s), {self.misses} miss(es), "
+            f"hit ratio {self.hit_ratio:.0%}"
+        )
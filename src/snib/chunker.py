@@ -1,4 +1,56 @@
+import re
+from typing import Callable, Iterable, Iterator, Optional, Union
+
 from .logger import logger
+from .splitter import split_file_section
+from .tokenizer import HeuristicTokenizer, TokenCounter
+
+FILE_HEADER = "#[FILE] "  # prefix of formatted file sections (see Formatter)
+SAFE_BREAKS = " \t,;)]}>"  # long lines are cut after one of these if possible
+_HEADER_NOTE = re.compile(r" \((?:truncated|continued from|identical to) [^\n]*\)$")
+_SAFE_BREAK_BYTES = [c.encode("ascii") for c in SAFE_BREAKS]
+
+Text = Union[str, bytes]  # sections and chunks are UTF-8 bytes in bytes mode
+
+
+def _section_path(section: Text) -> Optional[str]:
+    # file path from a formatted file section (header notes removed)
+    if isinstance(section, bytes):
+        if not section.startswith(FILE_HEADER.encode("ascii")):
+            return None
+        section = section.partition(b"\n")[0].decode("utf-8", "replace")
+    if not section.startswith(FILE_HEADER):
+        return None
+    end = section.find("\n")
+    line = section[len(FILE_HEADER) : end if end >= 0 else None]
+    return _HEADER_NOTE.sub("", line)
+
+
+def _safe_cut(text: Text, start: int, stop: int) -> int:
+    # end of a piece of text[start:stop] inside a line: after the last
+    # whitespace or closing punctuation in the second half, else at `stop`
+    if stop >= len(text):
+        return len(text)
+    floor = start + (stop - start) // 2
+    is_bytes = isinstance(text, bytes)
+    breaks = _SAFE_BREAK_BYTES if is_bytes else SAFE_BREAKS
+    best = max(text.rfind(c, floor, stop) for c in breaks)
+    if best >= floor:
+        return best + 1
+    if is_bytes:
+        # never cut inside a UTF-8 sequence (continuation bytes are 10xxxxxx)
+        while stop > start + 1 and text[stop] & 0xC0 == 0x80:
+            stop -= 1
+    return max(stop, start + 1)
+
+
+def _iter_lines(section: str) -> Iterator[str]:
+    # lines with their "\n", the last one may have none
+    pos, end = 0, len(section)
+    while pos < end:
+        cut = section.find("\n", pos) + 1 or end
+        yield section[pos:cut]
+        pos = cut
 
 
 class Chunker:
@@ -6,18 +58,50 @@ class Chunker:
     A utility class to split formatted sections into smaller chunks for processing by LLMs.
 
     Each chunk will not exceed `chunk_size` characters (including a reserved header space),
-    which helps to manage input limits for AI models.
+    which helps to manage input limits for AI models. Given the `header`
+    template of the prompt files, the reserve is the exact header length.
+
+    With a `token_budget`, limits are enforced in tokens instead, counted by a
+    `TokenCounter` (heuristic by default, or a local BPE vocabulary).
+
+    The `layout` decides how sections are distributed: `greedy` fills chunks
+    line by line in order, `ffd`/`balanced` bin-pack whole files.
     """
 
-    def __init__(self, chunk_size):
+    def __init__(
+        self,
+        chunk_size,
+        token_budget: int = 0,
+        counter: Optional[TokenCounter] = None,
+        layout: str = "greedy",
+        header: Optional[Callable[[int], str]] = None,
+        max_chunks: int = 0,
+    ):
         """
         Initialize a Chunker instance.
 
         Args:
             chunk_size (int): Maximum character length of each chunk, including header.
+            token_budget (int, optional): Maximum number of tokens per chunk,
+                including header. Replaces `chunk_size` if set. Defaults to 0 (off).
+            counter (TokenCounter, optional): Token counter for `token_budget`.
+                Defaults to the heuristic tokenizer without a cache.
+            layout (str, optional): `greedy` (fill line by line), `ffd` or
+                `balanced` (bin-pack whole files). Defaults to "greedy".
+            header (Callable[[int], str], optional): Header of chunk `i`
+                (1-based) as it will be written. If set, each chunk reserves
+                exactly the size of its header instead of `header_size`.
+            max_chunks (int, optional): Largest chunk index `header` must fit
+                (the digits of `i` change the header length). Defaults to 0.
         """
         self.chunk_size = chunk_size
-        self.header_size = 100  # reserve space for header
+        self.header_size = 100  # fixed reserve without a header (chars or tokens)
+        self.header = header
+        self.max_chunks = max_chunks
+        self.token_budget = token_budget
+        self.counter = counter or TokenCounter(HeuristicTokenizer())
+        self.layout = layout
+        self._header_sizes = {}
 
     def chunk(self, sections):
         """
@@ -31,23 +115,438 @@ class Chunker:
         Returns:
             list[str]: A list of string chunks, each <= `chunk_size` characters including header.
         """
+        return list(self.iter_chunks(sections))
+
+    def iter_chunks(self, sections: Iterable[str]) -> Iterator[str]:
+        """
+        Lazily split formatted sections into chunks.
+
+        Streaming version of `chunk`: with the default `greedy` layout,
+        sections are consumed one at a time and every chunk is yielded as soon
+        as it is full, so only the current chunk is held in memory. The `ffd`
+        and `balanced` layouts need all sections before the first chunk (see
+        `_iter_packed_chunks`).
+
+        Args:
+            sections (Iterable[str]): Formatted sections, e.g. from a generator.
+
+        Yields:
+            str: Chunks, each <= `chunk_size` characters (or `token_budget`
+                tokens) including header.
+        """
+        if self.token_budget:
+            logger.info(
+                f"Using token_budget={self.token_budget} tokens "
+                f"(tokenizer: {self.counter.tokenizer.name})"
+            )
+        else:
+            logger.info(
+                f"Using chunk_size={self.chunk_size} chars "
+                f"(≈ {self.chunk_size // 4}-{self.chunk_size // 3} tokens estimated)"
+            )
+
+        if self.layout == "greedy":
+            chunks = self._iter_fill(sections)
+        else:
+            chunks = self._iter_packed_chunks(sections)
+
+        count = 0
+        for chunk in chunks:
+            count += 1
+            yield chunk
+
+        logger.info(f"Created {count} chunk(s)")
+
+    def _iter_fill(
+        self,
+        sections: Iterable[Text],
+        split_files: bool = True,
+        room: Optional[Callable[[int], int]] = None,
+    ) -> Iterator[Text]:
+        # greedy fill in the unit of this chunker (characters or tokens)
+        if self.token_budget:
+            return self._iter_token_chunks(sections, split_files, room)
+        return self._iter_char_chunks(sections, split_files, room)
+
+    def _iter_char_chunks(
+        self,
+        sections: Iterable[Text],
+        split_files: bool = True,
+        room: Optional[Callable[[int], int]] = None,
+    ) -> Iterator[Text]:
+        """
+        Greedily fill chunks of at most `chunk_size` characters.
+
+        Runs in O(total characters): sections are cut at line boundaries with
+        `str.rfind` on offsets instead of being split into lines, and the
+        pieces of a chunk are collected in a list with a running length and
+        joined once.
+
+        UTF-8 `bytes` sections (bytes mode) are chunked the same way, with
+        `chunk_size` counted in bytes; pieces are zero-copy `memoryview`
+        slices and lines are only hard-split at character boundaries.
+
+        Args:
+            sections (Iterable[str | bytes]): Formatted sections.
+            split_files (bool, optional): Split oversized file sections at
+                block boundaries first. Defaults to True.
+            room (Callable[[int], int], optional): Room for text in chunk `i`.
+                Defaults to `_room` (budget minus the header of chunk `i`).
+
+        Yields:
+            str | bytes: Chunks, each <= `chunk_size` characters (bytes)
+                including header.
+        """
+        room_of = room or self._room
+        index = 1  # of the current chunk
+        limit = room_of(index)  # room for text in the current chunk
+        parts = []  # pieces of the current chunk, joined once when it is full
+        length = 0  # running length of `parts`
+        empty = ""  # joins `parts` ("" or b"")
+        stream = self._split_oversized(sections, self._piece_room(), split_files)
+        for section, whole, _ in stream:
+            if whole and parts and length + len(section) > limit >= len(section):
+                # keep a block of an oversized file together in the next chunk
+                yield empty.join(parts)
+                parts, length = [], 0
+                index += 1
+                limit = room_of(index)
+            empty = section[:0]
+            if isinstance(section, bytes):
+                newline, view = b"\n", memoryview(section)
+            else:
+                newline, view = "\n", section
+            pos, end = 0, len(section)
+            while pos < end:
+                room = limit - length
+                if end - pos <= room:  # rest of the section fits
+                    parts.append(view[pos:] if pos else section)
+                    length += end - pos
+                    break
+                # last complete line that still fits
+                cut = section.rfind(newline, pos, pos + max(room, 0)) + 1
+                if cut:
+                    parts.append(view[pos:cut])
+                    length += cut - pos
+                    pos = cut
+                elif not parts:
+                    # a single line longer than a chunk is hard-split
+                    cut = _safe_cut(section, pos, pos + limit)
+                    parts.append(view[pos:cut])
+                    length += cut - pos
+                    pos = cut
+                    if pos == end:
+                        break
+                yield empty.join(parts)
+                parts, length = [], 0
+                index += 1
+                limit = room_of(index)
+        if parts:
+            yield empty.join(parts)
+
+    def _iter_token_chunks(
+        self,
+        sections: Iterable[str],
+        split_files: bool = True,
+        room: Optional[Callable[[int], int]] = None,
+    ) -> Iterator[str]:
+        """
+        Greedily fill chunks of at most `token_budget` tokens.
+
+        Whole sections are counted first (cached by content hash in the
+        `TokenCounter`). Only a section that does not fit into the current
+        chunk is counted line by line and cut at a line boundary.
+
+        Args:
+            sections (Iterable[str]): Formatted sections.
+            split_files (bool, optional): Split oversized file sections at
+                block boundaries first. Defaults to True.
+            room (Callable[[int], int], optional): Room for text in chunk `i`.
+                Defaults to `_room` (budget minus the header of chunk `i`).
+
+        Yields:
+            str: Chunks, each <= `token_budget` tokens including header.
+        """
+        room_of = room or self._room
+        index = 1  # of the current chunk
+        limit = room_of(index)  # room for text in the current chunk
+        parts = []
+        used = 0  # tokens in `parts`
+        stream = self._split_oversized(sections, self._piece_room(), split_files)
+        for section, whole, path in stream:
+            tokens = self.counter.count(section, path)
+            if whole and parts and used + tokens > limit >= tokens:
+                # keep a block of an oversized file together in the next chunk
+                yield "".join(parts)
+                parts, used = [], 0
+                index += 1
+                limit = room_of(index)
+            if used + tokens <= limit:
+                parts.append(section)
+                used += tokens
+                continue
+            for line in _iter_lines(section):
+                tokens = self.counter.tokenizer.count(line, path)
+                pieces = [(line, tokens)]
+                if tokens > limit:
+                    pieces = self._hard_split_tokens(line, path, limit, tokens)
+                for piece, tokens in pieces:
+                    if used + tokens > limit and parts:
+                        yield "".join(parts)
+                        parts, used = [], 0
+                        index += 1
+                        limit = room_of(index)
+                    parts.append(piece)
+                    used += tokens
+        if parts:
+            yield "".join(parts)
+
+    def _hard_split_tokens(
+        self, line: str, path: Optional[str], limit: int, tokens: int
+    ) -> list[tuple[str, int]]:
+        """
+        Split a line with more than `limit` tokens (minified code, one-line JSON).
+
+        The cut is estimated from the line's characters per token, moved back
+        to a safe boundary (see `SAFE_BREAKS`) and shrunk until the piece
+        fits. Every piece is counted once, so this stays linear in the line.
+
+        Args:
+            line (str): Over-long line.
+            path (str | None): File the line belongs to.
+            limit (int): Maximum tokens per piece.
+            tokens (int): Tokens of the whole line.
+
+        Returns:
+            list[tuple[str, int]]: Pieces with their token counts.
+        """
+        count = self.counter.tokenizer.count
+        chars_per_token = len(line) / max(tokens, 1)
+        pieces = []
+        pos, end = 0, len(line)
+        while pos < end:
+            stop = pos + max(int(limit * chars_per_token), 1)
+            while True:
+                cut = _safe_cut(line, pos, stop)
+                n = count(line[pos:cut], path)
+                if n <= limit or cut - pos <= 1:
+                    break
+                stop = pos + max((cut - pos) * 9 // 10, 1)
+            pieces.append((line[pos:cut], n))
+            pos = cut
+        return pieces
+
+    def _iter_packed_chunks(self, sections: Iterable[str]) -> Iterator[str]:
+        """
+        Pack whole file sections into as few chunks as possible.
+
+        Every `#[FILE]` section is an item that is never split unless it is
+        larger than a chunk on its own. Then it is filled greedily into full
+        chunks and only its remainder is packed. Non-file sections (description,
+        task, filters, tree) always open the first chunk.
+
+        Layouts:
+        - `ffd`: first-fit decreasing, each item goes into the first chunk
+          with room (largest items first).
+        - `balanced`: the same number of chunks, each item goes into the
+          least filled chunk, so all chunks end up about equally full.
+
+        Files keep their project order inside a chunk, and chunks are ordered
+        by their first file. The remainder of a split file is placed at the
+        start of the chunk right after its full pieces.
+
+        Args:
+            sections (Iterable[str]): Formatted sections.
+
+        Yields:
+            str: Chunks, each <= `chunk_size` characters (or `token_budget`
+                tokens) including header.
+        """
+        limit = self._piece_room()
+
+        preamble = []
+        items = []  # (index, size, text) of packable items
+        full_pieces = {}  # item index of a remainder -> full chunks before it
+        empty = ""  # joins texts ("" or b"" in bytes mode)
+        for section in sections:
+            empty = section[:0]
+            path = _section_path(section)
+            if path is None:
+                preamble.append(section)
+                continue
+            size = self._size(section, path)
+            if size > limit:
+                *pieces, section = self._split(section, path, limit)
+                full_pieces[len(items)] = pieces
+                size = self._size(section, path)
+            items.append((len(items), size, section))
+
+        # preamble opens the first chunk (larger preambles are filled greedily)
+        lead = list(self._iter_fill([empty.join(preamble)])) if preamble else []
+        first_text = lead.pop() if lead else empty
+        first_size = self._size(first_text)
+        # the first packed chunk may have a longer header than the others
+        first_load = first_size + max(limit - self._room(len(lead) + 1), 0)
+
+        bins = [[]]  # item indexes per chunk, bins[0] holds the preamble
+        loads = [first_load]
+        order = sorted(items, key=lambda item: (-item[1], item[0]))
+        if self.layout == "balanced":
+            # as many chunks as first-fit decreasing needs, then least filled first
+            count = len(self._first_fit(order, [first_load], limit, full_pieces))
+            bins, loads = [[] for _ in range(count)], [first_load] + [0] * (count - 1)
+            for index, size, _ in order:
+                # remainders of split files never share the preamble chunk
+                candidates = range(1 if index in full_pieces else 0, len(loads))
+                target = min(candidates, key=loads.__getitem__, default=None)
+                if target is None or loads[target] + size > limit:
+                    bins.append([])
+                    loads.append(0)
+                    target = len(loads) - 1
+                bins[target].append(index)
+                loads[target] += size
+        else:
+            bins = self._first_fit(order, loads, limit, full_pieces)
+
+        packed = sum(size for _, size, _ in items) + first_size
+        efficiency = packed / (len(bins) * limit) if limit > 0 else 1.0
         logger.info(
-            f"Using chunk_size={self.chunk_size} chars "
-            f"(≈ {self.chunk_size // 4}-{self.chunk_size // 3} tokens estimated)"
+            f"Packed {len(items)} file(s) into {len(bins)} chunk(s) ({self.layout}), "
+            f"{efficiency:.0%} full, lower bound {-(-packed // max(limit, 1))} chunk(s)"
         )
 
-        chunks = []
-        current_chunk = ""
+        yield from lead
+        texts = {index: text for index, _, text in items}
+        first_bin, other_bins = bins[0], sorted(sorted(b) for b in bins[1:] if b)
+        for n, indexes in enumerate([first_bin] + other_bins):
+            indexes = sorted(indexes)
+            # full pieces of split files go right before their remainders
+            for index in indexes:
+                yield from full_pieces.get(index, [])
+            tails = [i for i in indexes if i in full_pieces]
+            parts = [texts[i] for i in tails + [i for i in indexes if i not in tails]]
+            if n == 0:
+                parts.insert(0, first_text)
+            text = empty.join(parts)
+            if text:
+                yield text
+
+    def _split_oversized(
+        self, sections: Iterable[Text], limit: int, split_files: bool = True
+    ) -> Iterator[tuple[Text, bool, Optional[str]]]:
+        """
+        Replace file sections larger than a chunk by syntax-aware pieces.
+
+        Args:
+            sections (Iterable[str]): Formatted sections.
+            limit (int): Room for text per chunk.
+            split_files (bool, optional): If False, pass sections through.
+
+        Yields:
+            tuple[str, bool, str | None]: Section or piece, whether it should
+                be kept whole (True for pieces of an oversized file), and the
+                file path it belongs to.
+        """
         for section in sections:
-            lines = section.splitlines(keepends=True)
-            for line in lines:
-                if len(current_chunk) + len(line) + self.header_size > self.chunk_size:
-                    chunks.append(current_chunk)
-                    current_chunk = ""
-                current_chunk += line
-        if current_chunk:
-            chunks.append(current_chunk)
-
-        logger.info(f"Created {len(chunks)} chunk(s)")
-
-        return chunks
+            path = _section_path(section)
+            if not split_files or path is None or self._size(section, path) <= limit:
+                yield section, False, path
+                continue
+            for piece in self._split(section, path, limit):
+                yield piece, True, path
+
+    def _split(self, section: Text, path: str, limit: int) -> list[Text]:
+        """
+        Split an oversized file section at top-level block boundaries.
+
+        Python files are split via `ast`, C-family files at brace-balanced
+        blocks (see `snib.splitter`). Every continuation piece starts with a
+        `continued from path:line` marker.
+
+        Args:
+            section (str | bytes): Formatted file section.
+            path (str): File path from the section header.
+            limit (int): Maximum piece size (characters, bytes or tokens).
+
+        Returns:
+            list[str | bytes]: Pieces in file order.
+        """
+        if isinstance(section, bytes):
+            # the splitter parses text, sizes stay in UTF-8 bytes
+            text = section.decode("utf-8")
+            pieces = split_file_section(
+                text, path, limit, lambda t: len(t.encode("utf-8"))
+            )
+            pieces = [piece.encode("utf-8") for piece in pieces or [text]]
+            size_fn = len
+        else:
+            size_fn = (
+                (lambda text: self.counter.tokenizer.count(text, path))
+                if self.token_budget
+                else len
+            )
+            pieces = split_file_section(section, path, limit, size_fn) or [section]
+        # pieces made of a single over-long line are hard-split further, to
+        # `limit` (not to the room of chunk 1, 2, ... of this little fill)
+        return [
+            chunk
+            for piece in pieces
+            for chunk in (
+                self._iter_fill([piece], split_files=False, room=lambda i: limit)
+                if size_fn(piece) > limit
+                else [piece]
+            )
+        ]
+
+    @staticmethod
+    def _first_fit(
+        order: list[tuple[int, int, str]],
+        loads: list[int],
+        limit: int,
+        remainders: dict = None,
+    ) -> list[list[int]]:
+        # first-fit over pre-sorted items; updates `loads` in place
+        # (remainders of split files never share the preamble chunk)
+        bins = [[] for _ in loads]
+        for index, size, _ in order:
+            start = 1 if remainders and index in remainders else 0
+            for target in range(start, len(loads)):
+                if loads[target] + size <= limit:
+                    break
+            else:
+                bins.append([])
+                loads.append(0)
+                target = len(loads) - 1
+            bins[target].append(index)
+            loads[target] += size
+        return bins
+
+    def _room(self, index: int) -> int:
+        """
+        Room for text in chunk `index`: the budget minus its exact header.
+
+        Args:
+            index (int): Chunk number (1-based).
+
+        Returns:
+            int: Characters (or tokens) available for content.
+        """
+        budget = self.token_budget or self.chunk_size
+        if self.header is None:
+            return max(budget - self.header_size, 1)
+        reserve = self._header_sizes.get(index)
+        if reserve is None:
+            text = self.header(index)
+            reserve = self._header_sizes[index] = (
+                self.counter.tokenizer.count(text) if self.token_budget else len(text)
+            )
+        return max(budget - reserve, 1)
+
+    def _piece_room(self) -> int:
+        # pieces of split files must fit any chunk after the first, which
+        # have the longest header at the largest index
+        return min(self._room(2), self._room(max(self.max_chunks, 2)))
+
+    def _size(self, text: str, path: Optional[str] = None) -> int:
+        # size in the unit of this chunker (characters or tokens)
+        return self.counter.count(text, path) if self.token_budget else len(text)
@@ -3,17 +3,20 @@ from pathlib import Path
 import typer
 
 from .logger import logger, set_verbose
-from .pipeline import SnibPipeline
-from .utils import get_preset_choices, get_task_choices
+from .utils import complete_preset, complete_task
 
-pipeline = SnibPipeline()
 
-app = typer.Typer(
-    help="""snib scans projects and generates prompt-ready chunks.\n
+def _pipeline():
+    # imported on first use: --help and shell completion never load the scanner
+    from .pipeline import SnibPipeline
+
+    return SnibPipeline()
+
+
+app = typer.Typer(help="""snib scans projects and generates prompt-ready chunks.\n
             For help on a specific command, run:\n
                 snib COMMAND --help
-        """
-)
+        """)
 
 
 @app.command(help="Generate snibconfig.toml and prompts folder in project directory.")
@@ -27,9 +30,8 @@ def init(
     preset: str = typer.Option(
         None,
         "--preset",
-        help="Preset to use.",
-        show_choices=True,
-        click_type=get_preset_choices(),
+        help="Preset to use, e.g. 'python' (see the presets docs for all).",
+        autocompletion=complete_preset,
     ),
     custom_preset: Path = typer.Option(
         None, "--custom-preset", help="Path to a custom preset .toml file."
@@ -43,7 +45,7 @@ def init(
         preset (str, optional): Predefined preset to use.
         custom_preset (Path, optional): Path to custom TOML preset.
     """
-    pipeline.init(path=path, preset=preset, custom_preset=custom_preset)
+    _pipeline().init(path=path, preset=preset, custom_preset=custom_preset)
 
 
 @app.command(help="Scans your project and generates prompt-ready chunks.")
@@ -64,10 +66,8 @@ def scan(
         None,
         "--task",
         "-t",
-        help="Choose one of the available tasks to instruct the AI.",
-        case_sensitive=False,
-        show_choices=True,
-        click_type=get_task_choices(),
+        help="Choose one of the tasks in snibconfig.toml to instruct the AI.",
+        autocompletion=complete_task,
     ),
     include_raw: str = typer.Option(
         None,
@@ -105,6 +105,68 @@ def scan(
         "-f",
         help="Overwrite existing prompt files without asking for confirmation.",
     ),
+    walk_workers: int = typer.Option(
+        None,
+        "--walk-workers",
+        min=1,
+        help="Number of threads reading directories in parallel. Helps on network/FUSE mounts.",
+    ),
+    token_budget: int = typer.Option(
+        None,
+        "--token-budget",
+        min=1,
+        help="Max number of tokens per chunk. Replaces --chunk-size.",
+    ),
+    tokenizer: str = typer.Option(
+        None,
+        "--tokenizer",
+        help="Tokenizer for --token-budget: 'heuristic' or path to a local BPE vocabulary (.tiktoken).",
+    ),
+    layout: str = typer.Option(
+        None,
+        "--layout",
+        help="Chunk layout: 'greedy' (fill in order), 'ffd' or 'balanced' (pack whole files into fewer chunks).",
+    ),
+    bytes_mode: bool = typer.Option(
+        False,
+        "--bytes-mode",
+        help="Keep file contents as UTF-8 bytes from reading to writing (chunk size counts bytes).",
+    ),
+    output_format: str = typer.Option(
+        None,
+        "--output-format",
+        help="Output format: 'files' (prompt_N.txt) or 'pack' (one pack file plus JSON index).",
+    ),
+    compression: str = typer.Option(
+        None,
+        "--compression",
+        help="Compression of the pack for --output-format pack: 'none', 'gzip' or 'lzma'.",
+    ),
+    stdout: bool = typer.Option(
+        False,
+        "--stdout",
+        help="Stream chunks to stdout instead of the prompts folder (no confirmations).",
+    ),
+    output: str = typer.Option(
+        None,
+        "--output",
+        help="Output target, '-' streams to stdout (same as --stdout).",
+    ),
+    framing: str = typer.Option(
+        None,
+        "--framing",
+        help="Chunk framing on stdout: 'nul' (NUL byte after each chunk) or 'jsonl' (one JSON object per line).",
+    ),
+    no_cache: bool = typer.Option(
+        False,
+        "--no-cache",
+        help="Read every file again, without using or updating the scan cache in prompts/.snib-cache.",
+    ),
+    dedupe: bool = typer.Option(
+        False,
+        "--dedupe",
+        help="Emit files identical to an earlier file as a one-line stub instead of their content.",
+    ),
 ):
     """
     Scan the project directory and generate prompt-ready chunks for LLMs.
@@ -119,8 +181,193 @@ def scan(
         smart (bool): Enable smart mode to auto-include only relevant code files.
         chunk_size (int, optional): Maximum number of characters per chunk.
         force (bool): Overwrite existing prompt files without asking.
+        walk_workers (int, optional): Number of threads reading directories in parallel.
+        token_budget (int, optional): Maximum number of tokens per chunk.
+        tokenizer (str, optional): Tokenizer used for the token budget.
+        layout (str, optional): Chunk layout (greedy, ffd, balanced).
+        bytes_mode (bool): Keep file contents as UTF-8 bytes end to end.
+        output_format (str, optional): Output format (files, pack).
+        compression (str, optional): Pack compression (none, gzip, lzma).
+        stdout (bool): Stream chunks to stdout.
+        output (str, optional): Output target ("-" for stdout).
+        framing (str, optional): Chunk framing on stdout (nul, jsonl).
+        no_cache (bool): Disable the scan cache.
+        dedupe (bool): Replace duplicate files with stubs.
+    """
+    _pipeline().scan(
+        path=path,
+        description=description,
+        task=task,
+        include_raw=include_raw,
+        exclude_raw=exclude_raw,
+        no_default_exclude=no_default_exclude,
+        smart=smart,
+        chunk_size=chunk_size,
+        force=force,
+        walk_workers=walk_workers,
+        token_budget=token_budget,
+        tokenizer=tokenizer,
+        layout=layout,
+        bytes_mode=bytes_mode,
+        output_format=output_format,
+        compression=compression,
+        stdout=stdout,
+        output=output,
+        framing=framing,
+        no_cache=no_cache,
+        dedupe=dedupe,
+    )
+
+
+@app.command(help="Scans your project and regenerates the prompts whenever it changes.")
+def watch(
+    path: Path = typer.Option(
+        Path.cwd(),
+        "--path",
+        "-p",
+        help="Project directory to run 'snib watch' on.",
+    ),
+    description: str = typer.Option(
+        None,
+        "--description",
+        "-d",
+        help="Short project description or changes you want to make.",
+    ),
+    task: str = typer.Option(
+        None,
+        "--task",
+        "-t",
+        help="Choose one of the tasks in snibconfig.toml to instruct the AI.",
+        autocompletion=complete_task,
+    ),
+    include_raw: str = typer.Option(
+        None,
+        "--include",
+        "-i",
+        help="Datatypes or folders/files to included, e.g. '*.py, cli.py'",
+    ),
+    exclude_raw: str = typer.Option(
+        None,
+        "--exclude",
+        "-e",
+        help="Datatypes or folders/files to excluded, e.g. '*.pyc, __pycache__'",
+    ),
+    no_default_exclude: bool = typer.Option(
+        False,
+        "--no-default-excludes",
+        "-E",
+        help="Disable default exclusion. Not suggested.",
+    ),
+    smart: bool = typer.Option(
+        False,
+        "--smart",
+        "-s",
+        help="Smart mode automatically includes only code files and ignores large data/log files.",
+    ),
+    chunk_size: int = typer.Option(
+        None,
+        "--chunk-size",
+        "-c",
+        help="Max number of characters per chunk. Rule of thumb: 1 token ≈ 3-4 chars.",
+    ),
+    force: bool = typer.Option(
+        False,
+        "--force",
+        "-f",
+        help="Overwrite existing prompt files without asking for confirmation.",
+    ),
+    walk_workers: int = typer.Option(
+        None,
+        "--walk-workers",
+        min=1,
+        help="Number of threads reading directories in parallel. Helps on network/FUSE mounts.",
+    ),
+    token_budget: int = typer.Option(
+        None,
+        "--token-budget",
+        min=1,
+        help="Max number of tokens per chunk. Replaces --chunk-size.",
+    ),
+    tokenizer: str = typer.Option(
+        None,
+        "--tokenizer",
+        help="Tokenizer for --token-budget: 'heuristic' or path to a local BPE vocabulary (.tiktoken).",
+    ),
+    layout: str = typer.Option(
+        None,
+        "--layout",
+        help="Chunk layout: 'greedy' (fill in order), 'ffd' or 'balanced' (pack whole files into fewer chunks).",
+    ),
+    bytes_mode: bool = typer.Option(
+        False,
+        "--bytes-mode",
+        help="Keep file contents as UTF-8 bytes from reading to writing (chunk size counts bytes).",
+    ),
+    output_format: str = typer.Option(
+        None,
+        "--output-format",
+        help="Output format: 'files' (prompt_N.txt) or 'pack' (one pack file plus JSON index).",
+    ),
+    compression: str = typer.Option(
+        None,
+        "--compression",
+        help="Compression of the pack for --output-format pack: 'none', 'gzip' or 'lzma'.",
+    ),
+    no_cache: bool = typer.Option(
+        False,
+        "--no-cache",
+        help="Read every file again on each update, without using or updating the scan cache.",
+    ),
+    debounce: int = typer.Option(
+        None,
+        "--debounce",
+        min=0,
+        help="Milliseconds without changes before the prompts are regenerated.",
+    ),
+    poll: bool = typer.Option(
+        False,
+        "--poll",
+        help="Poll the project for changes instead of using inotify.",
+    ),
+    poll_interval: float = typer.Option(
+        None,
+        "--poll-interval",
+        min=0.01,
+        help="Seconds between two polls.",
+    ),
+    dedupe: bool = typer.Option(
+        False,
+        "--dedupe",
+        help="Emit files identical to an earlier file as a one-line stub instead of their content.",
+    ),
+):
+    """
+    Scan the project directory, then regenerate the prompts on every change.
+
+    Args:
+        path (Path): Project directory to watch. Defaults to current working directory.
+        description (str, optional): Short description of the project or changes.
+        task (str, optional): Task instruction for the AI.
+        include_raw (str): Comma-separated patterns of files/folders to include.
+        exclude_raw (str): Comma-separated patterns of files/folders to exclude.
+        no_default_exclude (bool): Disable default exclusions. Defaults to False.
+        smart (bool): Enable smart mode to auto-include only relevant code files.
+        chunk_size (int, optional): Maximum number of characters per chunk.
+        force (bool): Overwrite existing prompt files without asking.
+        walk_workers (int, optional): Number of threads reading directories in parallel.
+        token_budget (int, optional): Maximum number of tokens per chunk.
+        tokenizer (str, optional): Tokenizer used for the token budget.
+        layout (str, optional): Chunk layout (greedy, ffd, balanced).
+        bytes_mode (bool): Keep file contents as UTF-8 bytes end to end.
+        output_format (str, optional): Output format (files, pack).
+        compression (str, optional): Pack compression (none, gzip, lzma).
+        no_cache (bool): Disable the scan cache.
+        debounce (int, optional): Quiet period in milliseconds before an update.
+        poll (bool): Poll instead of using inotify.
+        poll_interval (float, optional): Seconds between two polls.
+        dedupe (bool): Replace duplicate files with stubs.
     """
-    pipeline.scan(
+    _pipeline().scan(
         path=path,
         description=description,
         task=task,
@@ -130,6 +377,19 @@ def scan(
         smart=smart,
         chunk_size=chunk_size,
         force=force,
+        walk_workers=walk_workers,
+        token_budget=token_budget,
+        tokenizer=tokenizer,
+        layout=layout,
+        bytes_mode=bytes_mode,
+        output_format=output_format,
+        compression=compression,
+        no_cache=no_cache,
+        watch=True,
+        debounce_ms=debounce,
+        poll_interval=poll_interval,
+        poll=poll,
+        dedupe=dedupe,
     )
 
 
@@ -157,7 +417,7 @@ def clean(
         config_only (bool): Delete only `snibconfig.toml`.
         output_only (bool): Delete only the prompts folder.
     """
-    pipeline.clean(
+    _pipeline().clean(
         path=path, force=force, config_only=config_only, output_only=output_only
     )
 
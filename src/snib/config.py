@@ -80,15 +80,52 @@ SNIB_DEFAULT_CONFIG = {
         "no_default_exclude": False,
         "smart": False,
         "warning_include_limit": 100,
+        "excluded_stats": "exact",
+        "max_file_size": 0,
+        "max_file_size_overrides": {},
+        "minified": "split",
+        "dedupe": False,
     },
     "output": {
         "chunk_size": 30000,
         "force": False,
+        "tree_max_depth": 0,
+        "tree_max_entries": 200,
+        "token_budget": 0,
+        "tokenizer": "heuristic",
+        "layout": "greedy",
+        "output_format": "files",
+        "compression": "none",
+        "framing": "nul",
+    },
+    "performance": {
+        "walk_workers": 1,
+        "read_workers": 8,
+        "read_buffer_mb": 64,
+        "bytes_mode": False,
+        "cache": True,
+        "cache_max_mb": 256,
+        "cache_max_age_days": 30,
+        "watch_backend": "auto",
+        "watch_debounce_ms": 300,
+        "watch_poll_interval": 1.0,
     },
 }
 
+SNIB_EXCLUDED_STATS_MODES = ("exact", "shallow", "off")
+SNIB_CHUNK_LAYOUTS = ("greedy", "ffd", "balanced")
+SNIB_MINIFIED_MODES = ("split", "skip", "summarize")
+SNIB_OUTPUT_FORMATS = ("files", "pack")
+SNIB_PACK_COMPRESSIONS = ("none", "gzip", "lzma")
+SNIB_STREAM_FRAMINGS = ("nul", "jsonl")
+SNIB_WATCH_BACKENDS = ("auto", "inotify", "poll")
+
 SNIB_CONFIG_FILE = "snibconfig.toml"
 SNIB_PROMPTS_DIR = "prompts"
+SNIB_CACHE_DIR = ".snib-cache"  # inside SNIB_PROMPTS_DIR
+SNIB_SCAN_CACHE = "scan.sqlite"  # inside SNIB_CACHE_DIR
+SNIB_PACK_FILE = "prompts.pack"  # inside SNIB_PROMPTS_DIR (+ .gz/.xz)
+SNIB_PACK_INDEX = "prompts.index.json"  # inside SNIB_PROMPTS_DIR
 
 
 def write_config(
@@ -162,7 +199,10 @@ def check_config(config: dict) -> dict:
 
     typer.Exit is called on fatal errors.
     """
-    mandatory_sections = list(SNIB_DEFAULT_CONFIG.keys())
+    optional_sections = ["performance"]
+    mandatory_sections = [
+        sec for sec in SNIB_DEFAULT_CONFIG.keys() if sec not in optional_sections
+    ]
     missing_sections = [sec for sec in mandatory_sections if sec not in config]
 
     if missing_sections:
@@ -174,9 +214,27 @@ def check_config(config: dict) -> dict:
         )
         raise typer.Exit()
 
-    optional_subsections = ["warning_include_limit", "task_dict"]
+    optional_subsections = [
+        "warning_include_limit",
+        "excluded_stats",
+        "max_file_size",
+        "max_file_size_overrides",
+        "minified",
+        "dedupe",
+        "task_dict",
+        "tree_max_depth",
+        "tree_max_entries",
+        "token_budget",
+        "tokenizer",
+        "layout",
+        "output_format",
+        "compression",
+        "framing",
+    ]
     missing_subsections = []
     for sec, defaults in SNIB_DEFAULT_CONFIG.items():
+        if sec in optional_sections:
+            continue
         for sub in defaults.keys():
             if sub in optional_subsections:
                 continue
@@ -1,7 +1,14 @@
+from typing import Callable, Iterable, Iterator
+
 from .logger import logger
 from .models import FilterStats, Section
 from .utils import format_size
 
+PROMPT_FILE_FIRST = (
+    "Please do not give output until all prompt files are sent. Prompt file "
+)
+PROMPT_FILE_NEXT = "Prompt file "
+
 
 class Formatter:
     """
@@ -23,7 +30,8 @@ class Formatter:
         - task: AI task instructions
         - filters: included/excluded patterns with statistics
         - tree: project folder tree
-        - file: actual file content with path header
+        - file: actual file content with path header (marks truncated files),
+          or a one-line stub for duplicates
 
         Args:
             sections (list[Section]): A list of Section objects representing
@@ -36,24 +44,38 @@ class Formatter:
         Notes:
             - INFO, DESCRIPTION and TASK sections are skipped if empty.
         """
+        return list(self.iter_prompt_text(sections))
+
+    def iter_prompt_text(self, sections: Iterable[Section]) -> Iterator[str]:
+        """
+        Lazily convert Section objects into prompt-ready strings.
 
-        texts = []
+        Streaming version of `to_prompt_text`: each section is formatted when
+        it is requested, so sections (and file contents) can be dropped as
+        soon as the chunker has consumed them.
+
+        Args:
+            sections (Iterable[Section]): Sections, e.g. from a generator.
+
+        Yields:
+            str: One formatted string per non-empty section.
+        """
         for s in sections:
             if s.type == "info":
                 if s.content:
-                    texts.append(f"#[INFO]\n{s.content}\n")
+                    yield f"#[INFO]\n{s.content}\n"
                 else:
                     logger.info("Only one prompt file; skipping INFO section.")
             elif s.type == "description":
                 if s.content:
-                    texts.append(f"#[DESCRIPTION]\n{s.content}\n\n")
+                    yield f"#[DESCRIPTION]\n{s.content}\n\n"
                 else:
                     logger.info(
                         "No description provided; skipping DESCRIPTION section."
                     )
             elif s.type == "task":
                 if s.content:
-                    texts.append(f"#[TASK]\n{s.content}\n\n")
+                    yield f"#[TASK]\n{s.content}\n\n"
                 else:
                     logger.info("No task specified; skipping TASK section.")
             elif s.type == "filters":
@@ -65,25 +87,112 @@ class Formatter:
                 exclude_stats_text = (
                     self._format_stats(s.exclude_stats) if s.exclude_stats else ""
                 )
+                dedupe_text = (
+                    f"Duplicate files: {self._format_stats(s.dedupe_stats)}\n"
+                    if s.dedupe_stats
+                    else ""
+                )
+                # only mentioned if there are any (not part of "Included files")
+                skipped_text = ""
+                if s.binary_stats and s.binary_stats.files:
+                    skipped_text += f"Binary files: {self._format_stats(s.binary_stats)} (skipped)\n"
+                if s.minified_stats and s.minified_stats.files:
+                    action = "skipped" if s.minified == "skip" else "summarized"
+                    skipped_text += f"Minified files: {self._format_stats(s.minified_stats)} ({action})\n"
 
-                texts.append(
+                yield (
                     f"#[INCLUDE/EXCLUDE]\n"
                     f"Include patterns: {include_text}\n"
                     f"Exclude patterns: {exclude_text}\n"
                     f"Included files: {include_stats_text}\n"
-                    f"Excluded files: {exclude_stats_text}\n\n"
+                    f"Excluded files: {exclude_stats_text}\n"
+                    f"{skipped_text}"
+                    f"{dedupe_text}\n"
                 )
             elif s.type == "tree":
-                texts.append(f"#[PROJECT TREE]\n{s.content}\n\n")
+                yield f"#[PROJECT TREE]\n{s.content}\n\n"
             elif s.type == "file":
-                texts.append(f"#[FILE] {s.path}\n{s.content}\n\n")
-        return texts
+                if s.duplicate_of is not None:
+                    yield f"#[FILE] {s.path} (identical to {s.duplicate_of})\n\n"
+                else:
+                    yield f"{self._file_header(s)}{s.content}\n\n"
+
+    def iter_prompt_bytes(self, sections: Iterable[Section]) -> Iterator[bytes]:
+        """
+        Lazily convert Section objects into prompt-ready UTF-8 bytes (bytes mode).
+
+        File sections with `bytes` content (see `FileReader(as_bytes=True)`)
+        are framed without decoding: header, content and separator are joined
+        into one buffer. All other sections are formatted as text and encoded.
+
+        Args:
+            sections (Iterable[Section]): Sections, e.g. from a generator.
+
+        Yields:
+            bytes: One formatted UTF-8 buffer per non-empty section.
+        """
+        for s in sections:
+            if s.type == "file" and isinstance(s.content, bytes):
+                header = self._file_header(s).encode("utf-8")
+                yield b"".join((header, s.content, b"\n\n"))
+            else:
+                for text in self.iter_prompt_text([s]):
+                    yield text.encode("utf-8")
+
+    @staticmethod
+    def _file_header(s: Section) -> str:
+        # "#[FILE] path" line, marks truncated files with their original size
+        if s.original_size is not None:
+            return f"#[FILE] {s.path} (truncated, original size: {format_size(s.original_size)})\n"
+        return f"#[FILE] {s.path}\n"
+
+    def compile_header(self) -> Callable[[int, int, int], str]:
+        """
+        Precompile the "Prompt file i/total" INFO header of the prompt files.
+
+        The INFO section is formatted once per variant (first file / other
+        files) around a marker and split into constant text before and after
+        `i/total`, so rendering a header is a single concatenation instead of
+        a formatter pass per chunk.
+
+        Returns:
+            Callable[[int, int, int], str]: `header(i, total, width)` with
+                `total` left-aligned to `width` digits, "" if `total` <= 1.
+        """
+        marker = "\0"
+
+        def split(lead: str) -> tuple[str, str]:
+            text = "".join(
+                self.iter_prompt_text(
+                    [Section(type="info", content=f"{lead}{marker}\n")]
+                )
+            )
+            before, _, after = text.partition(marker)
+            return before, after
+
+        first_before, first_after = split(PROMPT_FILE_FIRST)
+        next_before, next_after = split(PROMPT_FILE_NEXT)
+
+        def header(i: int, total: int, width: int) -> str:
+            if total <= 1:
+                return ""
+            if i == 1:
+                return f"{first_before}{i}/{total:<{width}}{first_after}"
+            return f"{next_before}{i}/{total:<{width}}{next_after}"
+
+        return header
 
     def _format_stats(self, stats: FilterStats) -> str:
         """
         Format FilterStats for human-readable output.
 
         Shows number of files and total size using readable units. (B/KB/MB/GB)
+        The text depends on the mode the statistics were computed with:
+        - exact: all files are counted.
+        - shallow: pruned directories are listed as opaque entries.
+        - off: statistics were not computed.
+
+        Duplicate statistics also show the tokens saved by the stubs.
 
         Args:
             stats (FilterStats): Statistics object containing file count
@@ -92,4 +201,11 @@ class Formatter:
         Returns:
             str: Formatted string, e.g. "files: 10, total size: 2.5 MB".
         """
-        return f"files: {stats.files}, total size: {format_size(stats.size)}"
+        if stats.mode == "off":
+            return "not computed"
+        text = f"files: {stats.files}, total size: {format_size(stats.size)}"
+        if stats.mode == "shallow":
+            text += f" (+ {stats.dirs} pruned folder(s) not counted)"
+        if stats.type == "duplicate":
+            text += f" (replaced by stubs, saved tokens: ~{stats.tokens})"
+        return text
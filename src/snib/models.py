@@ -1,6 +1,6 @@
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Union
 
 
 @dataclass
@@ -12,11 +12,48 @@ class FilterStats:
         type (str): Type of statistics, e.g., "included" or "excluded".
         files (int): Number of files matching the filter. Defaults to 0.
         size (int): Total size in bytes of all files matching the filter. Defaults to 0.
+        dirs (int): Number of pruned directories counted as opaque entries
+            (only set in "shallow" mode). Defaults to 0.
+        mode (str): How the statistics were computed: "exact", "shallow" or "off".
+            Defaults to "exact".
+        tokens (int): Tokens saved by replacing the files with stubs (only set
+            for "duplicate" statistics). Defaults to 0.
     """
 
     type: str
     files: int = 0
     size: int = 0
+    dirs: int = 0
+    mode: str = "exact"
+    tokens: int = 0
+
+
+@dataclass
+class IndexEntry:
+    """
+    Represents a single filesystem entry recorded while scanning a project.
+
+    The scanner walks the project directory once and stores every entry in an
+    in-memory index. The included file list, filter statistics and the project
+    tree are all derived from this index instead of walking the disk again.
+
+    Attributes:
+        path (str): Relative POSIX path from the project root.
+        is_dir (bool): True if the entry is a directory.
+        size (int): File size in bytes (0 for directories). Defaults to 0.
+        mtime_ns (int): Modification time in nanoseconds. Defaults to 0.
+        inode (int): Inode number (0 where the platform does not report it).
+            Defaults to 0.
+        included (bool): Filter verdict. For files: True if the file is included.
+            For directories: True if the directory is not excluded. Defaults to False.
+    """
+
+    path: str
+    is_dir: bool
+    size: int = 0
+    mtime_ns: int = 0
+    included: bool = False
+    inode: int = 0
 
 
 @dataclass
@@ -29,18 +66,37 @@ class Section:
 
     Attributes:
         type (str): Section type, e.g., "description", "task", "filters", "tree", "file", "info".
-        content (str): The textual content of the section. Defaults to empty string.
+        content (str | bytes): The textual content of the section (UTF-8 bytes
+            for file sections in bytes mode). Defaults to empty string.
         path (Optional[Path]): Path of the file if section represents a file. Defaults to None.
         include (Optional[list[str]]): List of included patterns (for filter sections). Defaults to None.
         exclude (Optional[list[str]]): List of excluded patterns (for filter sections). Defaults to None.
         include_stats (Optional[FilterStats]): Statistics for included files. Defaults to None.
         exclude_stats (Optional[FilterStats]): Statistics for excluded files. Defaults to None.
+        dedupe_stats (Optional[FilterStats]): Statistics for duplicate files replaced
+            by stubs (only set if deduplication is enabled). Defaults to None.
+        binary_stats (Optional[FilterStats]): Statistics for included binary files
+            left out of the prompt. Defaults to None.
+        minified_stats (Optional[FilterStats]): Statistics for included minified
+            files that are skipped or summarized (see `minified`). Defaults to None.
+        minified (str): Minified mode ("split", "skip" or "summarize") of the
+            filter section. Defaults to "split".
+        original_size (Optional[int]): Original size in bytes if the file content was
+            truncated to head/tail windows. Defaults to None (not truncated).
+        duplicate_of (Optional[Path]): Earlier file with identical content, the file
+            is emitted as a stub pointing to it. Defaults to None.
     """
 
     type: str
-    content: str = ""
+    content: Union[str, bytes] = ""
     path: Optional[Path] = None
     include: Optional[list[str]] = None
     exclude: Optional[list[str]] = None
     include_stats: Optional[FilterStats] = None
     exclude_stats: Optional[FilterStats] = None
+    dedupe_stats: Optional[FilterStats] = None
+    binary_stats: Optional[FilterStats] = None
+    minified_stats: Optional[FilterStats] = None
+    minified: str = "split"
+    original_size: Optional[int] = None
+    duplicate_of: Optional[Path] = None
@@ -0,0 +1,193 @@
+import os
+import re
+
+_TRIE_END = "/"  # path components never contain "/", safe as end marker
+
+
+def split_patterns(patterns: list[str]) -> tuple[list[str], list[str]]:
+    """
+    Splits patterns into glob patterns and prefix patterns.
+
+    Examples:
+        "*.py"     -> glob
+        "src/snib" -> prefix
+        "utils.py" -> prefix (exact filename)
+
+    Args:
+        patterns (list[str]): List of pattern strings.
+
+    Returns:
+        tuple[list[str], list[str]]:
+            - globs: Glob-style patterns (with `*`, `?`).
+            - prefixes: Exact filenames or directory prefixes.
+    """
+    globs = []
+    prefixes = []
+    for p in patterns:
+        p = str(p).replace("\\", "/").rstrip("/")  # normalise Windows/Linux
+        if "*" in p or "?" in p:
+            globs.append(p)
+        else:
+            prefixes.append(p)
+    return globs, prefixes
+
+
+def _translate(pattern: str) -> str:
+    """
+    Translate a glob pattern into a regular expression (without anchors).
+
+    Follows `fnmatch` semantics (`*` also matches `/`), plus globstar support:
+    - `**/` matches zero or more leading directories (`**/x.py` matches `x.py`).
+    - a trailing `/**` matches the directory itself and everything below it.
+
+    Args:
+        pattern (str): Normalised glob pattern.
+
+    Returns:
+        str: Regular expression source.
+    """
+    i, n = 0, len(pattern)
+    out = []
+    while i < n:
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == n:
+            out.append("(?:/.*)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        else:
+            c = pattern[i]
+            i += 1
+            if c == "*":
+                out.append(".*")
+            elif c == "?":
+                out.append(".")
+            elif c == "[":
+                # character class, same rules as fnmatch.translate
+                j = i
+                if j < n and pattern[j] == "!":
+                    j += 1
+                if j < n and pattern[j] == "]":
+                    j += 1
+                while j < n and pattern[j] != "]":
+                    j += 1
+                if j >= n:
+                    out.append("\\[")
+                else:
+                    stuff = pattern[i:j].replace("\\", "\\\\")
+                    i = j + 1
+                    if stuff[0] == "!":
+                        stuff = "^" + stuff[1:]
+                    elif stuff[0] in ("^", "["):
+                        stuff = "\\" + stuff
+                    out.append(f"[{stuff}]")
+            else:
+                out.append(re.escape(c))
+    return "".join(out)
+
+
+class PatternSet:
+    """
+    A set of include or exclude patterns compiled once per scan.
+
+    Matching semantics are the same as the original per-pattern checks
+    (glob against filename or relative path, prefix against path parts),
+    but each pattern kind is compiled into a fast structure:
+    - Pure extension globs (`*.py`, `*.tar.gz`) become a suffix hash lookup.
+    - All remaining globs are merged into one anchored regex with `**` support.
+    - Prefix patterns (`src/snib`, `__pycache__`) live in a path-component trie
+      and match wherever their components appear in the path.
+
+    Attributes:
+        patterns (list[str]): The original patterns.
+    """
+
+    def __init__(self, patterns: list[str]):
+        """
+        Compile a PatternSet.
+
+        Args:
+            patterns (list[str]): Glob and prefix patterns.
+        """
+        self.patterns = list(patterns)
+        # fnmatch normalises case on case-insensitive platforms (Windows)
+        self._ignore_case = os.path.normcase("A") == "a"
+
+        globs, prefixes = split_patterns(self.patterns)
+
+        self._suffixes = set()
+        regex_globs = []
+        for g in globs:
+            g = self._norm(g)
+            ext = g[1:]
+            if g.startswith("*.") and not any(c in ext for c in "*?[/"):
+                self._suffixes.add(ext)
+            else:
+                regex_globs.append(g)
+
+        self._regex = (
+            re.compile("|".join(f"(?:{_translate(g)})" for g in regex_globs), re.S)
+            if regex_globs
+            else None
+        )
+
+        self._trie = {}
+        for p in prefixes:
+            if not p:
+                continue
+            node = self._trie
+            for part in self._norm(p).split("/"):
+                node = node.setdefault(part, {})
+            node[_TRIE_END] = True
+
+    def _norm(self, value: str) -> str:
+        return value.lower() if self._ignore_case else value
+
+    def match(self, rel_path: str, name: str = None) -> bool:
+        """
+        Checks whether a relative path matches any pattern of the set.
+
+        Args:
+            rel_path (str): Relative POSIX path from project root.
+            name (str, optional): Filename only. Derived from `rel_path` if omitted.
+
+        Returns:
+            bool: True if the path matches any pattern, else False.
+        """
+        if name is None:
+            name = rel_path.rsplit("/", 1)[-1]
+        if self._ignore_case:
+            rel_path, name = rel_path.lower(), name.lower()
+
+        # extension fast path: try every suffix starting at a dot
+        if self._suffixes:
+            i = name.find(".")
+            while i != -1:
+                if name[i:] in self._suffixes:
+                    return True
+                i = name.find(".", i + 1)
+
+        if self._regex is not None and (
+            self._regex.fullmatch(name) or self._regex.fullmatch(rel_path)
+        ):
+            return True
+
+        # prefix trie: components of a prefix anywhere in the path
+        if self._trie:
+            parts = rel_path.split("/")
+            for start in range(len(parts)):
+                node = self._trie
+                for part in parts[start:]:
+                    node = node.get(part)
+                    if node is None:
+                        break
+                    if _TRIE_END in node:
+                        return True
+
+        return False
+
+    def __bool__(self) -> bool:
+        return bool(self._suffixes or self._regex is not None or self._trie)
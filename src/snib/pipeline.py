@@ -14,7 +14,11 @@ from .config import (
 )
 from .logger import logger
 from .scanner import Scanner
-from .utils import check_include_in_exclude, detect_pattern_conflicts
+from .utils import (
+    check_include_in_exclude,
+    detect_pattern_conflicts,
+    get_preset_choices,
+)
 
 
 class SnibPipeline:
@@ -57,6 +61,13 @@ class SnibPipeline:
             logger.error("--preset and --custom-preset cannot be used together.")
             raise typer.Exit()
 
+        # presets are checked here instead of by the CLI, so --help stays cheap
+        if preset and preset not in get_preset_choices():
+            logger.error(
+                f"Unknown preset '{preset}'. Available: {', '.join(sorted(get_preset_choices()))}"
+            )
+            raise typer.Exit()
+
         # check if config already exists else load and write config
         if config_path.exists():
             logger.error(f"{SNIB_CONFIG_FILE} already exists at {config_path}")
@@ -106,6 +117,22 @@ class SnibPipeline:
         smart: bool = False,
         chunk_size: int = None,
         force: bool = False,
+        walk_workers: int = None,
+        token_budget: int = None,
+        tokenizer: str = None,
+        layout: str = None,
+        bytes_mode: bool = False,
+        output_format: str = None,
+        compression: str = None,
+        stdout: bool = False,
+        output: str = None,
+        framing: str = None,
+        no_cache: bool = False,
+        watch: bool = False,
+        debounce_ms: int = None,
+        poll_interval: float = None,
+        poll: bool = False,
+        dedupe: bool = False,
     ):
         """
         Runs the Snib scanning pipeline on the specified project.
@@ -128,6 +155,23 @@ class SnibPipeline:
             smart (bool): Enables smart filtering for code files.
             chunk_size (int): Max number of characters per prompt chunk.
             force (bool): Overwrite existing output files without confirmation.
+            walk_workers (int): Number of threads reading directories in parallel.
+            token_budget (int): Max number of tokens per prompt chunk (replaces chunk_size).
+            tokenizer (str): "heuristic" or path to a local BPE vocabulary file.
+            layout (str): Chunk layout: "greedy", "ffd" or "balanced".
+            bytes_mode (bool): Keep file contents as UTF-8 bytes end to end.
+            output_format (str): "files" (prompt_N.txt) or "pack" (pack file + index).
+            compression (str): Pack compression: "none", "gzip" or "lzma".
+            stdout (bool): Stream chunks to stdout instead of the `prompts` folder.
+            output (str): "-" is the same as `stdout`.
+            framing (str): Chunk framing on stdout: "nul" or "jsonl".
+            no_cache (bool): Neither use nor update the scan cache.
+            watch (bool): Keep running and regenerate the prompts on changes
+                (`snib watch`).
+            debounce_ms (int): Quiet period before a watch update.
+            poll_interval (float): Seconds between snapshots when polling.
+            poll (bool): Poll instead of using inotify.
+            dedupe (bool): Replace files identical to an earlier file with stubs.
 
         Raises:
             typer.Exit: If configuration or output folder is missing.
@@ -145,7 +189,18 @@ class SnibPipeline:
             config = check_config(config)  # validate config
             config_missing = False
 
-        if not output_path.exists():
+        if watch and (stdout or output):
+            logger.error("snib watch writes to the prompts folder, not to stdout.")
+            raise typer.Exit()
+
+        if output == "-":
+            stdout = True
+        elif output:
+            logger.error(f"Unsupported --output '{output}', use '-' for stdout.")
+            raise typer.Exit()
+
+        # streaming to stdout does not need the prompts folder
+        if not stdout and not output_path.exists():
             logger.error(f"Output directory '{output_path}' not found")
             output_missing = True
         else:
@@ -167,6 +222,15 @@ class SnibPipeline:
 
         # combine values: CLI > config
         description = description or config["project"]["description"]
+        if task:
+            # tasks come from the project config, so the CLI cannot check them
+            task_keys = {t.lower(): t for t in config["instruction"]["task_dict"]}
+            if task.lower() not in task_keys:
+                logger.error(
+                    f"Unknown task '{task}'. Available: {', '.join(task_keys.values())}"
+                )
+                raise typer.Exit()
+            task = task_keys[task.lower()]
         task = task or config["instruction"]["task"]
 
         # get user includes
@@ -229,9 +293,75 @@ class SnibPipeline:
 
         chunk_size = chunk_size or config["output"]["chunk_size"]
         force = force or config["output"]["force"]
+        # [performance] is optional in snibconfig.toml
+        walk_workers = walk_workers or config.get("performance", {}).get(
+            "walk_workers", 1
+        )
+        bytes_mode = bytes_mode or config.get("performance", {}).get(
+            "bytes_mode", False
+        )
+        use_cache = not no_cache and config.get("performance", {}).get("cache", True)
+        # dedupe is optional in snibconfig.toml
+        dedupe = dedupe or config["filters"].get("dedupe", False)
+
+        # token budget is optional in snibconfig.toml (0 = use chunk_size)
+        token_budget = token_budget or config["output"].get("token_budget", 0)
+        tokenizer = tokenizer or config["output"].get("tokenizer", "heuristic")
+        layout = layout or config["output"].get("layout", "greedy")
+        # output format is optional in snibconfig.toml
+        output_format = output_format or config["output"].get("output_format", "files")
+        compression = compression or config["output"].get("compression", "none")
+        framing = framing or config["output"].get("framing", "nul")
 
         scanner = Scanner(path, config)
-        scanner.scan(description, include, exclude, chunk_size, force, task)
+        if watch:
+            # watch options are optional in snibconfig.toml
+            performance = config.get("performance", {})
+            scanner.watch(
+                description,
+                include,
+                exclude,
+                chunk_size,
+                force,
+                task,
+                walk_workers,
+                token_budget,
+                tokenizer,
+                layout,
+                bytes_mode,
+                output_format,
+                compression,
+                use_cache,
+                "poll" if poll else performance.get("watch_backend", "auto"),
+                (
+                    performance.get("watch_debounce_ms", 300)
+                    if debounce_ms is None
+                    else debounce_ms
+                ),
+                poll_interval or performance.get("watch_poll_interval", 1.0),
+                dedupe,
+            )
+            return
+
+        scanner.scan(
+            description,
+            include,
+            exclude,
+            chunk_size,
+            force,
+            task,
+            walk_workers,
+            token_budget,
+            tokenizer,
+            layout,
+            bytes_mode,
+            output_format,
+            compression,
+            stdout,
+            framing,
+            use_cache,
+            dedupe,
+        )
 
     def clean(self, path: Path, force: bool, config_only: bool, output_only: bool):
         """
@@ -0,0 +1,531 @@
+import codecs
+import io
+import mmap
+import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Union
+
+from .models import IndexEntry
+from .patterns import PatternSet
+
+SNIFF_SIZE = 8192  # bytes read to classify a file as text or binary
+
+# byte order marks, longest first (UTF-32 LE starts with the UTF-16 LE BOM)
+BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+# codec for data after the BOM (e.g. the tail window of a truncated file)
+BOM_FREE_ENCODINGS = {
+    codecs.BOM_UTF32_LE: "utf-32-le",
+    codecs.BOM_UTF32_BE: "utf-32-be",
+    codecs.BOM_UTF8: "utf-8",
+    codecs.BOM_UTF16_LE: "utf-16-le",
+    codecs.BOM_UTF16_BE: "utf-16-be",
+}
+
+# well-known binary formats that may start with printable bytes
+MAGIC_NUMBERS = (
+    b"\x89PNG\r\n\x1a\n",  # PNG
+    b"\xff\xd8\xff",  # JPEG
+    b"GIF87a",
+    b"GIF89a",
+    b"%PDF-",
+    b"PK\x03\x04",  # zip, jar, docx, unitypackage, ...
+    b"\x1f\x8b",  # gzip
+    b"BZh",  # bzip2
+    b"\xfd7zXZ\x00",  # xz
+    b"7z\xbc\xaf\x27\x1c",
+    b"Rar!\x1a\x07",
+    b"\x7fELF",
+    b"\xca\xfe\xba\xbe",  # Java class / Mach-O fat binary
+    b"\xcf\xfa\xed\xfe",  # Mach-O 64-bit
+    b"\x00asm",  # WebAssembly
+    b"SQLite format 3\x00",
+    b"OggS",
+    b"RIFF",  # wav, avi, webp
+    b"ID3",  # mp3
+    b"\x00\x00\x01\x00",  # ico
+)
+
+# minified/generated one-liners: average or longest line above these sizes
+MINIFIED_AVG_LINE = 500
+MINIFIED_MAX_LINE = 5000
+
+# bytes that do not appear in text (everything < 0x20 except \t \n \f \r \x1b)
+_TEXT_CONTROL = {7, 8, 9, 10, 12, 13, 27}
+_CONTROL_BYTES = bytes(b for b in range(32) if b not in _TEXT_CONTROL) + b"\x7f"
+
+
+def sniff_encoding(head: bytes) -> Optional[str]:
+    """
+    Classify the first bytes of a file as text (with encoding) or binary.
+
+    Checks, in order:
+    - Byte order marks (UTF-8/16/32).
+    - Magic numbers of common binary formats.
+    - NUL bytes (binary, unless they look like BOM-less UTF-16).
+    - Valid UTF-8 (a multi-byte sequence cut off at the end is fine).
+    - Share of control characters, otherwise Latin-1.
+
+    Args:
+        head (bytes): First bytes of the file (see `SNIFF_SIZE`).
+
+    Returns:
+        str | None: Python codec name for text files, None for binary files.
+    """
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding
+
+    if head.startswith(MAGIC_NUMBERS):
+        return None
+
+    if b"\x00" in head:
+        # BOM-less UTF-16: ASCII text has a NUL in every other byte
+        even, odd = head[0::2], head[1::2]
+        if odd and odd.count(0) > 0.9 * len(odd) and even.count(0) == 0:
+            return "utf-16-le"
+        if even and even.count(0) > 0.9 * len(even) and odd.count(0) == 0:
+            return "utf-16-be"
+        return None
+
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+
+    control = len(head) - len(head.translate(None, _CONTROL_BYTES))
+    if control > 0.1 * len(head):
+        return None
+    return "latin-1"
+
+
+def is_minified(path: str, text: Union[str, bytes]) -> bool:
+    """
+    Detect minified or single-line generated files (`bundle.min.js`, JSON fixtures).
+
+    Args:
+        path (str): Relative file path (`.min.` in the name is enough).
+        text (str | bytes): File content (decoded, or UTF-8 in bytes mode).
+
+    Returns:
+        bool: True if the file looks minified.
+    """
+    if ".min." in path.rsplit("/", 1)[-1]:
+        return True
+    if len(text) <= MINIFIED_AVG_LINE:
+        return False
+    lines = text.count(b"\n" if isinstance(text, bytes) else "\n") + 1
+    if len(text) / lines > MINIFIED_AVG_LINE:
+        return True
+    return max(map(len, text.splitlines())) > MINIFIED_MAX_LINE
+
+
+def summarize_minified(
+    text: Union[str, bytes], preview: int = 200
+) -> Union[str, bytes]:
+    """
+    Short stand-in for the content of a minified file.
+
+    Args:
+        text (str | bytes): File content (decoded, or UTF-8 in bytes mode).
+        preview (int, optional): Characters kept from the start. Defaults to 200.
+
+    Returns:
+        str | bytes: Size summary and a short preview (same type as `text`).
+    """
+    if isinstance(text, bytes):
+        return summarize_minified(text.decode("utf-8"), preview).encode("utf-8")
+    lines = text.count("\n") + 1
+    longest = max(map(len, text.splitlines()), default=0)
+    return (
+        f"<minified: {len(text):,} chars in {lines:,} line(s), longest line {longest:,} chars>\n"
+        f"{text[:preview]}{'...' if len(text) > preview else ''}\n"
+    )
+
+
+class FileReader:
+    """
+    Reads the contents of included files for prompt generation.
+
+    Files are read by a thread pool so several `open`/`read` calls are in
+    flight at once (cold caches, network mounts), while results are still
+    returned in the original order. The total size of files that are read
+    but not yet consumed is capped, so memory stays bounded.
+
+    Every file is sniffed first (see `sniff_encoding`): binary files are
+    skipped after reading only their first few KB, text files are decoded
+    with a streaming decoder in the detected encoding.
+
+    With `as_bytes`, text is returned as UTF-8 `bytes` instead: UTF-8 files
+    are only validated (pure ASCII is not decoded at all) and newline
+    normalized, other encodings are transcoded.
+
+    Files larger than their size cap (`max_file_size`, or the first matching
+    glob in `max_file_size_overrides`) are not read whole: only a head and a
+    tail window are read (memory-mapped) with an elision marker in between.
+
+    With a `ScanCache`, `read_all` serves unchanged files from the cache
+    without opening them and stores the files it had to read. The cache is
+    only used from the consuming thread.
+
+    Attributes:
+        root (Path): Project root the index paths are relative to.
+        workers (int): Number of reader threads (1 = read sequentially).
+        max_buffered_bytes (int): Upper bound for bytes read ahead.
+        max_file_size (int): Default size cap per file in bytes (0 = no cap).
+        as_bytes (bool): Return text as UTF-8 bytes instead of `str`.
+        cache (ScanCache | None): Persistent content cache used by `read_all`.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        workers: int = 1,
+        max_buffered_bytes: int = 64 * 1024**2,
+        max_file_size: int = 0,
+        max_file_size_overrides: dict[str, int] = None,
+        as_bytes: bool = False,
+        cache=None,
+    ):
+        """
+        Initialize a FileReader.
+
+        Args:
+            root (Path): Project root directory.
+            workers (int, optional): Number of reader threads. Defaults to 1.
+            max_buffered_bytes (int, optional): Maximum number of bytes read ahead
+                of the consumer. A single file larger than this is still read,
+                but nothing else is buffered alongside it. Defaults to 64 MB.
+            max_file_size (int, optional): Size cap per file in bytes. Larger
+                files are truncated to head/tail windows. Defaults to 0 (no cap).
+            max_file_size_overrides (dict[str, int], optional): Per-pattern caps,
+                e.g. `{"*.min.js": 65536, "*.sql": 0}`. First match wins.
+            as_bytes (bool, optional): Return text as validated UTF-8 bytes.
+                Defaults to False.
+            cache (ScanCache, optional): Content cache for `read_all`.
+                Defaults to None.
+        """
+        self.root = Path(root)
+        self.workers = max(1, workers)
+        self.max_buffered_bytes = max_buffered_bytes
+        self.max_file_size = max_file_size
+        self.as_bytes = as_bytes
+        self.cache = cache
+        self._size_overrides = [
+            (PatternSet([pattern]), size)
+            for pattern, size in (max_file_size_overrides or {}).items()
+        ]
+
+    def max_size(self, entry: IndexEntry) -> int:
+        """
+        Size cap that applies to a file.
+
+        Args:
+            entry (IndexEntry): File entry.
+
+        Returns:
+            int: Size cap in bytes (0 = no cap).
+        """
+        for patterns, size in self._size_overrides:
+            if patterns.match(entry.path):
+                return size
+        return self.max_file_size
+
+    def is_truncated(self, entry: IndexEntry) -> bool:
+        """
+        Whether a file is read as head/tail windows instead of completely.
+
+        Args:
+            entry (IndexEntry): File entry.
+
+        Returns:
+            bool: True if the file exceeds its size cap.
+        """
+        limit = self.max_size(entry)
+        return 0 < limit < entry.size
+
+    def read(self, entry: IndexEntry) -> Optional[Union[str, bytes]]:
+        """
+        Read a single file from the index.
+
+        Only the first `SNIFF_SIZE` bytes are read to classify the file. Text
+        is decoded incrementally (`io.TextIOWrapper`) with universal newlines,
+        same as `Path.read_text`. If a file sniffed as UTF-8 turns out to be
+        invalid further down, only the invalid bytes are replaced (U+FFFD).
+        Files above their size cap are read as head/tail windows (see
+        `_read_windows`), based on their current size, not the indexed one.
+
+        Args:
+            entry (IndexEntry): File entry to read.
+
+        Returns:
+            str | bytes | None: File content (UTF-8 bytes if `as_bytes`), None
+                for binary files, or a placeholder if the file could not be read.
+        """
+        return self._read(entry)[0]
+
+    def is_binary(self, entry: IndexEntry) -> bool:
+        """
+        Classify a file as binary from its first `SNIFF_SIZE` bytes.
+
+        Same check as `read`, without reading the rest of the file (and
+        without a buffered file object, it is called for every file).
+
+        Args:
+            entry (IndexEntry): File entry to classify.
+
+        Returns:
+            bool: True for binary files (False if the file cannot be read,
+                `read` returns a placeholder for it).
+        """
+        try:
+            fd = os.open(self.root / entry.path, os.O_RDONLY)
+        except OSError:
+            return False
+        try:
+            return sniff_encoding(os.read(fd, SNIFF_SIZE)) is None
+        except OSError:
+            return False
+        finally:
+            os.close(fd)
+
+    def sniff_all(
+        self, entries: list[IndexEntry], batch: int = 64
+    ) -> Iterator[tuple[IndexEntry, bool]]:
+        """
+        Classify files as binary concurrently and yield them in their original order.
+
+        Files are sniffed in batches per task, a task per file costs more than
+        sniffing it on a local disk.
+
+        Args:
+            entries (list[IndexEntry]): File entries to classify.
+            batch (int, optional): Files per task. Defaults to 64.
+
+        Yields:
+            tuple[IndexEntry, bool]: Entry and whether it is binary.
+        """
+        if self.workers == 1:
+            for entry in entries:
+                yield entry, self.is_binary(entry)
+            return
+
+        def sniff(part: list[IndexEntry]) -> list[bool]:
+            return [self.is_binary(entry) for entry in part]
+
+        parts = [entries[i : i + batch] for i in range(0, len(entries), batch)]
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for part, binary in zip(parts, pool.map(sniff, parts)):
+                yield from zip(part, binary)
+
+    def _read(self, entry: IndexEntry) -> tuple[Optional[Union[str, bytes]], bool]:
+        # content and whether it is worth caching (not a read error placeholder)
+        file_path = self.root / entry.path
+        readable = True
+        try:
+            with open(file_path, "rb") as f:
+                head = f.read(SNIFF_SIZE)
+                encoding = sniff_encoding(head)
+                if encoding is None:
+                    return None, True
+                # the file may have changed since the walk, the index size is stale
+                size = os.fstat(f.fileno()).st_size
+                limit = self.max_size(entry)
+                if 0 < limit < size:
+                    text = self._read_windows(f, head, encoding, limit, size)
+                elif self.as_bytes and encoding == "utf-8":
+                    data = self._read_utf8(f)
+                    if data is not None:
+                        return data, True
+                    text = self._decode(f, "utf-8", errors="replace")
+                else:
+                    try:
+                        text = self._decode(f, encoding)
+                    except UnicodeDecodeError:
+                        if encoding != "utf-8":
+                            raise
+                        text = self._decode(f, "utf-8", errors="replace")
+        except Exception:
+            text = f"<Could not read {file_path.name}>\n"
+            readable = False
+        return (text.encode("utf-8") if self.as_bytes else text), readable
+
+    @staticmethod
+    def _read_utf8(f: io.BufferedReader) -> Optional[bytes]:
+        """
+        Read a UTF-8 file as bytes without building a `str`.
+
+        Args:
+            f (io.BufferedReader): File opened in binary mode.
+
+        Returns:
+            bytes | None: Content with universal newlines, None if the file is
+                not valid UTF-8 after all.
+        """
+        f.seek(0)
+        data = f.read()
+        if not data.isascii():
+            try:
+                data.decode("utf-8")  # validation only
+            except UnicodeDecodeError:
+                return None
+        if b"\r" in data:
+            data = data.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+        return data
+
+    @staticmethod
+    def _decode(f: io.BufferedReader, encoding: str, errors: str = "strict") -> str:
+        """
+        Decode an open binary file from the start with a streaming decoder.
+
+        Args:
+            f (io.BufferedReader): File opened in binary mode.
+            encoding (str): Codec to decode with.
+            errors (str, optional): Codec error handler. Defaults to "strict".
+
+        Returns:
+            str: Decoded text with universal newlines.
+        """
+        f.seek(0)
+        text = io.TextIOWrapper(f, encoding=encoding, errors=errors, newline=None)
+        try:
+            return text.read()
+        finally:
+            text.detach()  # keep `f` open for a possible retry
+
+    @staticmethod
+    def _read_windows(
+        f: io.BufferedReader, head: bytes, encoding: str, limit: int, size: int
+    ) -> str:
+        """
+        Read only a head and a tail window of an oversized text file.
+
+        Each window gets half of `limit` and is cut back to whole lines. The
+        file is memory-mapped, so only the pages of both windows are read.
+
+        Args:
+            f (io.BufferedReader): File opened in binary mode.
+            head (bytes): Already sniffed first bytes (used for the BOM).
+            encoding (str): Detected codec.
+            limit (int): Size cap in bytes.
+            size (int): Current file size in bytes (larger than `limit`).
+
+        Returns:
+            str: Head window, elision marker and tail window.
+        """
+        window = max(limit // 2 - limit // 2 % 4, 4)  # whole UTF-16/32 code units
+        window = min(window, size // 2)  # the windows never overlap
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                size = len(mm)  # mapped size, in case it changed once more
+                window = min(window, size // 2)
+                head_bytes, tail_bytes = mm[:window], mm[size - window :]
+        except (OSError, ValueError):  # e.g. file systems without mmap
+            f.seek(0)
+            head_bytes = f.read(window)
+            f.seek(size - window)
+            tail_bytes = f.read(window)
+
+        # the tail has no BOM, decode it with an explicit byte order
+        tail_encoding = next(
+            (BOM_FREE_ENCODINGS[bom] for bom, _ in BOMS if head.startswith(bom)),
+            encoding,
+        )
+
+        head_text = head_bytes.decode(encoding, errors="replace")
+        tail_text = tail_bytes.decode(tail_encoding, errors="replace")
+        # drop partial lines at the cut (they may hold a broken character)
+        head_text = head_text[: head_text.rfind("\n") + 1] or head_text
+        tail_text = tail_text[tail_text.find("\n") + 1 :] or tail_text
+
+        omitted = size - len(head_bytes) - len(tail_bytes)
+        text = f"{head_text}\n<... {omitted:,} bytes truncated ...>\n\n{tail_text}"
+        return text.replace("\r\n", "\n").replace("\r", "\n")
+
+    def _cost(self, entry: IndexEntry) -> int:
+        # bytes a read keeps in memory (truncated files only keep their windows)
+        limit = self.max_size(entry)
+        return min(entry.size, limit) if limit else entry.size
+
+    def read_all(
+        self, entries: Iterable[IndexEntry]
+    ) -> Iterator[tuple[IndexEntry, Optional[Union[str, bytes]]]]:
+        """
+        Read files concurrently and yield them in their original order.
+
+        Reads are submitted ahead of the consumer as long as the buffered size
+        (taken from the index, no extra `stat`) stays below `max_buffered_bytes`.
+        Cache hits are not submitted at all, misses are stored once read.
+
+        Args:
+            entries (Iterable[IndexEntry]): File entries to read.
+
+        Yields:
+            tuple[IndexEntry, str | bytes | None]: Entry and its content (None
+                for binary).
+        """
+        if self.workers == 1:
+            for entry in entries:
+                hit, content = self._lookup(entry)
+                if not hit:
+                    content, readable = self._read(entry)
+                    self._store(entry, content, readable)
+                yield entry, content
+            return
+
+        entries = iter(entries)
+        in_flight = deque()  # (entry, future, cache hit) in submission order
+        buffered = 0
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            next_entry = next(entries, None)
+            while next_entry is not None or in_flight:
+                # fill up: at least one read, more while the byte budget allows
+                # (the count cap keeps lots of tiny files from queueing up)
+                while next_entry is not None and (
+                    not in_flight
+                    or (
+                        len(in_flight) < self.workers * 4
+                        and buffered + self._cost(next_entry) <= self.max_buffered_bytes
+                    )
+                ):
+                    hit, content = self._lookup(next_entry)
+                    if hit:
+                        future = Future()
+                        future.set_result((content, False))  # nothing to store
+                    else:
+                        future = pool.submit(self._read, next_entry)
+                    in_flight.append((next_entry, future, hit))
+                    buffered += self._cost(next_entry)
+                    next_entry = next(entries, None)
+
+                entry, future, hit = in_flight.popleft()
+                content, readable = future.result()
+                if not hit:
+                    self._store(entry, content, readable)
+                buffered -= self._cost(entry)
+                yield entry, content
+
+    def _variant(self, entry: IndexEntry) -> str:
+        # reader settings a cached content depends on
+        return f"{self.max_size(entry)}:{int(self.as_bytes)}"
+
+    def _lookup(self, entry: IndexEntry) -> tuple[bool, Optional[Union[str, bytes]]]:
+        if self.cache is None:
+            return False, None
+        return self.cache.get(entry, self._variant(entry))
+
+    def _store(
+        self, entry: IndexEntry, content: Optional[Union[str, bytes]], readable: bool
+    ):
+        if self.cache is not None and readable:
+            self.cache.put(entry, self._variant(entry), content)
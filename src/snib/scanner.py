@@ -1,16 +1,41 @@
-import fnmatch
 import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
+from stat import S_ISDIR
+from typing import Iterator, Optional, Union
 
 import typer
 
+from .cache import DirFingerprints, ScanCache, content_digest
 from .chunker import Chunker
-from .config import SNIB_PROMPTS_DIR, check_config
+from .config import (
+    SNIB_CACHE_DIR,
+    SNIB_CHUNK_LAYOUTS,
+    SNIB_EXCLUDED_STATS_MODES,
+    SNIB_MINIFIED_MODES,
+    SNIB_OUTPUT_FORMATS,
+    SNIB_PACK_COMPRESSIONS,
+    SNIB_PROMPTS_DIR,
+    SNIB_SCAN_CACHE,
+    SNIB_STREAM_FRAMINGS,
+    SNIB_WATCH_BACKENDS,
+    check_config,
+)
 from .formatter import Formatter
 from .logger import logger
-from .models import FilterStats, Section
-from .utils import build_tree, format_size
-from .writer import Writer
+from .models import FilterStats, IndexEntry, Section
+from .patterns import PatternSet, split_patterns
+from .reader import FileReader, is_minified, summarize_minified
+from .tokenizer import HeuristicTokenizer, TokenCounter, load_tokenizer
+from .utils import format_size, render_tree
+from .watcher import ALL_CHANGED, open_watcher, wait_for_changes
+from .writer import Writer, stream_chunks
+
+
+class _TotalOverflow(Exception):
+    """More chunks than the digits reserved for the header total allow."""
 
 
 class Scanner:
@@ -43,7 +68,7 @@ class Scanner:
         self.config = check_config(config)
 
     def _collect_sections(
-        self, description, include, exclude, force, task
+        self, description, include, exclude, force, task, walk_workers=1
     ) -> list[Section]:
         """
         Collects structured project sections for prompt generation.
@@ -55,11 +80,15 @@ class Scanner:
         - Project tree
         - Individual file contents (included files only)
 
+        Materialised version of `_collect_files` + `_iter_sections`.
+        `scan` streams the sections instead.
+
         Args:
             description (str): Project description text.
             include (list[str]): Include patterns (globs/prefixes).
             exclude (list[str]): Exclude patterns (globs/prefixes).
             task (str): Task key (looked up in `task_dict` in config).
+            walk_workers (int, optional): Directory reader threads. Defaults to 1.
 
         Returns:
             list[Section]: A list of `Section` objects representing
@@ -67,20 +96,84 @@ class Scanner:
         """
         logger.debug("Collecting sections")
 
-        all_files = [f for f in self.path.rglob("*") if f.is_file()]
-        included_files = self._scan_files(self.path, include, exclude)
-        excluded_files = [f for f in all_files if f not in included_files]
+        included_files, include_stats, exclude_stats = self._collect_files(
+            include, exclude, force, walk_workers
+        )
+        sections = list(
+            self._iter_sections(
+                description,
+                include,
+                exclude,
+                task,
+                included_files,
+                include_stats,
+                exclude_stats,
+            )
+        )
+
+        logger.debug(f"Collected {len(sections)} sections")
+
+        return sections
+
+    def _collect_files(
+        self, include, exclude, force, walk_workers=1, cache: ScanCache = None
+    ) -> tuple[list[IndexEntry], FilterStats, FilterStats]:
+        """
+        Walks the project once and selects the files to include.
+
+        Logs the include/exclude statistics and asks for confirmation if the
+        number of included files exceeds `warning_include_limit`. Only metadata
+        is collected here, no file is opened.
+
+        Args:
+            include (list[str]): Include patterns (globs/prefixes).
+            exclude (list[str]): Exclude patterns (globs/prefixes).
+            force (bool): If True, do not ask for confirmation.
+            walk_workers (int, optional): Directory reader threads. Defaults to 1.
+            cache (ScanCache, optional): Provides the directory fingerprints of
+                the last walk and stores the new ones. Defaults to None.
+
+        Returns:
+            tuple[list[IndexEntry], FilterStats, FilterStats]:
+                - included_files: Included file entries (index order).
+                - include_stats: Statistics for included files.
+                - exclude_stats: Statistics for excluded files.
+
+        Raises:
+            typer.Exit: If the user aborts when prompted for confirmation.
+        """
+        # single walk: everything below is derived from this index
+        fingerprints = cache.load_dirs(include, exclude) if cache else None
+        index = self._build_index(
+            self.path, include, exclude, walk_workers, fingerprints
+        )
+        included_files, excluded_files = self._partition_index(index)
+
+        pruned_dirs = [e for e in index if e.is_dir and not e.included]
 
         include_stats = self._calculate_filter_stats(included_files, "included")
-        exclude_stats = self._calculate_filter_stats(excluded_files, "excluded")
+        exclude_stats = self._calculate_excluded_stats(
+            excluded_files, pruned_dirs, fingerprints
+        )
+        # pruned directories counted in exact mode are part of the fingerprints
+        if fingerprints is not None:
+            cache.save_dirs(fingerprints)
 
         # let the user know what was included/excluded
         logger.info(
             f"Included stats: Files: {include_stats.files}, Size: {format_size(include_stats.size)}"
         )
-        logger.info(
-            f"Excluded stats: Files: {exclude_stats.files}, Size: {format_size(exclude_stats.size)}"
-        )
+        if exclude_stats.mode == "off":
+            logger.info("Excluded stats: off")
+        else:
+            logger.info(
+                f"Excluded stats: Files: {exclude_stats.files}, Size: {format_size(exclude_stats.size)}"
+                + (
+                    f", Pruned folders: {exclude_stats.dirs}"
+                    if exclude_stats.mode == "shallow"
+                    else ""
+                )
+            )
 
         # get warning_include_limit from config if set (no mandatory config entry)
         warning_include_limit = self.config["filters"].get("warning_include_limit", 100)
@@ -95,56 +188,330 @@ class Scanner:
                     logger.info("Aborted.")
                     raise typer.Exit()
 
+        return included_files, include_stats, exclude_stats
+
+    def _iter_sections(
+        self,
+        description,
+        include,
+        exclude,
+        task,
+        included_files: list[IndexEntry],
+        include_stats: FilterStats,
+        exclude_stats: FilterStats,
+        as_bytes: bool = False,
+        cache: ScanCache = None,
+        dedupe: bool = False,
+        counter: TokenCounter = None,
+    ) -> Iterator[Section]:
+        """
+        Yields the project sections one by one.
+
+        File contents are read lazily while the sections are consumed, so only
+        the files currently in flight (see `FileReader`) are held in memory.
+        Binary and minified files are found before the filters section (see
+        `_find_skipped`), so it reports them instead of counting them as
+        included. With `dedupe`, files identical to an earlier file are found
+        there as well (see `_find_duplicates`) and yielded as stubs without
+        being read again.
+
+        Args:
+            description (str): Project description text.
+            include (list[str]): Include patterns (globs/prefixes).
+            exclude (list[str]): Exclude patterns (globs/prefixes).
+            task (str): Task key (looked up in `task_dict` in config).
+            included_files (list[IndexEntry]): Files from `_collect_files`.
+            include_stats (FilterStats): Statistics for included files.
+            exclude_stats (FilterStats): Statistics for excluded files.
+            as_bytes (bool, optional): Read file contents as UTF-8 bytes
+                (bytes mode). Defaults to False.
+            cache (ScanCache, optional): Serves unchanged files without
+                reading them. Defaults to None.
+            dedupe (bool, optional): Replace files identical to an earlier file
+                with a stub. Defaults to False.
+            counter (TokenCounter, optional): Counts the tokens saved by
+                `dedupe` (heuristic estimate if not set). Defaults to None.
+
+        Yields:
+            Section: Description, task, filters, tree and file sections.
+        """
         # get task instruction from config if set (no mandatory config entry)
         task_dict = self.config["instruction"].get("task_dict", {})
         instruction = task_dict.get(task, "")
 
-        sections: list[Section] = []
-
-        sections.append(Section(type="description", content=description))
-        sections.append(Section(type="task", content=instruction))
-        sections.append(
-            Section(
-                type="filters",
-                include=include,
-                exclude=exclude,
-                include_stats=include_stats,
-                exclude_stats=exclude_stats,
+        yield Section(type="description", content=description)
+        yield Section(type="task", content=instruction)
+
+        # [performance] is optional in snibconfig.toml
+        performance = self.config.get("performance", {})
+        # size caps from config if set (no mandatory config entry)
+        reader = FileReader(
+            self.path,
+            workers=performance.get("read_workers", 8),
+            max_buffered_bytes=performance.get("read_buffer_mb", 64) * 1024**2,
+            max_file_size=self.config["filters"].get("max_file_size", 0),
+            max_file_size_overrides=self.config["filters"].get(
+                "max_file_size_overrides", {}
+            ),
+            as_bytes=as_bytes,
+            cache=cache,
+        )
+
+        # minified files are hard-split by the chunker unless skipped/summarized
+        minified = self.config["filters"].get("minified", "split")
+        if minified not in SNIB_MINIFIED_MODES:
+            logger.warning(
+                f"Unknown minified mode '{minified}', expected one of {SNIB_MINIFIED_MODES}. Using 'split'."
             )
+            minified = "split"
+
+        # the filters section reports what the prompt contains, so binary,
+        # minified and duplicate files are found first
+        kinds, binary_stats, minified_stats, prefetched = self._find_skipped(
+            reader, included_files, minified
         )
-        sections.append(
-            Section(
-                type="tree",
-                content="\n".join(
-                    build_tree(path=self.path, include=include, exclude=exclude)
-                ),
+        duplicates, dedupe_stats = {}, None
+        if dedupe:
+            duplicates, dedupe_stats = self._find_duplicates(
+                reader,
+                [e for e in included_files if e.path not in kinds],
+                counter,
+                prefetched,
             )
+
+        # skipped files are not part of the prompt (summarized ones are)
+        dropped = binary_stats.files + (minified == "skip") * minified_stats.files
+        dropped_size = binary_stats.size + (minified == "skip") * minified_stats.size
+        yield Section(
+            type="filters",
+            include=include,
+            exclude=exclude,
+            include_stats=FilterStats(
+                type="included",
+                files=include_stats.files - dropped,
+                size=include_stats.size - dropped_size,
+            ),
+            exclude_stats=exclude_stats,
+            dedupe_stats=dedupe_stats,
+            binary_stats=binary_stats,
+            minified_stats=minified_stats,
+            minified=minified,
+        )
+        # tree limits from config if set, 0 means no cap (no mandatory config entry)
+        tree_max_depth = self.config["output"].get("tree_max_depth", 0)
+        tree_max_entries = self.config["output"].get("tree_max_entries", 200)
+        yield Section(
+            type="tree",
+            content="\n".join(
+                render_tree(
+                    self.path.name,
+                    [e.path for e in included_files],
+                    max_depth=tree_max_depth or None,
+                    max_entries=tree_max_entries or None,
+                )
+            ),
         )
 
-        for file_path in included_files:
-            try:
-                content = file_path.read_text(encoding="utf-8")
-                # TODO: handle binary files better
-            except Exception:
-                content = f"<Could not read {file_path.name}>\n"
-            sections.append(
-                Section(
-                    type="file", path=file_path.relative_to(self.path), content=content
+        # skipped files, duplicates and files read by the earlier passes are
+        # not read again, stubs are yielded in index order (read lazily, so
+        # the paths are copied)
+        skip = set(kinds) | set(duplicates) | set(prefetched)
+        contents = reader.read_all(e for e in included_files if e.path not in skip)
+        for entry in included_files:
+            kind = kinds.get(entry.path)
+            if kind == "binary" or (kind == "minified" and minified == "skip"):
+                logger.debug(f"Skipped {kind} file: {entry.path}")
+                continue
+            original = duplicates.get(entry.path)
+            if original is not None:
+                logger.debug(f"Duplicate file: {entry.path} (identical to {original})")
+                yield Section(
+                    type="file", path=Path(entry.path), duplicate_of=Path(original)
                 )
+                continue
+            if entry.path in prefetched:
+                content = prefetched.pop(entry.path)  # summaries of minified files
+            else:
+                entry, content = next(contents)
+            if content is None:
+                # turned binary since it was sniffed
+                logger.debug(f"Skipped binary file: {entry.path}")
+                continue
+            truncated = reader.is_truncated(entry)
+            if truncated:
+                logger.debug(f"Truncated large file: {entry.path}")
+            yield Section(
+                type="file",
+                path=Path(entry.path),
+                content=content,
+                original_size=entry.size if truncated else None,
             )
 
-        logger.debug(f"Collected {len(sections)} sections")
+        if binary_stats.files:
+            logger.notice(
+                f"Skipped {binary_stats.files} binary file(s), Size: {format_size(binary_stats.size)}"
+            )
+        if minified_stats.files:
+            action = "Skipped" if minified == "skip" else "Summarized"
+            logger.notice(
+                f"{action} {minified_stats.files} minified file(s), Size: {format_size(minified_stats.size)}"
+            )
+        if dedupe_stats and dedupe_stats.files:
+            logger.notice(
+                f"Replaced {dedupe_stats.files} duplicate file(s) with stubs, Saved: {format_size(dedupe_stats.size)}, ~{dedupe_stats.tokens} tokens"
+            )
 
-        return sections
+    def _find_skipped(
+        self,
+        reader: FileReader,
+        included_files: list[IndexEntry],
+        minified: str = "split",
+    ) -> tuple[
+        dict[str, str],
+        FilterStats,
+        FilterStats,
+        dict[str, Optional[Union[str, bytes]]],
+    ]:
+        """
+        Finds binary and minified files before the filters section.
+
+        With `minified="split"` (default) only binary files are left out, so
+        only the first bytes of every file are sniffed (see `FileReader.is_binary`).
+        Otherwise every file is read to detect minified content: summaries of
+        minified files are kept for the main pass, other contents are served
+        from the scan cache in the main pass, or without a cache handed over
+        up to the reader's buffer size.
+
+        Args:
+            reader (FileReader): Reader used for the main pass.
+            included_files (list[IndexEntry]): Files from `_collect_files`.
+            minified (str, optional): Validated minified mode. Defaults to "split".
+
+        Returns:
+            tuple[dict[str, str], FilterStats, FilterStats, dict[str, str | bytes | None]]:
+                - kinds: Path -> "binary" or "minified" for files not emitted as is.
+                - binary_stats: Number and size of binary files (skipped).
+                - minified_stats: Number and size of minified files (skipped or
+                  summarized).
+                - prefetched: Contents already read (path -> content, summary
+                  for minified files), for the main pass.
+        """
+        kinds = {}
+        binary_stats = FilterStats(type="binary")
+        minified_stats = FilterStats(type="minified")
+        prefetched = {}
+
+        if minified == "split":
+            classified = (
+                (entry, None if binary else "")
+                for entry, binary in reader.sniff_all(included_files)
+            )
+        else:
+            classified = reader.read_all(included_files)
+
+        budget = reader.max_buffered_bytes if reader.cache is None else 0
+        for entry, content in classified:
+            if content is None:
+                kinds[entry.path] = "binary"
+                binary_stats.files += 1
+                binary_stats.size += entry.size
+            elif minified != "split" and is_minified(entry.path, content):
+                kinds[entry.path] = "minified"
+                minified_stats.files += 1
+                minified_stats.size += entry.size
+                if minified == "summarize":
+                    prefetched[entry.path] = summarize_minified(content)
+            elif minified != "split" and entry.size <= budget:
+                prefetched[entry.path] = content
+                budget -= entry.size
+
+        return kinds, binary_stats, minified_stats, prefetched
+
+    def _find_duplicates(
+        self,
+        reader: FileReader,
+        included_files: list[IndexEntry],
+        counter: TokenCounter = None,
+        prefetched: dict[str, Optional[Union[str, bytes]]] = None,
+    ) -> tuple[dict[str, str], FilterStats]:
+        """
+        Finds included files whose content is identical to an earlier file.
+
+        Only files that share their size with another file can be identical,
+        so only those are hashed (`content_digest`). Contents in `prefetched`
+        are not read again, contents read here are served from the scan cache
+        in the main pass, or without a cache added to `prefetched` (up to the
+        reader's buffer size). Truncated files are never deduplicated (their
+        contents are only head/tail windows), binary and minified files are
+        left out by the caller (see `_find_skipped`), so a stub never points
+        to a file missing from the prompt.
+
+        Args:
+            reader (FileReader): Reader used for the main pass.
+            included_files (list[IndexEntry]): Text files to deduplicate.
+            counter (TokenCounter, optional): Counts the tokens saved.
+                Defaults to None (heuristic estimate).
+            prefetched (dict[str, str | bytes | None], optional): Contents
+                already read, updated in place. Defaults to None.
+
+        Returns:
+            tuple[dict[str, str], FilterStats]:
+                - duplicates: Path of each duplicate -> path of its first occurrence.
+                - dedupe_stats: Number, size and tokens of the replaced files.
+        """
+        prefetched = {} if prefetched is None else prefetched
+        eligible = [e for e in included_files if e.size and not reader.is_truncated(e)]
+        sizes = {}
+        for entry in eligible:
+            sizes[entry.size] = sizes.get(entry.size, 0) + 1
+        candidates = [e for e in eligible if sizes[e.size] > 1]
+
+        count = counter.count if counter else HeuristicTokenizer().count
+        first = {}  # digest -> path of the first occurrence
+        tokens = {}  # digest -> tokens of the content
+        duplicates = {}
+        stats = FilterStats(type="duplicate")
+        budget = reader.max_buffered_bytes if reader.cache is None else 0
+        budget -= sum(len(c) for c in prefetched.values() if c is not None)
+        # read lazily, so the prefetched paths are copied
+        have = set(prefetched)
+        contents = reader.read_all(e for e in candidates if e.path not in have)
+        for entry in candidates:
+            if entry.path in have:
+                content = prefetched[entry.path]
+            else:
+                entry, content = next(contents)
+            original = None
+            if content is not None:  # turned binary since it was sniffed
+                digest = content_digest(content)
+                original = first.setdefault(digest, entry.path)
+            if original in (None, entry.path):
+                # not a duplicate, hand the content over to the main pass
+                size = 0 if content is None else entry.size
+                if entry.path not in have and size <= budget:
+                    prefetched[entry.path] = content
+                    budget -= size
+                continue
+            duplicates[entry.path] = original
+            prefetched.pop(entry.path, None)
+            if digest not in tokens:
+                if isinstance(content, bytes):
+                    content = content.decode("utf-8", "replace")
+                tokens[digest] = count(content, entry.path)
+            stats.files += 1
+            stats.size += entry.size
+            stats.tokens += tokens[digest]
+
+        logger.debug(
+            f"Dedupe: hashed {len(candidates)} same-size file(s), found {stats.files} duplicate(s)"
+        )
+        return duplicates, stats
 
     def _split_patterns(self, patterns: list[str]) -> tuple[list[str], list[str]]:
         """
         Splits patterns into glob patterns and prefix patterns.
 
-        Examples:
-            "*.py"     -> glob
-            "src/snib" -> prefix
-            "utils.py" -> prefix (exact filename)
+        See `snib.patterns.split_patterns`.
 
         Args:
             patterns (list[str]): List of pattern strings.
@@ -154,15 +521,7 @@ class Scanner:
                 - globs: Glob-style patterns (with `*`, `?`).
                 - prefixes: Exact filenames or directory prefixes.
         """
-        globs = []
-        prefixes = []
-        for p in patterns:
-            p = str(p).replace("\\", "/").rstrip("/")  # normalise Windows/Linux
-            if "*" in p or "?" in p:
-                globs.append(p)
-            else:
-                prefixes.append(p)
-        return globs, prefixes
+        return split_patterns(patterns)
 
     def _match_patterns(
         self,
@@ -182,6 +541,9 @@ class Scanner:
             * Exact filename (e.g. "utils.py")
             * Path parts containing prefix (e.g. `__pycache__`).
 
+        This compiles a `PatternSet` on every call. Hot loops (like
+        `_build_index`) compile one `PatternSet` per scan instead.
+
         Args:
             rel_path (str): Relative path from project root.
             file_name (str): Filename only.
@@ -191,93 +553,331 @@ class Scanner:
         Returns:
             bool: True if path matches any pattern, else False.
         """
-        # glob check
-        for g in glob_patterns:
-            if fnmatch.fnmatch(file_name, g) or fnmatch.fnmatch(rel_path, g):
-                return True
+        return PatternSet(glob_patterns + prefix_patterns).match(rel_path, file_name)
 
-        # prefix check
-        for p in prefix_patterns:
-            if (
-                rel_path == p
-                or rel_path.startswith(p + "/")
-                or file_name == p
-                or f"/{p}/"
-                in f"/{rel_path}/"  # folders or path parts somewhere in path
-                # or fnmatch.fnmatch(rel_path, p)  # flexible matching works for: utils.py, /src/snib/utils.py, **/utils.py
-            ):
-                return True
+    def _build_index(
+        self,
+        root: Path,
+        includes=None,
+        excludes=None,
+        workers: int = 1,
+        fingerprints: DirFingerprints = None,
+    ) -> list[IndexEntry]:
+        """
+        Walks the project directory once and builds the scan index.
 
-        return False
+        - Uses a single `os.scandir` pass (one `readdir` per directory).
+        - Include/exclude patterns are compiled once into `PatternSet`s.
+        - Records relative path, size, mtime and a filter verdict per entry.
+        - Excluded directories are recorded but never descended into; see
+          `_calculate_excluded_stats` for how their contents are counted.
+        - Entries are sorted per directory, so the index order is deterministic.
 
-    def _scan_files(self, root: Path, includes=None, excludes=None) -> list[Path]:
-        """
-        Scans the project directory for files using include/exclude filters.
+        With `workers > 1`, directories are read concurrently by a bounded
+        thread pool (useful on NFS/FUSE mounts where every `readdir`/`stat`
+        is a network round trip). Subdirectories are queued as soon as their
+        parent has been read and pruned, and the final index is assembled in
+        the same order as the serial walk.
 
-        - Uses `os.walk` for efficient traversal.
-        - Excludes whole directories early for speed.
-        - Applies both glob and prefix matching.
+        With `fingerprints` from the last walk, directories whose mtime did not
+        change are not listed again: their children are only `stat`ed (sizes
+        and mtimes of files may have changed) and keep their filter verdicts.
 
         Args:
             root (Path): Root directory to scan.
             includes (list[str] | None): Include patterns (default: `["*"]`).
             excludes (list[str] | None): Exclude patterns (default: `[]`).
+            workers (int, optional): Number of directory reader threads.
+                Defaults to 1 (serial walk).
+            fingerprints (DirFingerprints, optional): Directory listings of the
+                last walk with the same patterns. Defaults to None.
 
         Returns:
-            list[Path]: List of included file paths.
+            list[IndexEntry]: All files and directories below `root`.
         """
         includes = includes or ["*"]
         excludes = excludes or []
 
-        include_globs, include_prefixes = self._split_patterns(includes)
-        exclude_globs, exclude_prefixes = self._split_patterns(excludes)
+        include_set = PatternSet(includes)
+        exclude_set = PatternSet(excludes)
+
+        def read_dir(rel_dir: str) -> tuple[list[IndexEntry], list[str]]:
+            return self._index_dir(
+                root, rel_dir, include_set, exclude_set, fingerprints
+            )
+
+        if workers > 1:
+            listings = self._read_dirs_parallel(read_dir, workers)
+        else:
+            listings = None
+
+        index = []
+        stack = [""]  # relative directories left to walk
+
+        while stack:
+            rel_dir = stack.pop()
+            if listings is None:
+                entries, subdirs = read_dir(rel_dir)
+            else:
+                entries, subdirs = listings.pop(rel_dir)
+            index.extend(entries)
+            # reversed so subdirectories are popped in sorted order
+            stack.extend(reversed(subdirs))
+
+        logger.debug(f"Indexed {len(index)} entries in {root}")
 
-        results = []
+        return index
+
+    def _read_dirs_parallel(
+        self, read_dir, workers: int
+    ) -> dict[str, tuple[list[IndexEntry], list[str]]]:
+        """
+        Reads all directories of the walk concurrently.
+
+        Every directory listing is one task in a bounded thread pool. Whenever a
+        listing finishes, its (already pruned) subdirectories are queued, so idle
+        workers always pick up the next pending directory, regardless of which
+        branch of the tree it belongs to.
+
+        Args:
+            read_dir (Callable[[str], tuple[list[IndexEntry], list[str]]]):
+                Reads one relative directory (see `_index_dir`).
+            workers (int): Maximum number of reader threads.
+
+        Returns:
+            dict[str, tuple[list[IndexEntry], list[str]]]: Listing per relative
+                directory, to be assembled in walk order by the caller.
+        """
+        listings = {}
 
-        for dirpath, dirnames, filenames in os.walk(root):
-            rel_dir = Path(dirpath).relative_to(root).as_posix()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = {pool.submit(read_dir, ""): ""}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    rel_dir = pending.pop(future)
+                    entries, subdirs = future.result()
+                    listings[rel_dir] = (entries, subdirs)
+                    for d in subdirs:
+                        pending[pool.submit(read_dir, d)] = d
 
-            # --- Step 1: exclude whole directories early (Speed!)
-            # going through list and deleting excluded directories from `dirnames`.
-            dirnames[:] = [
-                d
-                for d in dirnames
-                if not self._match_patterns(
-                    f"{rel_dir}/{d}" if rel_dir != "." else d,
-                    d,
-                    exclude_globs,
-                    exclude_prefixes,
+        return listings
+
+    def _index_dir(
+        self,
+        root: Path,
+        rel_dir: str,
+        include_set: PatternSet,
+        exclude_set: PatternSet,
+        fingerprints: DirFingerprints = None,
+    ) -> tuple[list[IndexEntry], list[str]]:
+        """
+        Reads a single directory and assigns filter verdicts to its entries.
+
+        With `fingerprints`, a directory with the same mtime as in the last
+        walk is not listed (see `_restat_dir`), and a re-listed directory with
+        the same children keeps its verdicts instead of matching the patterns.
+
+        Args:
+            root (Path): Root directory of the scan.
+            rel_dir (str): Relative POSIX path of the directory ("" for root).
+            include_set (PatternSet): Compiled include patterns.
+            exclude_set (PatternSet): Compiled exclude patterns.
+            fingerprints (DirFingerprints, optional): Listings of the last walk.
+                Defaults to None.
+
+        Returns:
+            tuple[list[IndexEntry], list[str]]:
+                - entries: Index entries of this directory (sorted by name).
+                - subdirs: Relative paths of subdirectories to walk next.
+        """
+        dir_mtime = None
+        if fingerprints is not None:
+            try:
+                dir_mtime = os.stat(root / rel_dir).st_mtime_ns
+            except OSError:
+                pass
+            listing = fingerprints.listing(rel_dir, dir_mtime) if dir_mtime else None
+            if listing is not None:
+                result = self._restat_dir(root, rel_dir, listing)
+                if result is not None:
+                    return result
+
+        try:
+            with os.scandir(root / rel_dir) as it:
+                dir_entries = sorted(it, key=lambda e: e.name)
+        except OSError as e:
+            logger.debug(f"Could not read directory '{rel_dir}': {e}")
+            return [], []
+
+        children = []
+        for entry in dir_entries:
+            try:
+                is_dir = entry.is_dir()
+                is_file = not is_dir and entry.is_file()
+                stat = entry.stat()
+            except OSError:
+                continue
+            if is_dir or is_file:
+                children.append((entry, is_dir, stat))
+
+        verdicts = None
+        if fingerprints is not None:
+            digest = DirFingerprints.listing_hash(
+                [(entry.name, is_dir) for entry, is_dir, _ in children]
+            )
+            verdicts = fingerprints.verdicts(rel_dir, digest)
+
+        entries = []
+        subdirs = []
+        listing = []
+        for n, (entry, is_dir, stat) in enumerate(children):
+            rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            if verdicts is not None:
+                included = verdicts[n]
+            else:
+                # directories: not excluded, files: not excluded and included
+                included = not exclude_set.match(rel_path, entry.name) and (
+                    is_dir or include_set.match(rel_path, entry.name)
                 )
-            ]
-
-            # --- Step 2: Check files
-            for fname in filenames:
-                rel_path = (
-                    f"{rel_dir}/{fname}" if rel_dir != "." else fname
-                )  # relative path from root
-
-                # Exclude check
-                if self._match_patterns(
-                    rel_path, fname, exclude_globs, exclude_prefixes
-                ):
-                    continue
+            is_symlink = is_dir and entry.is_symlink()
+            listing.append([entry.name, is_dir, is_symlink, included])
+
+            if is_dir:
+                entries.append(
+                    IndexEntry(
+                        path=rel_path,
+                        is_dir=True,
+                        mtime_ns=stat.st_mtime_ns,
+                        included=included,
+                    )
+                )
+                # prune excluded directories before queueing them and do not
+                # follow symlinked directories (same as os.walk)
+                if included and not is_symlink:
+                    subdirs.append(rel_path)
+            else:
+                entries.append(
+                    IndexEntry(
+                        path=rel_path,
+                        is_dir=False,
+                        size=stat.st_size,
+                        mtime_ns=stat.st_mtime_ns,
+                        included=included,
+                        inode=stat.st_ino,
+                    )
+                )
+
+        if dir_mtime is not None:
+            fingerprints.record(rel_dir, dir_mtime, digest, listing)
+
+        return entries, subdirs
+
+    def _restat_dir(
+        self, root: Path, rel_dir: str, listing: list
+    ) -> Optional[tuple[list[IndexEntry], list[str]]]:
+        """
+        Rebuilds the entries of an unchanged directory from its last listing.
+
+        Only `stat`s the children (file contents may have changed without
+        touching the directory), names and filter verdicts are reused.
+
+        Args:
+            root (Path): Root directory of the scan.
+            rel_dir (str): Relative POSIX path of the directory.
+            listing (list): `[name, is_dir, is_symlink, included]` per child.
+
+        Returns:
+            tuple[list[IndexEntry], list[str]] | None: Same as `_index_dir`, or
+                None if a child disappeared or changed its kind (list again).
+        """
+        base = os.path.join(root, rel_dir, "")
+        prefix = f"{rel_dir}/" if rel_dir else ""
+        entries = []
+        subdirs = []
+        # same entries as `_index_dir`, positional for speed (hot loop)
+        for name, is_dir, is_symlink, included in listing:
+            try:
+                stat = os.stat(base + name)
+            except OSError:
+                return None
+            if S_ISDIR(stat.st_mode) != is_dir:
+                return None
+            rel_path = prefix + name
+            if is_dir:
+                entries.append(
+                    IndexEntry(rel_path, True, 0, stat.st_mtime_ns, included)
+                )
+                if included and not is_symlink:
+                    subdirs.append(rel_path)
+            else:
+                entries.append(
+                    IndexEntry(
+                        rel_path,
+                        False,
+                        stat.st_size,
+                        stat.st_mtime_ns,
+                        included,
+                        stat.st_ino,
+                    )
+                )
+        return entries, subdirs
+
+    def _partition_index(
+        self, index: list[IndexEntry]
+    ) -> tuple[list[IndexEntry], list[IndexEntry]]:
+        """
+        Splits the file entries of a scan index into included and excluded files.
+
+        The verdict is assigned during the walk, so this is a single linear
+        pass without any membership tests. Directories are skipped.
+
+        Args:
+            index (list[IndexEntry]): Scan index from `_build_index`.
+
+        Returns:
+            tuple[list[IndexEntry], list[IndexEntry]]:
+                - included: Included file entries (index order).
+                - excluded: Excluded file entries (index order).
+        """
+        included = []
+        excluded = []
+        for entry in index:
+            if entry.is_dir:
+                continue
+            (included if entry.included else excluded).append(entry)
+        return included, excluded
+
+    def _scan_files(self, root: Path, includes=None, excludes=None) -> list[Path]:
+        """
+        Scans the project directory for files using include/exclude filters.
 
-                # Include check
-                if self._match_patterns(
-                    rel_path, fname, include_globs, include_prefixes
-                ):
-                    results.append(Path(dirpath) / fname)
+        Thin wrapper around `_build_index` that only returns included files.
 
-        return results
+        Args:
+            root (Path): Root directory to scan.
+            includes (list[str] | None): Include patterns (default: `["*"]`).
+            excludes (list[str] | None): Exclude patterns (default: `[]`).
+
+        Returns:
+            list[Path]: List of included file paths.
+        """
+        return [
+            root / e.path
+            for e in self._build_index(root, includes, excludes)
+            if e.included and not e.is_dir
+        ]
 
     def _calculate_filter_stats(
-        self, files: list[Path], type_label: str
+        self, files: Union[list[IndexEntry], list[Path]], type_label: str
     ) -> FilterStats:
         """
         Calculates file statistics for a filter set.
 
+        Index entries already carry their size, so no extra `stat` is needed.
+
         Args:
-            files (list[Path]): Files to analyze.
+            files (list[IndexEntry] | list[Path]): Files to analyze.
             type_label (str): Either `"included"` or `"excluded"`.
 
         Returns:
@@ -286,22 +886,231 @@ class Scanner:
         stats = FilterStats(type=type_label)
 
         for f in files:
-            if f.is_file():
+            if isinstance(f, IndexEntry):
+                if not f.is_dir:
+                    stats.files += 1
+                    stats.size += f.size
+            elif f.is_file():
                 stats.files += 1
                 stats.size += f.stat().st_size
 
         return stats
 
-    def scan(self, description, include, exclude, chunk_size, force, task):
+    def _calculate_excluded_stats(
+        self,
+        excluded_files: list[IndexEntry],
+        pruned_dirs: list[IndexEntry],
+        fingerprints: DirFingerprints = None,
+    ) -> FilterStats:
+        """
+        Calculates statistics for excluded files.
+
+        Excluded files found by the walk are always counted from the index.
+        How the contents of pruned directories (`.git`, `venv`, ...) are
+        handled depends on `excluded_stats` in `[filters]`:
+        - exact: every file below pruned directories is counted (in parallel).
+        - shallow: pruned directories are counted as opaque entries.
+        - off: no excluded statistics are computed.
+
+        Args:
+            excluded_files (list[IndexEntry]): Excluded file entries from the index.
+            pruned_dirs (list[IndexEntry]): Excluded directory entries from the index.
+            fingerprints (DirFingerprints, optional): Reuses the listings of
+                unchanged directories below pruned directories (exact mode).
+                Defaults to None.
+
+        Returns:
+            FilterStats: Statistics for excluded files.
+        """
+        # get excluded_stats from config if set (no mandatory config entry)
+        mode = self.config["filters"].get("excluded_stats", "exact")
+        if mode not in SNIB_EXCLUDED_STATS_MODES:
+            logger.warning(
+                f"Unknown excluded_stats mode '{mode}', expected one of {SNIB_EXCLUDED_STATS_MODES}. Using 'exact'."
+            )
+            mode = "exact"
+
+        if mode == "off":
+            return FilterStats(type="excluded", mode=mode)
+
+        stats = self._calculate_filter_stats(excluded_files, "excluded")
+        stats.mode = mode
+
+        if mode == "shallow":
+            stats.dirs = len(pruned_dirs)
+        elif pruned_dirs:
+            files, size = self._count_pruned_dirs(
+                [e.path for e in pruned_dirs], fingerprints
+            )
+            stats.files += files
+            stats.size += size
+
+        return stats
+
+    def _count_pruned_dirs(
+        self, dirs: list[str], fingerprints: DirFingerprints = None
+    ) -> tuple[int, int]:
+        """
+        Counts all files and their total size below the given directories.
+
+        Every directory listing is a separate task in a thread pool. Subdirectories
+        are queued as soon as their parent is read, so a single huge directory
+        (e.g. `node_modules`) is spread over all workers as well.
+
+        Args:
+            dirs (list[str]): Relative POSIX paths of the directories to count.
+            fingerprints (DirFingerprints, optional): Listings of the last walk
+                (see `_count_dir`). Defaults to None.
+
+        Returns:
+            tuple[int, int]: Number of files and total size in bytes.
+        """
+        files = 0
+        size = 0
+
+        with ThreadPoolExecutor() as pool:
+            pending = {pool.submit(self._count_dir, d, fingerprints) for d in dirs}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    dir_files, dir_size, subdirs = future.result()
+                    files += dir_files
+                    size += dir_size
+                    pending.update(
+                        pool.submit(self._count_dir, d, fingerprints) for d in subdirs
+                    )
+
+        return files, size
+
+    def _count_dir(
+        self, rel_dir: str, fingerprints: DirFingerprints = None
+    ) -> tuple[int, int, list[str]]:
+        """
+        Counts the files of a single directory (not recursive).
+
+        With `fingerprints`, a directory with the same mtime as in the last
+        scan is not listed again, only its files are `stat`ed (sizes are exact
+        even if a file changed in place). Listings of pruned directories carry
+        no filter verdicts (`included` is always False).
+
+        Args:
+            rel_dir (str): Relative POSIX path of the directory.
+            fingerprints (DirFingerprints, optional): Listings of the last walk.
+                Defaults to None.
+
+        Returns:
+            tuple[int, int, list[str]]: Number of files, total size in bytes
+                and the relative paths of its subdirectories (symlinks are not
+                followed).
+        """
+        path = os.path.join(self.path, rel_dir)
+        dir_mtime = None
+        if fingerprints is not None:
+            try:
+                dir_mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                pass
+            listing = fingerprints.listing(rel_dir, dir_mtime) if dir_mtime else None
+            if listing is not None:
+                result = self._restat_count(path, rel_dir, listing)
+                if result is not None:
+                    return result
+
+        files = 0
+        size = 0
+        subdirs = []
+        listing = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(f"{rel_dir}/{entry.name}")
+                            listing.append([entry.name, True, False, False])
+                        elif entry.is_file():
+                            files += 1
+                            size += entry.stat().st_size
+                            listing.append([entry.name, False, False, False])
+                    except OSError:
+                        continue
+        except OSError as e:
+            logger.debug(f"Could not read directory '{path}': {e}")
+            return files, size, subdirs
+
+        if dir_mtime is not None:
+            listing.sort()
+            digest = DirFingerprints.listing_hash([(n, d) for n, d, _, _ in listing])
+            fingerprints.record(rel_dir, dir_mtime, digest, listing)
+
+        return files, size, subdirs
+
+    @staticmethod
+    def _restat_count(
+        path: str, rel_dir: str, listing: list
+    ) -> Optional[tuple[int, int, list[str]]]:
+        """
+        Counts the files of an unchanged pruned directory from its last listing.
+
+        Args:
+            path (str): Absolute path of the directory.
+            rel_dir (str): Relative POSIX path of the directory.
+            listing (list): `[name, is_dir, is_symlink, included]` per child.
+
+        Returns:
+            tuple[int, int, list[str]] | None: Same as `_count_dir`, or None if
+                a file disappeared (list again).
+        """
+        base = os.path.join(path, "")
+        files = 0
+        size = 0
+        subdirs = []
+        for name, is_dir, _, _ in listing:
+            if is_dir:
+                subdirs.append(f"{rel_dir}/{name}")
+                continue
+            try:
+                size += os.stat(base + name).st_size
+            except OSError:
+                return None
+            files += 1
+        return files, size, subdirs
+
+    def scan(
+        self,
+        description,
+        include,
+        exclude,
+        chunk_size,
+        force,
+        task,
+        walk_workers=1,
+        token_budget=0,
+        tokenizer="heuristic",
+        layout="greedy",
+        bytes_mode=False,
+        output_format="files",
+        compression="none",
+        stdout=False,
+        framing="nul",
+        use_cache=True,
+        dedupe=False,
+    ):
         """
         Executes the scanning pipeline.
 
         Workflow:
-        1. Collects project sections (`_collect_sections`).
-        2. Formats them into prompt-ready text (`Formatter`).
-        3. Splits into chunks (`Chunker`).
-        4. Prepends headers for multi-file prompts.
-        5. Writes results into `prompts` (`Writer`).
+        1. Walks the project and selects files (`_collect_files`).
+        2. Streams project sections (`_iter_sections`).
+        3. Formats them into prompt-ready text (`Formatter`).
+        4. Splits into chunks (`Chunker`).
+        5. Writes every chunk into `prompts` as soon as it is complete and
+           patches the "Prompt file i/total" headers at the end (`Writer`).
+           If there are more chunks than the digits reserved for the total
+           allow (see `_estimate_total`), steps 2-5 run again with one more
+           digit, so no chunk exceeds the chunk size.
+
+        Every stage is a generator, so peak memory is bounded by the chunk size
+        and the reader's read-ahead, not by the size of the project.
 
         Args:
             description (str): Project description text.
@@ -310,49 +1119,364 @@ class Scanner:
             chunk_size (int): Maximum chunk size (characters).
             force (bool): If True, overwrite existing outputs.
             task (str): Task key for instructions.
+            walk_workers (int, optional): Directory reader threads. Defaults to 1.
+            token_budget (int, optional): Maximum tokens per chunk, replaces
+                `chunk_size` if set. Defaults to 0 (off).
+            tokenizer (str, optional): `"heuristic"` or path to a local BPE
+                vocabulary file. Defaults to "heuristic".
+            layout (str, optional): Chunk layout, `greedy`, `ffd` or `balanced`.
+                Defaults to "greedy".
+            bytes_mode (bool, optional): Keep file contents as UTF-8 bytes from
+                reading to writing, `chunk_size` counts bytes. Only applies
+                without `token_budget`. Defaults to False.
+            output_format (str, optional): `files` (one `prompt_N.txt` per
+                chunk) or `pack` (one pack file plus JSON index).
+                Defaults to "files".
+            compression (str, optional): Pack compression, `none`, `gzip` or
+                `lzma`. Defaults to "none".
+            stdout (bool, optional): Stream chunks to stdout instead of writing
+                `prompts`: no confirmations, no token cache, and no
+                "Prompt file i/total" headers (the total is not known while
+                streaming). Defaults to False.
+            framing (str, optional): Chunk framing on stdout, `nul` or `jsonl`.
+                Defaults to "nul".
+            use_cache (bool, optional): Keep file contents and token counts in
+                `prompts/.snib-cache/scan.sqlite` and serve unchanged files from
+                it (see `ScanCache`). Not used with `stdout`. Defaults to True.
+            dedupe (bool, optional): Emit files identical to an earlier file as
+                `#[FILE] path (identical to other/path)` stubs and report the
+                savings in the filters section. Defaults to False.
 
         Returns:
-            None: Results are written to disk in `prompts`.
+            None: Results are written to disk in `prompts` (or to stdout).
+
+        Raises:
+            typer.Exit: If the tokenizer cannot be loaded.
         """
         logger.info(f"Scanning {self.path}")
 
-        sections = self._collect_sections(description, include, exclude, force, task)
-        formatter = Formatter()
-        formatted = formatter.to_prompt_text(sections)
+        prompts_dir = self.path / SNIB_PROMPTS_DIR
+
+        if layout not in SNIB_CHUNK_LAYOUTS:
+            logger.warning(
+                f"Unknown layout '{layout}', expected one of {SNIB_CHUNK_LAYOUTS}. Using 'greedy'."
+            )
+            layout = "greedy"
+
+        if output_format not in SNIB_OUTPUT_FORMATS:
+            logger.warning(
+                f"Unknown output_format '{output_format}', expected one of {SNIB_OUTPUT_FORMATS}. Using 'files'."
+            )
+            output_format = "files"
+        if compression not in SNIB_PACK_COMPRESSIONS:
+            logger.warning(
+                f"Unknown compression '{compression}', expected one of {SNIB_PACK_COMPRESSIONS}. Using 'none'."
+            )
+            compression = "none"
 
-        chunker = Chunker(chunk_size)
-        chunks = chunker.chunk(formatted)
+        if framing not in SNIB_STREAM_FRAMINGS:
+            logger.warning(
+                f"Unknown framing '{framing}', expected one of {SNIB_STREAM_FRAMINGS}. Using 'nul'."
+            )
+            framing = "nul"
+        if stdout:
+            force = True  # nobody to answer confirmations, stdout is the output
 
-        # leave headspace for header 100 chars in chunker -> self.header_size
-        # insert header on first lines of every chunk
+        if bytes_mode and token_budget:
+            logger.warning("bytes_mode needs chunk_size, ignored with token_budget.")
+            bytes_mode = False
 
-        chunks_with_header = []
+        counter = None
+        if token_budget:
+            try:
+                tokenizer = load_tokenizer(tokenizer, self.path)
+            except ValueError as e:
+                logger.error(str(e))
+                raise typer.Exit()
 
-        total = len(chunks)
-        for i, chunk in enumerate(chunks, 1):
-            if total <= 1:
-                header = ""
-            else:
-                header = (
-                    f"Please do not give output until all prompt files are sent. Prompt file {i}/{total}\n"
-                    if i == 1
-                    else f"Prompt file {i}/{total}\n"
+        cache = None
+        try:
+            if use_cache and not stdout:
+                # [performance] is optional in snibconfig.toml
+                performance = self.config.get("performance", {})
+                cache = ScanCache(
+                    prompts_dir / SNIB_CACHE_DIR / SNIB_SCAN_CACHE,
+                    max_size_mb=performance.get("cache_max_mb", 256),
+                    max_age_days=performance.get("cache_max_age_days", 30),
                 )
+            if token_budget:
+                counter = TokenCounter(tokenizer, store=cache)
 
-            # works with empty info section
-            info_texts = formatter.to_prompt_text(
-                [
-                    Section(type="info", content=header)
-                ]  # this executes to_prompt_text i times!
+            included_files, include_stats, exclude_stats = self._collect_files(
+                include, exclude, force, walk_workers, cache
             )
-            if info_texts:
-                chunks_with_header.append(info_texts[0] + chunk)
-            else:
-                chunks_with_header.append(chunk)
 
-            # chunks_with_header.append(formatter.to_prompt_text([Section(type="info", content=header)])[0] + chunk)
+            def write(total_width: int, force: bool):
+                sections = self._iter_sections(
+                    description,
+                    include,
+                    exclude,
+                    task,
+                    included_files,
+                    include_stats,
+                    exclude_stats,
+                    as_bytes=bytes_mode,
+                    cache=cache,
+                    dedupe=dedupe,
+                    counter=counter,
+                )
 
-        prompts_dir = self.path / SNIB_PROMPTS_DIR
+                formatter = Formatter()
+                if bytes_mode:
+                    formatted = formatter.iter_prompt_bytes(sections)
+                else:
+                    formatted = formatter.iter_prompt_text(sections)
+
+                if stdout:
+                    # no "Prompt file i/total" headers, the total is unknown while streaming
+                    def header(i: int, total: int, width: int) -> str:
+                        return ""
+
+                else:
+                    header = formatter.compile_header()
+
+                # the chunker reserves exactly the header of each chunk, headers
+                # keep their length when the placeholder total is patched
+                placeholder = 10**total_width - 1
+                chunker = Chunker(
+                    chunk_size,
+                    token_budget=token_budget,
+                    counter=counter,
+                    layout=layout,
+                    header=lambda i: header(i, placeholder, total_width),
+                    max_chunks=placeholder,
+                )
+                chunks = chunker.iter_chunks(formatted)
+
+                if stdout:
+                    stream_chunks(chunks, sys.stdout.buffer, framing)
+                    return
+
+                def checked(chunks):
+                    # a longer total would not fit the reserved header size
+                    for i, chunk in enumerate(chunks, 1):
+                        if i > placeholder:
+                            raise _TotalOverflow()
+                        yield chunk
+
+                if output_format == "pack":
+                    Writer(prompts_dir).write_pack(
+                        checked(chunks),
+                        header,
+                        total_width=total_width,
+                        force=force,
+                        compression=compression,
+                    )
+                else:
+                    writer = Writer(prompts_dir)
+                    writer.write_stream(
+                        checked(chunks), header, total_width=total_width, force=force
+                    )
 
-        writer = Writer(prompts_dir)
-        writer.write_chunks(chunks_with_header, force=force)
+            # reserve digits for "total" in the headers, it is only known at the end
+            estimated_total = self._estimate_total(
+                description, included_files, include_stats, token_budget or chunk_size
+            )
+            total_width = len(str(estimated_total))
+            while True:
+                try:
+                    write(total_width, force)
+                    break
+                except _TotalOverflow:
+                    # nothing was replaced yet (prompt files and packs are
+                    # written to temporary files first), chunk again
+                    logger.notice(
+                        f"More than {10**total_width - 1} prompt files, chunking again with longer headers."
+                    )
+                    total_width += 1
+                    force = True  # already confirmed
+
+            if counter:
+                counter.save()
+        finally:
+            # files read before an abort (or a declined confirmation) are
+            # still worth keeping, and the connection is always closed
+            if cache is not None:
+                cache.close()
+
+    def _estimate_total(
+        self,
+        description: str,
+        included_files: list[IndexEntry],
+        include_stats: FilterStats,
+        limit: int,
+    ) -> int:
+        """
+        Estimates an upper bound of the number of prompt files.
+
+        Every included byte plus the per-file overhead ("#[FILE] path" header,
+        separator and tree line, which dominates for many small files), doubled
+        for chunks left partly empty at line breaks. A token is at least one
+        character, so the same bound holds for token budgets. `scan` chunks
+        again if the real number of chunks exceeds it anyway.
+
+        Args:
+            description (str): Project description text.
+            included_files (list[IndexEntry]): Files from `_collect_files`.
+            include_stats (FilterStats): Statistics for included files.
+            limit (int): Chunk size or token budget.
+
+        Returns:
+            int: Estimated maximum number of chunks.
+        """
+        overhead = len(description or "") + 1024  # description, task, filters
+        for entry in included_files:
+            overhead += 2 * len(entry.path) + 4 * entry.path.count("/") + 20
+        room = max(limit - 100, 1)  # minus the header
+        return 2 * (include_stats.size + overhead) // room + 2
+
+    def watch(
+        self,
+        description,
+        include,
+        exclude,
+        chunk_size,
+        force,
+        task,
+        walk_workers=1,
+        token_budget=0,
+        tokenizer="heuristic",
+        layout="greedy",
+        bytes_mode=False,
+        output_format="files",
+        compression="none",
+        use_cache=True,
+        backend="auto",
+        debounce_ms=300,
+        poll_interval=1.0,
+        dedupe=False,
+    ):
+        """
+        Scans the project, then regenerates the prompts whenever it changes.
+
+        Runs `scan` once and waits for changes (see `snib.watcher`): inotify on
+        Linux, snapshots of the scan index elsewhere. A burst of changes is
+        debounced into one update, changes to files outside the include
+        patterns are ignored. Updates rely on the incremental parts of
+        `scan`: the scan cache serves untouched files without opening them,
+        unchanged directories are not listed again, and only prompt files
+        whose content changed are rewritten. Each update logs its latency.
+
+        Stops on Ctrl+C.
+
+        Args:
+            description (str): Project description text.
+            include (list[str]): Include patterns.
+            exclude (list[str]): Exclude patterns.
+            chunk_size (int): Maximum chunk size (characters).
+            force (bool): If True, overwrite existing outputs without asking
+                (updates never ask).
+            task (str): Task key for instructions.
+            walk_workers (int, optional): Directory reader threads. Defaults to 1.
+            token_budget (int, optional): Maximum tokens per chunk. Defaults to 0.
+            tokenizer (str, optional): Tokenizer for `token_budget`.
+                Defaults to "heuristic".
+            layout (str, optional): Chunk layout. Defaults to "greedy".
+            bytes_mode (bool, optional): Keep contents as UTF-8 bytes.
+                Defaults to False.
+            output_format (str, optional): `files` or `pack`. Defaults to "files".
+            compression (str, optional): Pack compression. Defaults to "none".
+            use_cache (bool, optional): Use the scan cache. Without it every
+                update reads all files again. Defaults to True.
+            backend (str, optional): `auto`, `inotify` or `poll`.
+                Defaults to "auto".
+            debounce_ms (int, optional): Quiet period before an update.
+                Defaults to 300.
+            poll_interval (float, optional): Seconds between snapshots when
+                polling. Defaults to 1.0.
+            dedupe (bool, optional): Replace duplicate files with stubs.
+                Defaults to False.
+        """
+        if backend not in SNIB_WATCH_BACKENDS:
+            logger.warning(
+                f"Unknown watch backend '{backend}', expected one of {SNIB_WATCH_BACKENDS}. Using 'auto'."
+            )
+            backend = "auto"
+        if not use_cache:
+            logger.warning("Scan cache is off, every update reads all files again.")
+
+        def update(force: bool):
+            self.scan(
+                description,
+                include,
+                exclude,
+                chunk_size,
+                force,
+                task,
+                walk_workers,
+                token_budget,
+                tokenizer,
+                layout,
+                bytes_mode,
+                output_format,
+                compression,
+                use_cache=use_cache,
+                dedupe=dedupe,
+            )
+
+        update(force)
+
+        # the prompts folder changes on every update, never watch it
+        ignored = list(exclude) + [SNIB_PROMPTS_DIR]
+        fingerprints = DirFingerprints()
+
+        def snapshot() -> dict[str, tuple]:
+            # polling: unchanged directories are only stat-ed (in memory)
+            nonlocal fingerprints
+            fingerprints = DirFingerprints(fingerprints.current)
+            index = self._build_index(
+                self.path, include, ignored, walk_workers, fingerprints
+            )
+            return {e.path: (e.size, e.mtime_ns) for e in index}
+
+        watcher = open_watcher(
+            self.path,
+            PatternSet(ignored),
+            snapshot,
+            backend=backend,
+            poll_interval=poll_interval,
+        )
+        include_set = PatternSet(include or ["*"])
+
+        def relevant(rel_path: str) -> bool:
+            # lost events, included files and directories (created, removed
+            # or renamed directories may hold included files) trigger updates
+            if rel_path == ALL_CHANGED:
+                return True
+            if include_set.match(rel_path, rel_path.rsplit("/", 1)[-1]):
+                return True
+            return not (self.path / rel_path).is_file()
+
+        logger.notice(f"Watching {self.path} ({watcher.name}), press Ctrl+C to stop.")
+        try:
+            while True:
+                changes = wait_for_changes(watcher, debounce_ms / 1000)
+                if not any(relevant(p) for p in changes):
+                    logger.debug(
+                        f"Ignored {len(changes)} changed path(s) outside the include patterns"
+                    )
+                    continue
+                start = time.perf_counter()
+                update(True)
+                what = (
+                    "lost events"
+                    if ALL_CHANGED in changes
+                    else f"{len(changes)} changed path(s)"
+                )
+                logger.notice(
+                    f"Updated prompts in {(time.perf_counter() - start) * 1000:.0f} ms ({what})"
+                )
+        except KeyboardInterrupt:
+            logger.info("Stopped watching.")
+        finally:
+            watcher.close()
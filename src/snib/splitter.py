@@ -0,0 +1,251 @@
+import ast
+import re
+from bisect import bisect_right
+from pathlib import Path
+from typing import Optional
+
+# languages split at brace-balanced blocks (cpp, java and web presets and relatives)
+BRACE_SUFFIXES = {
+    ".c",
+    ".h",
+    ".cc",
+    ".cpp",
+    ".cxx",
+    ".hpp",
+    ".hh",
+    ".java",
+    ".kt",
+    ".cs",
+    ".go",
+    ".swift",
+    ".rs",
+    ".php",
+    ".js",
+    ".jsx",
+    ".mjs",
+    ".ts",
+    ".tsx",
+    ".css",
+    ".scss",
+    ".less",
+}
+PYTHON_SUFFIXES = {".py", ".pyi"}
+
+# comments, strings and braces (everything else is irrelevant for the depth)
+_BRACE_TOKENS = re.compile(
+    r"//[^\n]*"
+    r"|/\*.*?(?:\*/|\Z)"
+    r'|"(?:\\.|[^"\\\n])*"'
+    r"|'(?:\\.|[^'\\\n])*'"
+    r"|`(?:\\.|[^`\\])*`"
+    r"|[{}\n]",
+    re.S,
+)
+_LINES = re.compile(r"[^\n]*\n|[^\n]+")  # lines with their "\n" (same as the chunker)
+_COMMENT_PREFIXES = ("#", "//", "/*", "*", "@")  # @: decorators/annotations
+
+
+def block_starts(path: str, lines: list[str]) -> dict[int, int]:
+    """
+    Find lines where a syntactic block starts.
+
+    - Python: top-level statements and class members (via `ast`), falls back
+      to unindented lines if the file does not parse.
+    - C-family (`BRACE_SUFFIXES`): lines at brace depth 0 or 1 that follow a
+      closed block, a statement or a blank line.
+    - Anything else: lines after a blank line.
+
+    Leading comments, decorators and annotations stay with their block.
+
+    Args:
+        path (str): File path (the suffix selects the language).
+        lines (list[str]): File content split into lines (with line ends).
+
+    Returns:
+        dict[int, int]: Line index -> nesting depth (0 = top level).
+    """
+    suffix = Path(path).suffix.lower()
+    if suffix in PYTHON_SUFFIXES:
+        starts = _python_starts(lines)
+    elif suffix in BRACE_SUFFIXES:
+        starts = _brace_starts(lines)
+    else:
+        starts = {i: 0 for i in range(1, len(lines)) if not lines[i - 1].strip()}
+    return {_attach_comments(lines, i): depth for i, depth in starts.items() if i > 0}
+
+
+def _python_starts(lines: list[str]) -> dict[int, int]:
+    try:
+        tree = ast.parse("".join(lines))
+    except (SyntaxError, ValueError):
+        return {
+            i: 0
+            for i, line in enumerate(lines)
+            if line.strip()
+            and not line[0].isspace()
+            and not line.startswith((")", "]", "}"))
+        }
+
+    def start(node):  # decorators belong to the definition
+        return (
+            min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+            - 1
+        )
+
+    starts = {}
+    for node in tree.body:
+        starts[start(node)] = 0
+        if isinstance(node, ast.ClassDef):
+            for member in node.body:
+                starts.setdefault(start(member), 1)
+    return starts
+
+
+def _brace_starts(lines: list[str]) -> dict[int, int]:
+    text = "".join(lines)
+    depth = 0
+    line = 0
+    # depth at the start of each line (None inside comments/strings)
+    depths = [0] * (len(lines) + 1)
+    for match in _BRACE_TOKENS.finditer(text):
+        token = match.group()
+        if token == "{":
+            depth += 1
+        elif token == "}":
+            depth = max(depth - 1, 0)
+        elif token == "\n":
+            line += 1
+            depths[line] = depth
+        else:
+            # multi-line comment or template string: inner lines are no boundary
+            for _ in range(token.count("\n")):
+                line += 1
+                depths[line] = None
+
+    starts = {}
+    for i in range(1, len(lines)):
+        stripped = lines[i].strip()
+        if depths[i] is None or depths[i] > 1 or not stripped:
+            continue
+        if stripped.startswith(("}", ")", "]")):  # end of the enclosing block
+            continue
+        previous = lines[i - 1].strip()
+        if not previous or previous.endswith(("}", ";", "{")):
+            starts[i] = depths[i]
+    return starts
+
+
+def _attach_comments(lines: list[str], i: int) -> int:
+    # move a block start up over directly preceding comment/decorator lines
+    while i > 1 and lines[i - 1].lstrip().startswith(_COMMENT_PREFIXES):
+        i -= 1
+    return i
+
+
+def plan_pieces(
+    line_sizes: list[int],
+    starts: dict[int, int],
+    limit: int,
+    overhead: int = 0,
+) -> list[int]:
+    """
+    Choose where to cut a file into pieces that fit a size limit.
+
+    Each piece ends at the furthest block start that still fits, preferring
+    shallow blocks (top level before class members/nested blocks) as long as
+    the piece is at least half full. Without a fitting block start, the piece
+    ends at the last line that fits; a single line above the limit becomes a
+    piece of its own.
+
+    Args:
+        line_sizes (list[int]): Size of every line (characters or tokens).
+        starts (dict[int, int]): Block starts from `block_starts`.
+        limit (int): Maximum size of a piece.
+        overhead (int, optional): Size added to every piece (e.g. a header).
+
+    Returns:
+        list[int]: Line index where each piece starts (the first is always 0).
+    """
+    prefix = [0]
+    for size in line_sizes:
+        prefix.append(prefix[-1] + size)
+    n = len(line_sizes)
+    candidates = sorted(starts)
+    room = max(limit - overhead, 1)
+
+    pieces = [0]
+    s = 0
+    while prefix[n] - prefix[s] > room:
+        # furthest end line that fits (at least one line)
+        end = max(bisect_right(prefix, prefix[s] + room) - 1, s + 1)
+        if end >= n:  # a single oversized last line
+            break
+        best = {}  # depth -> furthest block start in (s, end]
+        lo = bisect_right(candidates, s)
+        hi = bisect_right(candidates, end)
+        for c in candidates[lo:hi]:
+            best[starts[c]] = c
+        cut = None
+        furthest = None
+        for depth in sorted(best):
+            furthest = max(furthest or 0, best[depth])
+            if prefix[furthest] - prefix[s] >= room / 2:
+                cut = furthest
+                break
+        s = cut or furthest or end
+        pieces.append(s)
+    return pieces
+
+
+def continuation_marker(path: str, line: int) -> str:
+    """
+    Header of a continuation piece.
+
+    Args:
+        path (str): File path as shown in the `#[FILE]` header.
+        line (int): Last line (1-based) of the previous piece.
+
+    Returns:
+        str: e.g. `#[FILE] src/app.py (continued from src/app.py:120)`
+    """
+    return f"#[FILE] {path} (continued from {path}:{line})\n"
+
+
+def split_file_section(
+    section: str,
+    path: str,
+    limit: int,
+    size_fn,
+) -> Optional[list[str]]:
+    """
+    Split a formatted `#[FILE]` section at block boundaries.
+
+    The first piece keeps the original header, every further piece starts
+    with a `continuation_marker`.
+
+    Args:
+        section (str): Formatted file section (header line + content).
+        path (str): File path from the header.
+        limit (int): Maximum piece size.
+        size_fn (Callable[[str], int]): Size of a text (characters or tokens).
+
+    Returns:
+        list[str] | None: Pieces, or None if the section has no content lines.
+    """
+    header_end = section.find("\n") + 1
+    if not header_end:
+        return None
+    header, body = section[:header_end], section[header_end:]
+    lines = _LINES.findall(body)
+    if not lines:
+        return None
+
+    overhead = max(size_fn(header), size_fn(continuation_marker(path, len(lines))))
+    starts = block_starts(path, lines)
+    cuts = plan_pieces([size_fn(line) for line in lines], starts, limit, overhead)
+
+    pieces = []
+    for n, (start, end) in enumerate(zip(cuts, cuts[1:] + [len(lines)])):
+        lead = header if n == 0 else continuation_marker(path, start)
+        pieces.append(lead + "".join(lines[start:end]))
+    return pieces
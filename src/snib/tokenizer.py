@@ -0,0 +1,285 @@
+import base64
+import hashlib
+import json
+import math
+import re
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Optional
+
+from .logger import logger
+
+# characters per token of BPE vocabularies like cl100k on typical sources
+CHARS_PER_TOKEN = {
+    ".py": 3.6,
+    ".js": 3.3,
+    ".ts": 3.3,
+    ".java": 3.8,
+    ".c": 3.3,
+    ".cpp": 3.3,
+    ".h": 3.3,
+    ".cs": 3.7,
+    ".go": 3.4,
+    ".rb": 3.6,
+    ".php": 3.3,
+    ".swift": 3.5,
+    ".kt": 3.6,
+    ".html": 3.0,
+    ".css": 3.0,
+    ".scss": 3.0,
+    ".json": 2.8,
+    ".yaml": 3.3,
+    ".yml": 3.3,
+    ".toml": 3.2,
+    ".xml": 2.9,
+    ".sql": 3.5,
+    ".sh": 3.2,
+    ".md": 4.2,
+    ".rst": 4.2,
+    ".txt": 4.3,
+}
+DEFAULT_CHARS_PER_TOKEN = 3.5
+
+# GPT-2 style pre-tokenizer (words, numbers, punctuation runs, whitespace),
+# `re` has no \p{L}, so letters are "word characters without digits and _"
+_PRE_TOKENIZE = re.compile(
+    r"'(?:[sdmt]|ll|ve|re)| ?[^\W\d_]+| ?\d{1,3}| ?[^\s\w]+|_+|\s+(?!\S)|\s+"
+)
+
+
+class Tokenizer(ABC):
+    """
+    Interface for token counters used by the `Chunker`.
+
+    Implementations only count tokens, they never need to return them.
+
+    Attributes:
+        name (str): Identifies the tokenizer (and its vocabulary) in caches.
+        cacheable (bool): Whether counts are worth caching by content hash.
+    """
+
+    name = "tokenizer"
+    cacheable = True
+
+    @abstractmethod
+    def count(self, text: str, path: Optional[str] = None) -> int:
+        """
+        Count the tokens of a text.
+
+        Args:
+            text (str): Text to count.
+            path (str, optional): File the text belongs to (may select a calibration).
+
+        Returns:
+            int: Number of tokens.
+        """
+
+
+class HeuristicTokenizer(Tokenizer):
+    """
+    Fast offline token estimate from the number of characters.
+
+    Uses a characters-per-token ratio calibrated per file extension (see
+    `CHARS_PER_TOKEN`). Counting is O(1), so counts are not cached.
+    """
+
+    name = "heuristic"
+    cacheable = False
+
+    def __init__(self, chars_per_token: dict[str, float] = None):
+        """
+        Initialize a HeuristicTokenizer.
+
+        Args:
+            chars_per_token (dict[str, float], optional): Ratios per extension,
+                merged over the built-in `CHARS_PER_TOKEN`.
+        """
+        self.chars_per_token = {**CHARS_PER_TOKEN, **(chars_per_token or {})}
+
+    def count(self, text: str, path: Optional[str] = None) -> int:
+        ratio = DEFAULT_CHARS_PER_TOKEN
+        if path:
+            suffix = Path(path).suffix.lower()
+            ratio = self.chars_per_token.get(suffix, DEFAULT_CHARS_PER_TOKEN)
+        return math.ceil(len(text) / ratio)
+
+
+class BPETokenizer(Tokenizer):
+    """
+    Byte-level BPE token counter for a locally installed vocabulary.
+
+    Reads vocabulary files in the `tiktoken` format (one `<base64 token> <rank>`
+    per line, e.g. `cl100k_base.tiktoken`), so no network access and no extra
+    dependency is needed. Pre-tokenization approximates the GPT-2 pattern.
+    Counts of pre-tokenized pieces are memoized, as code repeats a lot.
+    """
+
+    def __init__(self, vocab_path: Path):
+        """
+        Load a BPE vocabulary.
+
+        Args:
+            vocab_path (Path): Path to the vocabulary file.
+
+        Raises:
+            ValueError: If the file is not a valid vocabulary.
+        """
+        data = Path(vocab_path).read_bytes()
+        self.ranks = {}
+        for line in data.splitlines():
+            if not line.strip():
+                continue
+            try:
+                token, rank = line.split()
+                self.ranks[base64.b64decode(token)] = int(rank)
+            except ValueError:
+                raise ValueError(f"Invalid BPE vocabulary line in {vocab_path}")
+        self.name = f"bpe:{hashlib.sha1(data).hexdigest()[:12]}"
+        self._piece_counts = {}
+
+    def count(self, text: str, path: Optional[str] = None) -> int:
+        total = 0
+        for piece in _PRE_TOKENIZE.findall(text):
+            n = self._piece_counts.get(piece)
+            if n is None:
+                n = self._piece_counts[piece] = self._count_piece(
+                    piece.encode("utf-8", "surrogatepass")
+                )
+            total += n
+        return total
+
+    def _count_piece(self, piece: bytes) -> int:
+        if piece in self.ranks:
+            return 1
+        # merge the adjacent pair with the lowest rank until nothing merges
+        parts = [piece[i : i + 1] for i in range(len(piece))]
+        while len(parts) > 1:
+            best, best_rank = None, None
+            for i in range(len(parts) - 1):
+                rank = self.ranks.get(parts[i] + parts[i + 1])
+                if rank is not None and (best_rank is None or rank < best_rank):
+                    best, best_rank = i, rank
+            if best is None:
+                break
+            parts[best : best + 2] = [parts[best] + parts[best + 1]]
+        return len(parts)
+
+
+def load_tokenizer(spec: str, root: Optional[Path] = None) -> Tokenizer:
+    """
+    Create a tokenizer from its config value.
+
+    Args:
+        spec (str): `"heuristic"` or a path to a BPE vocabulary file
+            (relative paths are resolved against `root`).
+        root (Path, optional): Project root. Defaults to the current working
+            directory at call time.
+
+    Returns:
+        Tokenizer: The tokenizer.
+
+    Raises:
+        ValueError: If the vocabulary file does not exist or is invalid.
+    """
+    if not spec or spec == "heuristic":
+        return HeuristicTokenizer()
+    vocab_path = Path(spec).expanduser()
+    if not vocab_path.is_absolute():
+        vocab_path = Path(root or Path.cwd()) / vocab_path
+    if not vocab_path.is_file():
+        raise ValueError(f"BPE vocabulary '{vocab_path}' not found")
+    return BPETokenizer(vocab_path)
+
+
+class TokenCounter:
+    """
+    Counts tokens with a tokenizer and caches the counts by content hash.
+
+    The counts persist in a `ScanCache` (the scan's SQLite cache) or a JSON
+    file, so unchanged files are not tokenized again on the next scan. Keys
+    combine the tokenizer name and a BLAKE2 hash of the text.
+
+    Attributes:
+        tokenizer (Tokenizer): Tokenizer used for counting.
+        cache_path (Path | None): JSON cache file (None = in-memory only).
+        store (ScanCache | None): Scan cache holding the counts instead.
+        hits (int): Counts served from the cache.
+        misses (int): Counts computed by the tokenizer.
+    """
+
+    def __init__(
+        self, tokenizer: Tokenizer, cache_path: Optional[Path] = None, store=None
+    ):
+        """
+        Initialize a TokenCounter and load an existing cache.
+
+        Args:
+            tokenizer (Tokenizer): Tokenizer used for counting.
+            cache_path (Path, optional): JSON cache file. Defaults to None.
+            store (ScanCache, optional): Scan cache to keep the counts in
+                (takes precedence over `cache_path`). Defaults to None.
+        """
+        self.tokenizer = tokenizer
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        self._cache = {}
+        self._used = {}
+        if self.store is not None:
+            if tokenizer.cacheable:
+                self._cache = self.store.load_tokens()
+        elif self.cache_path and self.cache_path.is_file():
+            try:
+                self._cache = json.loads(self.cache_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                logger.debug(f"Ignoring unreadable token cache {self.cache_path}")
+
+    def count(self, text: str, path: Optional[str] = None) -> int:
+        """
+        Count the tokens of a text, using the cache if the tokenizer is slow.
+
+        Args:
+            text (str): Text to count (typically a whole formatted file section).
+            path (str, optional): File the text belongs to.
+
+        Returns:
+            int: Number of tokens.
+        """
+        if not self.tokenizer.cacheable:
+            return self.tokenizer.count(text, path)
+
+        digest = hashlib.blake2b(
+            text.encode("utf-8", "surrogatepass"), digest_size=16
+        ).hexdigest()
+        key = f"{self.tokenizer.name}:{digest}"
+        n = self._cache.get(key)
+        if n is None:
+            n = self._cache[key] = self.tokenizer.count(text, path)
+            self.misses += 1
+        else:
+            self.hits += 1
+        self._used[key] = n
+        return n
+
+    def save(self):
+        """
+        Write the counts used in this run to the cache file (or scan cache).
+
+        Only entries used in this run are kept (the scan cache evicts unused
+        counts by age), so the cache does not grow with files that no longer
+        exist.
+        """
+        if not self.tokenizer.cacheable:
+            return
+        if self.store is not None:
+            self.store.save_tokens(self._used)
+            logger.debug(f"Token cache: {self.hits} hit(s), {self.misses} miss(es)")
+            return
+        if not self.cache_path:
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        self.cache_path.write_text(json.dumps(self._used), encoding="utf-8")
+        logger.debug(
+            f"Token cache: {self.hits} hit(s), {self.misses} miss(es), saved to {self.cache_path}"
+        )
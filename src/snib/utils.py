@@ -1,13 +1,19 @@
-import fnmatch
+import os
 from importlib import resources
 from pathlib import Path
+from typing import Optional
 
-import toml
-from click import Choice
+import typer
 
 from . import presets  # reference to snib.presets
-from .config import SNIB_DEFAULT_CONFIG, load_config
+from .config import SNIB_CONFIG_FILE, SNIB_DEFAULT_CONFIG, load_config
 from .logger import logger
+from .patterns import PatternSet
+
+TREE_ELBOW = "└──"
+TREE_TEE = "├──"
+TREE_PIPE_PREFIX = "│   "
+TREE_SPACE_PREFIX = "    "
 
 
 def detect_pattern_conflicts(includes: list[str], excludes: list[str]) -> set[str]:
@@ -29,6 +35,9 @@ def detect_pattern_conflicts(includes: list[str], excludes: list[str]) -> set[st
 
     conflicts = set()
     conflicts_log = set()
+    # compile every pattern once, the same matcher is used by the scanner
+    include_sets = {inc: PatternSet([inc]) for inc in includes}
+    exclude_sets = {exc: PatternSet([exc]) for exc in excludes}
     # check each include against each exclude
     for inc in includes:
         for exc in excludes:
@@ -36,12 +45,12 @@ def detect_pattern_conflicts(includes: list[str], excludes: list[str]) -> set[st
             if inc == exc:
                 conflicts.add(inc)
                 conflicts_log.add(f"{inc} == {exc}")
-            # include eaten by exclude -> fnmatch.fnmatch("*.py", "utils.py") -> False
-            elif fnmatch.fnmatch(inc, exc):
+            # include eaten by exclude -> "*.py" is not matched by "utils.py"
+            elif exclude_sets[exc].match(inc):
                 conflicts.add(inc)
                 conflicts_log.add(f"{inc} (matched by {exc})")
-            # exclude is more specific than include -> fnmatch.fnmatch("utils.py", "*.py") -> True DONT ADD TO CONFLICTS!
-            elif fnmatch.fnmatch(exc, inc):
+            # exclude is more specific than include -> "utils.py" is matched by "*.py" DONT ADD TO CONFLICTS!
+            elif include_sets[inc].match(exc):
                 conflicts_log.add(f"{inc} (conflicts with {exc})")
 
     return conflicts, conflicts_log
@@ -81,79 +90,140 @@ def check_include_in_exclude(
 
 
 def build_tree(
-    path: Path, include: list[str], exclude: list[str], prefix: str = ""
+    path: Path,
+    include: list[str] = None,
+    exclude: list[str] = None,
+    files: list[str] = None,
+    max_depth: int = None,
+    max_entries: int = None,
 ) -> list[str]:
     """
     Build a visual tree representation of a project directory.
 
-    Filtering rules:
-    - Excluded entries are never shown.
+    The tree is rendered in one pass from a list of selected files
+    (see `render_tree`). If `files` is not given, the files are selected
+    with a single pruned walk instead of probing every subtree.
+
+    Filtering rules (only used when `files` is None):
+    - Excluded entries are never shown; excluded directories are not walked.
     - Files are shown if they match include patterns (or if include is empty).
-    - Directories are shown if:
-        * They are explicitly included, or
-        * They contain at least one valid file inside.
+    - Directories are shown if they contain at least one shown file.
 
     Args:
-        path (Path): Root directory to scan.
-        include (list[str]): Include patterns (globs, filenames, or dirs).
-        exclude (list[str]): Exclude patterns (globs, filenames, or dirs).
-        prefix (str, optional): Current tree indentation prefix. Defaults to "".
+        path (Path): Root directory of the project.
+        include (list[str], optional): Include patterns (globs, filenames, or dirs).
+        exclude (list[str], optional): Exclude patterns (globs, filenames, or dirs).
+        files (list[str], optional): Already selected relative POSIX file paths,
+            e.g. from the scan index. Skips the walk entirely.
+        max_depth (int, optional): Deepest level shown. Defaults to None (no cap).
+        max_entries (int, optional): Max entries shown per directory.
+            Defaults to None (no cap).
 
     Returns:
         list[str]: List of formatted strings representing the directory tree.
     """
-    ELBOW = "└──"
-    TEE = "├──"
-    PIPE_PREFIX = "│   "
-    SPACE_PREFIX = "    "
+    if files is None:
+        include_set = PatternSet(include or [])
+        exclude_set = PatternSet(exclude or [])
+        files = []
 
-    def should_include_file(entry: Path) -> bool:
-        # excluded?
-        if any(entry.match(p) or entry.name == p for p in exclude):
-            return False
+        for dirpath, dirnames, filenames in os.walk(path):
+            rel_dir = Path(dirpath).relative_to(path).as_posix()
+            rel_dir = "" if rel_dir == "." else f"{rel_dir}/"
 
-        # only files, if include empty or match
-        if entry.is_file():
-            return not include or any(
-                entry.match(p) or entry.name == p or p in entry.parts for p in include
+            dirnames[:] = sorted(
+                d for d in dirnames if not exclude_set.match(f"{rel_dir}{d}", d)
             )
+            for fname in filenames:
+                rel_path = f"{rel_dir}{fname}"
+                if exclude_set.match(rel_path, fname):
+                    continue
+                if not include or include_set.match(rel_path, fname):
+                    files.append(rel_path)
 
-        # folder: show if
-        #    - include emptry or
-        #    - foldername itself in or
-        #    - any file below matches include
-        if entry.is_dir():
-            if not include or entry.name in include:
-                return True
-            # min. one file below matches include
-            return any(
-                f.match(p) or f.name == p
-                for p in include
-                for f in entry.rglob("*")
-                if f.is_file()
-            )
+    return render_tree(path.name, files, max_depth=max_depth, max_entries=max_entries)
 
-        return True
 
-    lines = [path.name] if not prefix else []
-    entries = [
-        e
-        for e in sorted(path.iterdir(), key=lambda p: (p.is_file(), p.name.lower()))
-        if should_include_file(e)
-    ]
+class _TreeNode:
+    """Directory node used by `render_tree`."""
+
+    __slots__ = ("dirs", "files", "total", "hidden")
+
+    def __init__(self):
+        self.dirs = {}
+        self.files = []
+        self.total = 0  # files anywhere below this directory
+        self.hidden = 0  # files below the depth cap
+
+
+def render_tree(
+    name: str, paths: list[str], max_depth: int = None, max_entries: int = None
+) -> list[str]:
+    """
+    Render a visual tree from a list of relative file paths.
+
+    Does not touch the filesystem. The tree is built in one pass from paths
+    that were already selected (e.g. from the scan index). Directories are
+    listed before files, both sorted case-insensitively.
 
-    for i, entry in enumerate(entries):
-        connector = ELBOW if i == len(entries) - 1 else TEE
-        line = f"{prefix}{connector} {entry.name}"
+    To keep the tree bounded on huge projects:
+    - Entries deeper than `max_depth` are not stored, only counted.
+    - Directories with more than `max_entries` entries show the first ones only.
+    Hidden files are summarised in a line like `… 3,412 more files`.
 
-        if entry.is_dir():
-            extension = SPACE_PREFIX if i == len(entries) - 1 else PIPE_PREFIX
-            subtree = build_tree(entry, include, exclude, prefix + extension)
-            if len(subtree) > 0:  # only append if not empty
-                lines.append(line)
-                lines.extend(subtree)
+    Args:
+        name (str): Name of the root node (usually the project folder name).
+        paths (list[str]): Relative POSIX file paths to show.
+        max_depth (int, optional): Deepest level shown (root children are
+            level 1). Defaults to None (no cap).
+        max_entries (int, optional): Max entries shown per directory.
+            Defaults to None (no cap).
+
+    Returns:
+        list[str]: List of formatted strings representing the directory tree.
+    """
+    root = _TreeNode()
+    for p in paths:
+        node = root
+        node.total += 1
+        *dirs, file_name = p.split("/")
+        for depth, d in enumerate(dirs, 1):
+            if max_depth is not None and depth > max_depth:
+                node.hidden += 1
+                break
+            node = node.dirs.setdefault(d, _TreeNode())
+            node.total += 1
         else:
-            lines.append(line)
+            if max_depth is not None and len(dirs) + 1 > max_depth:
+                node.hidden += 1
+            else:
+                node.files.append(file_name)
+
+    lines = [name]
+
+    def _render(node: _TreeNode, prefix: str):
+        entries = [(d, node.dirs[d]) for d in sorted(node.dirs, key=str.lower)] + [
+            (f, None) for f in sorted(node.files, key=str.lower)
+        ]
+
+        hidden = node.hidden
+        if max_entries is not None and len(entries) > max_entries:
+            for _, child in entries[max_entries:]:
+                hidden += child.total if child is not None else 1
+            entries = entries[:max_entries]
+
+        for i, (entry_name, child) in enumerate(entries):
+            last = i == len(entries) - 1 and not hidden
+            lines.append(f"{prefix}{TREE_ELBOW if last else TREE_TEE} {entry_name}")
+            if child is not None:
+                _render(
+                    child, prefix + (TREE_SPACE_PREFIX if last else TREE_PIPE_PREFIX)
+                )
+
+        if hidden:
+            lines.append(f"{prefix}{TREE_ELBOW} … {hidden:,} more files")
+
+    _render(root, "")
 
     return lines
 
@@ -176,22 +246,34 @@ def format_size(size: int) -> str:
     return f"{size} B"
 
 
-def get_task_choices() -> list[str]:
+def get_task_choices(path: Optional[Path] = None) -> list[str]:
     """
     Retrieve available task keys from config.
 
-    - Reads tasks from `snibconfig.toml` if available.
+    - Reads tasks from `snibconfig.toml` in `path` if available.
     - Falls back to default config otherwise.
 
+    Called only when a task is completed or validated, never while the CLI
+    is built, so `--help` does not parse the config.
+
+    Args:
+        path (Path, optional): Project directory. Defaults to the current
+            working directory at call time.
+
     Returns:
-        list[str]: Available task keys (for CLI autocompletion).
+        list[str]: Available task keys.
     """
-    config = load_config()
+    if path is None:
+        path = Path.cwd()
+    try:
+        config = load_config(Path(path) / SNIB_CONFIG_FILE)
+    except (OSError, ValueError):  # unreadable config, `snib scan` reports it
+        config = None
     # TODO: validate config here!!!
     if not config:
         config = SNIB_DEFAULT_CONFIG
     task_dict = config.get("instruction", {}).get("task_dict", {})
-    return Choice(list(task_dict.keys()))
+    return list(task_dict.keys())
 
 
 def get_preset_choices() -> list[str]:
@@ -202,13 +284,43 @@ def get_preset_choices() -> list[str]:
     - Strips file extensions.
 
     Returns:
-        list[str]: Preset names without extension (for CLI autocompletion).
+        list[str]: Preset names without extension.
     """
     try:
         files = resources.files(presets).iterdir()
-        return Choice(
-            [f.name.rsplit(".", 1)[0] for f in files if f.name.endswith(".toml")]
-        )
+        return [f.name.rsplit(".", 1)[0] for f in files if f.name.endswith(".toml")]
     except FileNotFoundError:
         # if package is not installed right
         return []
+
+
+def complete_task(ctx: typer.Context, incomplete: str) -> list[str]:
+    """
+    Shell completion for `snib scan --task`.
+
+    Uses the tasks of the project given by `--path` (if already typed).
+
+    Args:
+        ctx (typer.Context): Context of the command being completed.
+        incomplete (str): Part of the value typed so far.
+
+    Returns:
+        list[str]: Matching task keys.
+    """
+    path = ctx.params.get("path") or Path.cwd()
+    return [
+        t for t in get_task_choices(path) if t.lower().startswith(incomplete.lower())
+    ]
+
+
+def complete_preset(incomplete: str) -> list[str]:
+    """
+    Shell completion for `snib init --preset`.
+
+    Args:
+        incomplete (str): Part of the value typed so far.
+
+    Returns:
+        list[str]: Matching preset names.
+    """
+    return [p for p in get_preset_choices() if p.startswith(incomplete)]
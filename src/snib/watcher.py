@@ -0,0 +1,272 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable, Optional
+
+from .logger import logger
+from .patterns import PatternSet
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+)
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len (name follows)
+
+ALL_CHANGED = ""  # reported when events were lost, means "rescan everything"
+
+
+class Watcher(ABC):
+    """
+    Interface for file change sources used by `snib watch`.
+
+    Attributes:
+        name (str): Backend name shown to the user.
+    """
+
+    name = "watcher"
+
+    @abstractmethod
+    def read(self, timeout: Optional[float]) -> set[str]:
+        """
+        Wait for changes.
+
+        Args:
+            timeout (float | None): Seconds to wait, None blocks until something
+                changes.
+
+        Returns:
+            set[str]: Changed relative POSIX paths (empty on timeout,
+                `ALL_CHANGED` if events were lost).
+        """
+
+    def close(self):
+        """Release the resources of the watcher."""
+
+
+class InotifyWatcher(Watcher):
+    """
+    Linux inotify watcher through `ctypes` (no extra dependency).
+
+    Every directory below the root that is not excluded gets a watch, new
+    directories are added as they appear.
+
+    Attributes:
+        root (Path): Watched project root.
+        exclude (PatternSet): Directories that are not watched.
+    """
+
+    name = "inotify"
+
+    def __init__(self, root: Path, exclude: PatternSet):
+        """
+        Start watching a project.
+
+        Args:
+            root (Path): Project root.
+            exclude (PatternSet): Excluded paths (not watched).
+
+        Raises:
+            OSError: If inotify is not available or the watch limit is reached.
+        """
+        self.root = Path(root)
+        self.exclude = exclude
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs = {}  # watch descriptor -> relative directory
+        try:
+            self._watch_tree("")
+        except OSError:
+            self.close()
+            raise
+
+    def _watch_tree(self, rel_dir: str):
+        stack = [rel_dir]
+        while stack:
+            rel_dir = stack.pop()
+            wd = self._add_watch(self._fd, os.fsencode(self.root / rel_dir), WATCH_MASK)
+            if wd < 0:
+                errno = ctypes.get_errno()
+                if errno == 28:  # ENOSPC: max_user_watches reached
+                    raise OSError(errno, "inotify watch limit reached")
+                continue  # removed in the meantime
+            self._dirs[wd] = rel_dir
+            try:
+                with os.scandir(self.root / rel_dir) as it:
+                    for entry in it:
+                        rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                        if entry.is_dir(
+                            follow_symlinks=False
+                        ) and not self.exclude.match(rel_path, entry.name):
+                            stack.append(rel_path)
+            except OSError:
+                continue
+
+    def read(self, timeout: Optional[float]) -> set[str]:
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self._fd, 256 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changes = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                changes.add(ALL_CHANGED)
+                continue
+            if mask & IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            rel_dir = self._dirs.get(wd)
+            if rel_dir is None:
+                continue
+            rel_path = f"{rel_dir}/{name}" if rel_dir and name else name or rel_dir
+            if name and self.exclude.match(rel_path, name):
+                continue
+            changes.add(rel_path)
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                self._watch_tree(rel_path)
+        return changes
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingWatcher(Watcher):
+    """
+    Portable watcher that compares snapshots of the project.
+
+    Attributes:
+        snapshot (Callable[[], dict[str, tuple]]): Returns a state per relative
+            path, e.g. `(size, mtime_ns)` from the scan index.
+        interval (float): Seconds between snapshots.
+    """
+
+    name = "polling"
+
+    def __init__(self, snapshot: Callable[[], dict[str, tuple]], interval: float = 1.0):
+        """
+        Take the first snapshot.
+
+        Args:
+            snapshot (Callable[[], dict[str, tuple]]): Snapshot function.
+            interval (float, optional): Seconds between snapshots. Defaults to 1.0.
+        """
+        self.snapshot = snapshot
+        self.interval = max(interval, 0.01)
+        self._state = snapshot()
+
+    def read(self, timeout: Optional[float]) -> set[str]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.interval
+            if deadline is not None:
+                wait = min(wait, max(deadline - time.monotonic(), 0))
+            time.sleep(wait)
+            state = self.snapshot()
+            changes = {
+                path
+                for path in state.keys() | self._state.keys()
+                if state.get(path) != self._state.get(path)
+            }
+            self._state = state
+            if changes or (deadline is not None and time.monotonic() >= deadline):
+                return changes
+
+
+def open_watcher(
+    root: Path,
+    exclude: PatternSet,
+    snapshot: Callable[[], dict[str, tuple]],
+    backend: str = "auto",
+    poll_interval: float = 1.0,
+) -> Watcher:
+    """
+    Create the watcher for a project.
+
+    `auto` uses inotify on Linux and falls back to polling elsewhere or if
+    inotify cannot be set up (e.g. the watch limit is reached).
+
+    Args:
+        root (Path): Project root.
+        exclude (PatternSet): Excluded paths (not watched).
+        snapshot (Callable[[], dict[str, tuple]]): Snapshot function for polling.
+        backend (str, optional): `auto`, `inotify` or `poll`. Defaults to "auto".
+        poll_interval (float, optional): Seconds between snapshots when polling.
+            Defaults to 1.0.
+
+    Returns:
+        Watcher: The watcher.
+    """
+    if backend != "poll" and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(root, exclude)
+        except (OSError, AttributeError) as e:  # AttributeError: no inotify in libc
+            logger.warning(f"inotify is not available ({e}), polling instead.")
+    elif backend == "inotify":
+        logger.warning("inotify is only available on Linux, polling instead.")
+    return PollingWatcher(snapshot, poll_interval)
+
+
+def wait_for_changes(watcher: Watcher, debounce: float) -> set[str]:
+    """
+    Block until something changes, then wait until it stays quiet.
+
+    A burst of events (a save touching several files, a `git checkout`) is
+    collected into one update: the wait ends once no change arrived for
+    `debounce` seconds.
+
+    Args:
+        watcher (Watcher): Change source.
+        debounce (float): Quiet period in seconds.
+
+    Returns:
+        set[str]: All changed relative paths of the burst.
+    """
+    changes = set()
+    while not changes:
+        changes |= watcher.read(None)
+    while True:
+        more = watcher.read(debounce)
+        if not more:
+            return changes
+        changes |= more
@@ -1,10 +1,121 @@
+import gzip
+import hashlib
+import json
+import lzma
+import mmap
+import os
+import re
 from pathlib import Path
+from typing import BinaryIO, Callable, Iterable, Optional, Union
 
 import typer
 
+from .config import SNIB_CACHE_DIR, SNIB_PACK_FILE, SNIB_PACK_INDEX
 from .logger import logger
 from .utils import format_size
 
+PACK_SUFFIXES = {"none": "", "gzip": ".gz", "lzma": ".xz"}
+_PACK_OPENERS = {"gzip": gzip.open, "lzma": lzma.open}
+# "#[FILE] path" lines of formatted file sections (header notes removed)
+_FILE_LINE = re.compile(
+    rb"^#\[FILE\] (.*?)(?: \((?:truncated|continued from|identical to) [^\n]*\))?$",
+    re.M,
+)
+
+
+def _chunk_files(body: bytes, previous: Optional[str]) -> list[str]:
+    # source files in a chunk, a chunk that does not start with a section
+    # continues the last file of the previous chunk
+    files = [m.group(1).decode("utf-8", "replace") for m in _FILE_LINE.finditer(body)]
+    if previous and body and not body.startswith(b"#["):
+        files.insert(0, previous)
+    return list(dict.fromkeys(files))
+
+
+def stream_chunks(
+    chunks: Iterable[Union[str, bytes]], stream: BinaryIO, framing: str = "nul"
+) -> int:
+    """
+    Write chunks to a binary stream (e.g. stdout) as soon as they are produced.
+
+    Framings:
+    - `nul`: every chunk (UTF-8) is followed by a NUL byte.
+    - `jsonl`: one JSON object per line with `index`, `files` (source files
+      in the chunk) and `text`.
+
+    The stream is flushed after every chunk, so a consumer can start while
+    the scan is still running. A closed pipe stops the stream quietly.
+
+    Args:
+        chunks (Iterable[str | bytes]): Text chunks or UTF-8 bytes.
+        stream (BinaryIO): Binary output stream, e.g. `sys.stdout.buffer`.
+        framing (str, optional): `nul` or `jsonl`. Defaults to "nul".
+
+    Returns:
+        int: Number of chunks written.
+    """
+    count = 0
+    previous = None  # last source file of the previous chunk
+    try:
+        for count, chunk in enumerate(chunks, 1):
+            body = chunk if isinstance(chunk, bytes) else chunk.encode("utf-8")
+            if framing == "jsonl":
+                files = _chunk_files(body, previous)
+                previous = files[-1] if files else None
+                record = {"index": count, "files": files, "text": body.decode("utf-8")}
+                stream.writelines((json.dumps(record).encode("ascii"), b"\n"))
+            else:
+                stream.writelines((body, b"\0"))
+            stream.flush()
+    except BrokenPipeError:
+        logger.warning(f"Output stream closed after {count - 1} chunk(s).")
+        return count - 1
+    logger.notice(f"Streamed {count} chunk(s) ({framing})")
+    return count
+
+
+def read_pack_chunk(output_dir: Path, n: int) -> bytes:
+    """
+    Fetch chunk `n` from a prompt pack without reading the others.
+
+    Uncompressed packs are memory-mapped, compressed packs are decompressed
+    up to the end of the chunk.
+
+    Args:
+        output_dir (Path): Directory with the pack and its JSON index.
+        n (int): Chunk number (1-based).
+
+    Returns:
+        bytes: The chunk, header included (as in `prompt_N.txt`).
+
+    Raises:
+        IndexError: If the pack has no chunk `n`.
+        ValueError: If the chunk does not match its hash in the index.
+    """
+    output_dir = Path(output_dir)
+    index = json.loads((output_dir / SNIB_PACK_INDEX).read_text(encoding="utf-8"))
+    if not 1 <= n <= len(index["chunks"]):
+        raise IndexError(f"Pack has no chunk {n}")
+    record = index["chunks"][n - 1]
+    offset, length = record["offset"], record["length"]
+    pack_path = output_dir / index["pack"]
+
+    opener = _PACK_OPENERS.get(index["compression"])
+    if opener is None:
+        with open(pack_path, "rb") as f:
+            if length == 0:
+                return b""
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                data = mm[offset : offset + length]
+    else:
+        with opener(pack_path, "rb") as f:
+            f.seek(offset)
+            data = f.read(length)
+
+    if hashlib.sha256(data).hexdigest() != record["sha256"]:
+        raise ValueError(f"Chunk {n} does not match its hash in {SNIB_PACK_INDEX}")
+    return data
+
 
 class Writer:
     """
@@ -13,7 +124,9 @@ class Writer:
     This class is responsible for:
     - Ensuring the output directory exists.
     - Writing prompt chunks into sequentially numbered `.txt` files.
-    - Optionally clearing existing prompt files before writing.
+    - Updating existing prompt files incrementally: unchanged files are left
+      untouched, changed files are replaced atomically and stale trailing
+      files are deleted.
     """
 
     def __init__(self, output_dir: str):
@@ -27,20 +140,24 @@ class Writer:
         # TODO: fix this section
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        # header + content hash of every prompt file written by the last run
+        self.manifest_path = self.output_dir / SNIB_CACHE_DIR / "manifest.json"
 
-    def write_chunks(self, chunks: list[str], force: bool = False) -> list[Path]:
+    def write_chunks(
+        self, chunks: list[Union[str, bytes]], force: bool = False
+    ) -> list[Path]:
         """
         Write prompt chunks to text files.
 
         Behavior:
-        - Existing files named `prompt_*.txt` are cleared if `force=True`.
         - If `force=False` and prompt files already exist, the user is asked
-          for confirmation before overwriting.
+          for confirmation before updating them.
         - Files are written as `prompt_1.txt`, `prompt_2.txt`, etc.
         - Each file contains one chunk of text.
+        - Only files whose content changed are rewritten (see `write_stream`).
 
         Args:
-            chunks (list[str]): List of text chunks to be written.
+            chunks (list[str | bytes]): Text chunks (or UTF-8 bytes) to be written.
             force (bool, optional): Overwrite existing files without confirmation.
                 Defaults to False.
 
@@ -53,32 +170,11 @@ class Writer:
 
         logger.debug(f"Begin writing {len(chunks)} chunk(s) to {self.output_dir}")
 
-        # Clear existing prompt files if needed
-        prompt_files = list(self.output_dir.glob("prompt_*.txt"))
-        if prompt_files:
-            count = len(prompt_files)
-            if force:
-                self.clear_output()
-                logger.notice(
-                    f"Cleared {count} existing prompt file(s) in '{self.output_dir}'."
-                )
-            else:
-                confirm = logger.confirm(
-                    f"'{self.output_dir}' already contains {count} prompt file(s). Clear them?",
-                    default=False,
-                )
-                if not confirm:
-                    logger.info("Aborted.")
-                    raise typer.Exit()
+        self._confirm_existing(force)
 
-                self.clear_output()
-                logger.notice(
-                    f"Cleared {count} existing prompt file(s) in '{self.output_dir}'."
-                )
-
-        txt_files = []
-
-        total_size = sum(len(c.encode("utf-8")) for c in chunks)
+        # encode once, the buffers are written as they are
+        chunks = [c if isinstance(c, bytes) else c.encode("utf-8") for c in chunks]
+        total_size = sum(map(len, chunks))
         size_str = format_size(total_size)
 
         # Ask before writing
@@ -91,19 +187,430 @@ class Writer:
                 logger.info("Aborted.")
                 raise typer.Exit()
 
+        return self._sync(chunks, lambda i, total, width: "", total_width=1)
+
+    def write_stream(
+        self,
+        chunks: Iterable[Union[str, bytes]],
+        header: Callable[[int, int, int], str],
+        total_width: int = 1,
+        force: bool = False,
+    ) -> list[Path]:
+        """
+        Write prompt chunks to text files as soon as they are produced.
+
+        The number of files is only known once the last chunk has been
+        produced, so headers (`header(i, total, width)`) are written with a
+        placeholder total first and patched in place at the end:
+        - The placeholder is the largest `total_width`-digit number; as long as
+          the real total fits into `total_width` digits, the final header has
+          the same length and only the header bytes of each file are rewritten.
+        - If the total needs more digits, the affected files are rewritten.
+        - A single prompt file gets no header (`header(1, 1, width)`).
+
+        Chunks are streamed into temporary files next to the prompt files,
+        which replace them atomically (`os.replace`) only if the content
+        changed. A manifest in `.snib-cache` records the header and content
+        hash of every prompt file, so chunks that did not change since the
+        last run are not even written to a temporary file.
+
+        Args:
+            chunks (Iterable[str | bytes]): Text chunks (or UTF-8 bytes in bytes
+                mode), e.g. from `Chunker.iter_chunks`.
+            header (Callable[[int, int, int], str]): Builds the header text for
+                file `i` of `total`, with `total` padded to `width` digits.
+            total_width (int, optional): Digits reserved for the total.
+                Defaults to 1.
+            force (bool, optional): Overwrite existing files without confirmation.
+                Defaults to False.
+
+        Returns:
+            list[Path]: List of paths to the prompt files.
+
+        Raises:
+            typer.Exit: If the user aborts when prompted for confirmation.
+        """
+        logger.debug(f"Begin streaming chunks to {self.output_dir}")
+
+        self._confirm_existing(force)
+
+        # Ask before writing (count and size are not known yet)
+        if not force:
+            confirm = logger.confirm(
+                f"Do you want to write prompt file(s) to '{self.output_dir}'?",
+                default=False,
+            )
+            if not confirm:
+                logger.info("Aborted.")
+                raise typer.Exit()
+
+        return self._sync(chunks, header, total_width)
+
+    def write_pack(
+        self,
+        chunks: Iterable[Union[str, bytes]],
+        header: Callable[[int, int, int], str],
+        total_width: int = 1,
+        force: bool = False,
+        compression: str = "none",
+    ) -> Path:
+        """
+        Write all prompt chunks into a single pack file with a JSON index.
+
+        Alternative to one `prompt_N.txt` per chunk for slow (network) file
+        systems and upload tooling: chunks are concatenated into
+        `prompts.pack` (optionally gzip/lzma-compressed to `.gz`/`.xz`), and
+        `prompts.index.json` records for every chunk its byte offset and
+        length in the uncompressed pack, its sha256 and the source files it
+        contains. Chunk N can be fetched directly (see `read_pack_chunk`).
+
+        Chunks are streamed into a temporary file with placeholder headers
+        that are patched at the end (same as `write_stream`), then the pack
+        is hashed (and compressed) in one sequential pass and moved into
+        place atomically.
+
+        Args:
+            chunks (Iterable[str | bytes]): Text chunks or UTF-8 bytes.
+            header (Callable[[int, int, int], str]): Builds the header text for
+                chunk `i` of `total`, with `total` padded to `width` digits.
+            total_width (int, optional): Digits reserved for the total.
+                Defaults to 1.
+            force (bool, optional): Overwrite an existing pack without
+                confirmation. Defaults to False.
+            compression (str, optional): `none`, `gzip` or `lzma`.
+                Defaults to "none".
+
+        Returns:
+            Path: Path to the pack file.
+
+        Raises:
+            typer.Exit: If the user aborts when prompted for confirmation.
+        """
+        logger.debug(f"Begin streaming chunks into a pack in {self.output_dir}")
+
+        if not force:
+            confirm = logger.confirm(
+                f"Do you want to write a prompt pack to '{self.output_dir}'?",
+                default=False,
+            )
+            if not confirm:
+                logger.info("Aborted.")
+                raise typer.Exit()
+
+        placeholder = 10**total_width - 1
+        tmp = self.output_dir / f"{SNIB_PACK_FILE}.tmp"
+        records = []  # [offset, header length, body length, files] per chunk
+        offset = 0
+        previous = None  # last source file of the previous chunk
+        with open(tmp, "wb") as f:
+            for i, chunk in enumerate(chunks, 1):
+                body = chunk if isinstance(chunk, bytes) else chunk.encode("utf-8")
+                head = header(i, placeholder, total_width).encode("utf-8")
+                f.writelines((head, body))
+                files = _chunk_files(body, previous)
+                previous = files[-1] if files else None
+                records.append([offset, len(head), len(body), files])
+                offset += len(head) + len(body)
+
+        heads = [
+            header(i, len(records), total_width).encode("utf-8")
+            for i in range(1, len(records) + 1)
+        ]
+        self._patch_pack(tmp, records, heads)
+
+        pack_path = self.output_dir / (SNIB_PACK_FILE + PACK_SUFFIXES[compression])
+        index = []
+        opener = _PACK_OPENERS.get(compression)
+        out_tmp = pack_path.with_name(pack_path.name + ".tmp")
+        out = opener(out_tmp, "wb") if opener else None
+        try:
+            with open(tmp, "rb") as f:
+                for i, (offset, head_len, body_len, files) in enumerate(records, 1):
+                    data = f.read(head_len + body_len)
+                    index.append(
+                        {
+                            "index": i,
+                            "offset": offset,
+                            "length": len(data),
+                            "sha256": hashlib.sha256(data).hexdigest(),
+                            "files": files,
+                        }
+                    )
+                    if out:
+                        out.write(data)
+        finally:
+            if out:
+                out.close()
+        if out:
+            os.replace(out_tmp, pack_path)
+            tmp.unlink()
+        else:
+            os.replace(tmp, pack_path)
+
+        # a pack with another compression would no longer match the index
+        for suffix in PACK_SUFFIXES.values():
+            stale = self.output_dir / (SNIB_PACK_FILE + suffix)
+            if stale != pack_path and stale.is_file():
+                stale.unlink()
+
+        self._replace(
+            self.output_dir / SNIB_PACK_INDEX,
+            json.dumps(
+                {
+                    "version": 1,
+                    "pack": pack_path.name,
+                    "compression": compression,
+                    "chunks": index,
+                },
+                indent=2,
+            ).encode("utf-8"),
+        )
+
+        size = sum(record["length"] for record in index)
+        logger.notice(
+            f"Wrote {len(index)} chunk(s) to {pack_path.name} "
+            f"(total size {format_size(size)}, on disk {format_size(pack_path.stat().st_size)}) in {self.output_dir}"
+        )
+        return pack_path
+
+    @staticmethod
+    def _patch_pack(tmp: Path, records: list[list], heads: list[bytes]):
+        """
+        Replace the placeholder headers in a streamed pack with the final ones.
+
+        Headers of the same length are patched in place. If the total needs
+        more digits than reserved, the pack is copied once with the new
+        headers and the offsets in `records` are updated.
+
+        Args:
+            tmp (Path): Streamed pack file.
+            records (list[list]): `[offset, header length, body length, files]`
+                per chunk, updated in place.
+            heads (list[bytes]): Final header of every chunk.
+        """
+        if all(len(head) == record[1] for head, record in zip(heads, records)):
+            with open(tmp, "r+b") as f:
+                for head, (offset, *_) in zip(heads, records):
+                    f.seek(offset)
+                    f.write(head)
+            return
+
+        logger.warning(
+            f"{len(heads)} chunks exceed the reserved header digits; longer headers may exceed the chunk size"
+        )
+        copy = tmp.with_name(tmp.name + "2")
+        offset = 0
+        with open(tmp, "rb") as src, open(copy, "wb") as dst:
+            for head, record in zip(heads, records):
+                src.seek(record[0] + record[1])
+                dst.writelines((head, src.read(record[2])))
+                record[0], record[1] = offset, len(head)
+                offset += len(head) + record[2]
+        os.replace(copy, tmp)
+
+    def _sync(
+        self,
+        chunks: Iterable[Union[str, bytes]],
+        header: Callable[[int, int, int], str],
+        total_width: int,
+    ) -> list[Path]:
+        """
+        Bring the prompt files in line with the chunks, touching as few as possible.
+
+        Args:
+            chunks (Iterable[str | bytes]): Text chunks or UTF-8 bytes.
+            header (Callable[[int, int, int], str]): Header builder.
+            total_width (int): Digits reserved for the total.
+
+        Returns:
+            list[Path]: List of paths to the prompt files.
+        """
+        for tmp in self.output_dir.glob("prompt_*.txt.tmp"):  # left by an abort
+            tmp.unlink()
+
+        manifest = self._load_manifest()
+        placeholder = 10**total_width - 1
+        pending = []  # (index, path, temporary file or None, content hash)
+
         for i, chunk in enumerate(chunks, 1):
-            filename = self.output_dir / f"prompt_{i}.txt"
-            filename.write_text(chunk, encoding="utf-8")
-            txt_files.append(filename)
+            body = chunk if isinstance(chunk, bytes) else chunk.encode("utf-8")
+            digest = hashlib.sha256(body).hexdigest()
+            path = self.output_dir / f"prompt_{i}.txt"
+            entry = manifest.get(path.name)
+            if self._is_recorded(path, entry) and entry["sha256"] == digest:
+                pending.append((i, path, None, digest))  # header may still change
+                continue
+            tmp = path.with_name(path.name + ".tmp")
+            with open(tmp, "wb") as f:  # no concatenated copy of the chunk
+                f.writelines(
+                    (header(i, placeholder, total_width).encode("utf-8"), body)
+                )
+            pending.append((i, path, tmp, digest))
+
+        total = len(pending)
+        self._patch_headers(
+            [(i, tmp) for i, _, tmp, _ in pending if tmp],
+            header,
+            placeholder,
+            total,
+            total_width,
+        )
+
+        written = unchanged = total_size = 0
+        new_manifest = {}
+        for i, path, tmp, digest in pending:
+            text = header(i, total, total_width)
+            if tmp is None:
+                entry = manifest[path.name]
+                if entry["header"] == text:
+                    unchanged += 1
+                else:
+                    # same content, new header: reuse the content of the file
+                    old = len(entry["header"].encode("utf-8"))
+                    self._replace(path, text.encode("utf-8") + path.read_bytes()[old:])
+                    written += 1
+            elif self._same_file(path, tmp):
+                tmp.unlink()
+                unchanged += 1
+            else:
+                os.replace(tmp, path)
+                written += 1
+            stat = path.stat()
+            total_size += stat.st_size
+            new_manifest[path.name] = {
+                "header": text,
+                "sha256": digest,
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+            }
+
+        removed = 0
+        for path in self.output_dir.glob("prompt_*.txt"):
+            index = path.stem[len("prompt_") :]
+            if index.isdigit() and int(index) > total and path.is_file():
+                path.unlink()
+                removed += 1
 
-        logger.notice(f"Wrote {len(txt_files)} text file(s) to {self.output_dir}")
-        return txt_files
+        self._save_manifest(new_manifest)
+
+        logger.notice(
+            f"Wrote {written} of {total} text file(s), {unchanged} unchanged, "
+            f"{removed} stale removed (total size {format_size(total_size)}) in {self.output_dir}"
+        )
+        return [path for _, path, _, _ in pending]
+
+    @staticmethod
+    def _patch_headers(
+        files: list[tuple[int, Path]],
+        header: Callable[[int, int, int], str],
+        placeholder: int,
+        total: int,
+        total_width: int,
+    ):
+        """
+        Replace the placeholder totals in the headers of written files.
+
+        Args:
+            files (list[tuple[int, Path]]): Prompt number and file to patch.
+            header (Callable[[int, int, int], str]): Header builder.
+            placeholder (int): Total the files were written with.
+            total (int): Real number of prompt files.
+            total_width (int): Digits reserved for the total.
+        """
+        rewritten = 0
+        for i, path in files:
+            old = header(i, placeholder, total_width).encode("utf-8")
+            new = header(i, total, total_width).encode("utf-8")
+            if old == new:
+                continue
+            if len(old) == len(new):
+                with open(path, "r+b") as f:
+                    f.write(new)
+            else:
+                path.write_bytes(new + path.read_bytes()[len(old) :])
+                rewritten += 1
+        if rewritten and total > 1:
+            logger.warning(
+                f"{total} prompt files exceed {total_width} reserved digit(s); rewrote {rewritten} file(s) with longer headers, they may exceed the chunk size"
+            )
+
+    @staticmethod
+    def _is_recorded(path: Path, entry: Optional[dict]) -> bool:
+        # the file is still the one the manifest entry was made for
+        if not isinstance(entry, dict) or not isinstance(entry.get("header"), str):
+            return False
+        try:
+            stat = path.stat()
+        except OSError:
+            return False
+        return (
+            "sha256" in entry
+            and stat.st_size == entry.get("size")
+            and stat.st_mtime_ns == entry.get("mtime_ns")
+        )
+
+    @staticmethod
+    def _same_file(path: Path, tmp: Path) -> bool:
+        # compare a new file with the existing one (size first, then content)
+        try:
+            if path.stat().st_size != tmp.stat().st_size:
+                return False
+            return path.read_bytes() == tmp.read_bytes()
+        except OSError:
+            return False
+
+    @staticmethod
+    def _replace(path: Path, data: bytes):
+        # atomic write: readers see either the old or the new file
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    def _load_manifest(self) -> dict:
+        """
+        Load the manifest of the last run.
+
+        Returns:
+            dict: File name -> `header`, `sha256`, `size` and `mtime_ns`
+                (empty if there is no readable manifest).
+        """
+        try:
+            manifest = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        return manifest if isinstance(manifest, dict) else {}
+
+    def _save_manifest(self, manifest: dict):
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        self._replace(self.manifest_path, json.dumps(manifest).encode("utf-8"))
+
+    def _confirm_existing(self, force: bool):
+        """
+        Ask before updating existing prompt files unless `force` is set.
+
+        Files are not deleted up front: unchanged files are kept, changed ones
+        replaced and stale ones removed after writing.
+
+        Args:
+            force (bool): Update without confirmation.
+
+        Raises:
+            typer.Exit: If the user aborts when prompted for confirmation.
+        """
+        prompt_files = list(self.output_dir.glob("prompt_*.txt"))
+        if prompt_files and not force:
+            confirm = logger.confirm(
+                f"'{self.output_dir}' already contains {len(prompt_files)} prompt file(s). Update them?",
+                default=False,
+            )
+            if not confirm:
+                logger.info("Aborted.")
+                raise typer.Exit()
 
     def clear_output(self):
         """
         Delete all existing prompt files (`prompt_*.txt`) in the output directory.
 
-        - This is typically called before writing new chunks.
         - Only files matching the pattern `prompt_*.txt` are removed.
         """
         for file_path in self.output_dir.glob("prompt_*.txt"):
@@ -0,0 +1,30 @@
+import pytest
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "benchmark: wall-clock comparisons (deselect with -m 'not benchmark')",
+    )
+
+
+def chunk_by_lines(sections, chunk_size, header_size=100):
+    # line-by-line string concatenation (the chunker before offsets/part buffers)
+    chunks = []
+    current_chunk = ""
+    for section in sections:
+        for line in section.splitlines(keepends=True):
+            if len(current_chunk) + len(line) + header_size > chunk_size:
+                if current_chunk:
+                    chunks.append(current_chunk)
+                current_chunk = ""
+            current_chunk += line
+    if current_chunk:
+        chunks.append(current_chunk)
+    return chunks
+
+
+@pytest.fixture
+def reference_chunk():
+    """Reference chunker the `Chunker` is compared against."""
+    return chunk_by_lines
@@ -0,0 +1,138 @@
+import os
+import sqlite3
+import time
+
+import pytest
+
+from snib.cache import ScanCache, content_digest
+from snib.models import IndexEntry
+from snib.reader import FileReader
+from snib.tokenizer import TokenCounter, Tokenizer
+
+OLD_NS = (time.time_ns() - 3600 * 10**9) // 10**9 * 10**9  # an hour ago
+
+
+def _entries(root):
+    entries = []
+    for path in sorted(root.rglob("*.txt")):
+        os.utime(path, ns=(OLD_NS, OLD_NS))  # older than the racy window
+        stat = path.stat()
+        entries.append(
+            IndexEntry(
+                path=path.relative_to(root).as_posix(),
+                is_dir=False,
+                size=stat.st_size,
+                mtime_ns=stat.st_mtime_ns,
+                inode=stat.st_ino,
+            )
+        )
+    return entries
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / "project"
+    root.mkdir()
+    for i in range(5):
+        (root / f"f{i}.txt").write_text(f"file {i}\n" * (i + 1))
+    return root
+
+
+def _read(root, cache_path, workers=1, **kw):
+    cache = ScanCache(cache_path)
+    reader = FileReader(root, workers=workers, cache=cache, **kw)
+    contents = dict((e.path, c) for e, c in reader.read_all(_entries(root)))
+    cache.close()
+    return cache, contents
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_unchanged_files_are_not_opened(project, tmp_path, monkeypatch, workers):
+    cache_path = tmp_path / "scan.sqlite"
+    first, contents = _read(project, cache_path, workers)
+    assert (first.hits, first.misses) == (0, 5)
+
+    def fail(self, entry):
+        raise AssertionError(f"{entry.path} was opened")
+
+    monkeypatch.setattr(FileReader, "_read", fail)
+    second, cached = _read(project, cache_path, workers)
+    assert (second.hits, second.misses) == (5, 0)
+    assert second.hit_ratio == 1.0
+    assert cached == contents
+
+
+def test_changed_file_is_read_again(project, tmp_path):
+    cache_path = tmp_path / "scan.sqlite"
+    _read(project, cache_path)
+    (project / "f2.txt").write_text("changed\n")
+
+    cache, contents = _read(project, cache_path)
+    assert (cache.hits, cache.misses) == (4, 1)
+    assert contents["f2.txt"] == "changed\n"
+
+
+def test_reader_settings_are_part_of_the_key(project, tmp_path):
+    cache_path = tmp_path / "scan.sqlite"
+    _read(project, cache_path)
+
+    cache, contents = _read(project, cache_path, as_bytes=True)
+    assert cache.hits == 0
+    assert contents["f0.txt"] == b"file 0\n"
+
+
+def test_recently_modified_files_are_not_stored(project, tmp_path):
+    cache = ScanCache(tmp_path / "scan.sqlite")
+    entry = IndexEntry("f0.txt", False, size=7, mtime_ns=time.time_ns())
+    cache.put(entry, "0:0", "file 0\n")
+    assert cache.get(entry, "0:0") == (False, None)
+    cache.close()
+
+
+def test_eviction_by_size_and_age(tmp_path):
+    cache = ScanCache(tmp_path / "scan.sqlite", max_size_mb=1)
+    for i in range(3):
+        entry = IndexEntry(f"big{i}.txt", False, size=600_000, mtime_ns=OLD_NS)
+        cache.put(entry, "0:0", "x" * 600_000)
+    cache._db.execute("UPDATE files SET used = 0 WHERE path = 'big0.txt'")
+    cache._db.execute("UPDATE files SET used = 1 WHERE path = 'big1.txt'")
+    cache.close()
+
+    db = sqlite3.connect(tmp_path / "scan.sqlite")
+    assert [r[0] for r in db.execute("SELECT path FROM files")] == ["big2.txt"]
+    db.close()
+
+
+def test_unreadable_database_is_replaced(project, tmp_path):
+    cache_path = tmp_path / "scan.sqlite"
+    cache_path.write_bytes(b"not a database" * 100)
+
+    cache, contents = _read(project, cache_path)
+    assert cache.misses == 5
+    assert contents["f0.txt"] == "file 0\n"
+
+
+def test_token_counts_persist(tmp_path):
+    class CountingTokenizer(Tokenizer):
+        name = "counting"
+        calls = 0
+
+        def count(self, text, path=None):
+            CountingTokenizer.calls += 1
+            return len(text.split())
+
+    for _ in range(2):
+        cache = ScanCache(tmp_path / "scan.sqlite")
+        counter = TokenCounter(CountingTokenizer(), store=cache)
+        assert counter.count("a b c") == 3
+        counter.save()
+        cache.close()
+
+    assert CountingTokenizer.calls == 1
+
+
+def test_content_digest_ignores_type():
+    assert content_digest("café") == content_digest("café".encode("utf-8"))
+
+
+# PASSED
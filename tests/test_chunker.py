@@ -1,6 +1,11 @@
+import random
+import re
+
 import pytest
 
 from snib.chunker import Chunker
+from snib.formatter import Formatter
+from snib.tokenizer import HeuristicTokenizer
 
 
 def test_chunker_splits_correctly():
@@ -22,4 +27,256 @@ def test_chunker_empty_input():
     assert chunks == []
 
 
+def test_iter_chunks_is_lazy():
+    chunker = Chunker(chunk_size=110)
+    consumed = []
+
+    def sections():
+        for i in range(5):
+            consumed.append(i)
+            yield f"section {i}\n"
+
+    chunks = chunker.iter_chunks(sections())
+    assert next(chunks) == "section 0\n"
+    assert consumed == [0, 1]  # stopped after the section that overflowed
+    assert list(chunks) == [f"section {i}\n" for i in range(1, 5)]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_chunker_matches_line_reference(seed, reference_chunk):
+    # same chunks as before as long as every line fits into a chunk
+    rng = random.Random(seed)
+    chunk_size = rng.randint(101, 400)
+    sections = []
+    for _ in range(rng.randint(0, 8)):
+        lines = [
+            "x" * rng.randint(0, chunk_size - 101) for _ in range(rng.randint(0, 30))
+        ]
+        sections.append("\n".join(lines) + ("\n" if rng.random() < 0.5 else ""))
+    chunks = Chunker(chunk_size).chunk(sections)
+    assert chunks == reference_chunk(sections, chunk_size)
+    assert "".join(chunks) == "".join(sections)
+    assert "" not in chunks
+
+
+def test_chunker_hard_splits_long_lines():
+    chunker = Chunker(chunk_size=120)  # 20 chars of text
+    minified = "var a=1,b=2;function f(x){return x+1}f(a);f(b);\n"
+    chunks = chunker.chunk(["a\n" + minified + "b\n"])
+
+    assert "".join(chunks) == "a\n" + minified + "b\n"
+    assert all(0 < len(c) <= 20 for c in chunks)
+    # cut after safe boundaries where possible
+    assert chunks[1] == "var a=1,b=2;"
+
+
+@pytest.mark.parametrize("seed", range(30))
+@pytest.mark.parametrize("layout", ["greedy", "ffd", "balanced"])
+@pytest.mark.parametrize("exact_header", [False, True])
+def test_no_chunk_exceeds_limit(seed, layout, exact_header):
+    # property: whatever the input, header + chunk fits into chunk_size
+    rng = random.Random(seed)
+    chunk_size = rng.randint(101, 600)
+    alphabet = "ab ,;{}()\n" if rng.random() < 0.5 else "xyz"
+
+    def text(n):
+        return "".join(rng.choice(alphabet) for _ in range(n))
+
+    sections = ["#[TASK]\n" + text(rng.randint(0, 300)) + "\n\n"]
+    for i in range(rng.randint(0, 6)):
+        ext = rng.choice(["py", "js", "md", "min.js"])
+        sections.append(f"#[FILE] f{i}.{ext}\n{text(rng.randint(0, 2000))}\n\n")
+
+    if exact_header:
+        # the real prompt headers (as in Scanner.scan): longer from chunk 10 on
+        compiled = Formatter().compile_header()
+        chunk_size += 100  # the header of the first chunk alone is 86 chars
+
+        def header(i):
+            return compiled(i, 999, 3)
+
+        chunker = Chunker(chunk_size, layout=layout, header=header, max_chunks=999)
+    else:
+
+        def header(i):
+            return "x" * 100  # fixed reserve
+
+        chunker = Chunker(chunk_size, layout=layout)
+
+    chunks = chunker.chunk(sections)
+    for i, c in enumerate(chunks, 1):
+        assert 0 < len(header(i) + c) <= chunk_size
+    # nothing is lost (continuation markers aside)
+    marker = re.compile(r"#\[FILE\] \S+ \(continued from \S+\)\n")
+    assert sorted(marker.sub("", "".join(chunks))) == sorted("".join(sections))
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_no_chunk_exceeds_token_budget(seed):
+    rng = random.Random(seed)
+    tokenizer = HeuristicTokenizer()
+    budget = rng.randint(105, 300)
+    line = "".join(rng.choice("abc ,;") for _ in range(rng.randint(500, 3000)))
+    sections = [f"#[FILE] bundle.min.js\n{line}\n\n"]
+
+    chunks = Chunker(30000, token_budget=budget).chunk(sections)
+    for c in chunks:
+        assert tokenizer.count(c, "bundle.min.js") <= budget - 100
+    assert "".join(chunks).replace(
+        "#[FILE] bundle.min.js (continued from bundle.min.js:1)\n", ""
+    ) == "".join(sections)
+
+
+def test_chunker_token_budget():
+    tokenizer = HeuristicTokenizer()
+    chunker = Chunker(chunk_size=30000, token_budget=150)  # 50 tokens of text
+    section = "#[FILE] notes.md\n" + "word " * 20 + "\n" + "more " * 20 + "\n"
+    chunks = chunker.chunk(["#[TASK]\nDebug\n\n", section])
+
+    for c in chunks:
+        lines = c.splitlines(keepends=True)
+        tokens = sum(tokenizer.count(line, "notes.md") for line in lines)
+        assert tokens <= 50
+    assert len(chunks) == 2
+    assert chunks[0].startswith("#[TASK]\nDebug\n\n#[FILE] notes.md\nword")
+    assert (
+        chunks[1]
+        == "#[FILE] notes.md (continued from notes.md:1)\n" + "more " * 20 + "\n"
+    )
+
+
+def file_section(name, size):
+    header = f"#[FILE] {name}\n"
+    body = ("x" * 9 + "\n") * ((size - len(header)) // 10)
+    return header + body
+
+
+def test_packed_layouts_keep_files_whole():
+    # limit is 900 chars: greedy fills in order and splits files at lines
+    sizes = [600, 500, 400, 300, 300, 200, 200, 100]
+    sections = ["#[TASK]\nDebug\n\n"] + [
+        file_section(f"f{i}.py", size) for i, size in enumerate(sizes)
+    ]
+    greedy = Chunker(chunk_size=1000).chunk(sections)
+    assert any(not any(section in c for c in greedy) for section in sections)
+
+    for layout in ("ffd", "balanced"):
+        chunks = Chunker(chunk_size=1000, layout=layout).chunk(sections)
+        assert len(chunks) == len(greedy)  # the lower bound, 3 chunks
+        assert chunks[0].startswith("#[TASK]\n")
+        for c in chunks:
+            assert len(c) <= 900
+        # every file stays whole and appears exactly once
+        for section in sections[1:]:
+            assert sum(section in c for c in chunks) == 1
+        assert sorted("".join(chunks)) == sorted("".join(sections))
+
+
+def test_balanced_layout_evens_out_chunks():
+    sections = [file_section(f"f{i}.py", size) for i, size in enumerate([400] * 4)]
+    sections += [file_section(f"s{i}.py", 100) for i in range(4)]
+    ffd = Chunker(chunk_size=1000, layout="ffd").chunk(sections)
+    balanced = Chunker(chunk_size=1000, layout="balanced").chunk(sections)
+    assert len(ffd) == len(balanced) == 3
+    assert max(map(len, balanced)) - min(map(len, balanced)) < max(map(len, ffd)) - min(
+        map(len, ffd)
+    )
+
+
+def test_packed_layout_splits_only_oversized_files():
+    big = file_section("big.py", 2000)
+    small = file_section("small.py", 300)
+    chunks = Chunker(chunk_size=1000, layout="ffd").chunk([small, big])
+
+    assert small in chunks[0]  # small file ordered first, kept whole
+    assert big.startswith(chunks[1])
+    # full pieces of the big file are followed by its remainder
+    big_parts = [c for c in chunks if small not in c]
+    assert all(len(c) <= 900 for c in chunks)
+    text = "".join(chunks)
+    assert text.count("#[FILE] big.py\n") == 1
+    assert text.count("#[FILE] big.py (continued from big.py:") == len(big_parts) - 1
+
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("layout", ["greedy", "ffd", "balanced"])
+def test_exact_header_reserve(seed, layout):
+    # with the header template, header + chunk fill up to exactly chunk_size
+    rng = random.Random(seed)
+    chunk_size = rng.randint(150, 800)
+    header = Formatter().compile_header()
+
+    def text(n):
+        return "".join(rng.choice("ab {};\n") for _ in range(n))
+
+    sections = ["#[TASK]\n" + text(rng.randint(0, 200)) + "\n\n"]
+    for i in range(rng.randint(1, 8)):
+        sections.append(f"#[FILE] f{i}.js\n{text(rng.randint(0, 1500))}\n\n")
+
+    chunker = Chunker(
+        chunk_size,
+        layout=layout,
+        header=lambda i: header(i, 999, 3),
+        max_chunks=999,
+    )
+    chunks = chunker.chunk(sections)
+    for i, c in enumerate(chunks, 1):
+        assert 0 < len(header(i, 999, 3) + c) <= chunk_size
+
+
+def test_exact_header_fills_more_than_fixed_reserve():
+    header = Formatter().compile_header()
+    sections = ["#[FILE] notes.txt\n" + "word word\n" * 500]
+    fixed = Chunker(400).chunk(sections)
+    exact = Chunker(400, header=lambda i: header(i, 99, 2), max_chunks=99).chunk(
+        sections
+    )
+    assert len(header(2, 99, 2)) < 100
+    assert len(exact) < len(fixed)
+    assert all(len(header(i, 99, 2) + c) <= 400 for i, c in enumerate(exact, 1))
+
+
+def test_exact_header_in_tokens():
+    tokenizer = HeuristicTokenizer()
+    header = Formatter().compile_header()
+    sections = ["#[FILE] notes.md\n" + "some words here\n" * 300]
+    chunks = Chunker(
+        30000, token_budget=200, header=lambda i: header(i, 99, 2), max_chunks=99
+    ).chunk(sections)
+    for i, c in enumerate(chunks, 1):
+        assert tokenizer.count(header(i, 99, 2)) + tokenizer.count(c, "notes.md") <= 200
+
+
+@pytest.mark.parametrize("layout", ["greedy", "ffd", "balanced"])
+def test_bytes_chunks_match_text_chunks(layout):
+    rng = random.Random(7)
+    sections = ["#[TASK]\nDebug\n\n"]
+    for i in range(12):
+        lines = [f"x = {rng.random()}\n" * rng.randint(1, 3) for _ in range(80)]
+        sections.append(f"#[FILE] f{i}.py\n{''.join(lines)}\n\n")
+
+    text_chunks = Chunker(900, layout=layout).chunk(sections)
+    byte_chunks = Chunker(900, layout=layout).chunk([s.encode() for s in sections])
+    assert byte_chunks == [c.encode() for c in text_chunks]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_bytes_chunks_never_split_characters(seed):
+    rng = random.Random(seed)
+    line = "".join(rng.choice("a\u00e9\u2713\U0001f600 ,") for _ in range(2000))
+    section = f"#[FILE] notes.md\n{line}\n\n".encode()
+
+    chunk_size = rng.randint(110, 400)
+    chunks = Chunker(chunk_size).chunk([section])
+    for c in chunks:
+        assert isinstance(c, bytes) and len(c) <= chunk_size - 100
+        c.decode("utf-8")  # raises if a character was cut
+    assert (
+        b"".join(chunks)
+        .decode()
+        .replace("#[FILE] notes.md (continued from notes.md:1)\n", "")
+        == section.decode()
+    )
+
+
 # PASSED
@@ -0,0 +1,133 @@
+import subprocess
+import sys
+
+from typer.testing import CliRunner
+
+from snib.cli import app
+from snib.utils import complete_preset, get_task_choices
+
+# cumulative import time of `snib.cli` (python -X importtime -m snib --help)
+IMPORT_BUDGET_US = 250_000
+
+runner = CliRunner()
+
+
+def _importtime(*args, cwd=None):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        capture_output=True,
+        text=True,
+        cwd=cwd,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative)
+    return result, times
+
+
+# -------------------------------
+# Startup: nothing heavy on --help
+# -------------------------------
+def test_help_import_budget(tmp_path):
+    result, times = _importtime("-m", "snib", "--help", cwd=tmp_path)
+    assert result.returncode == 0
+    assert "snib.pipeline" not in times
+    assert "snib.scanner" not in times
+    assert times["snib.cli"] < IMPORT_BUDGET_US
+
+
+def test_import_cli_skips_rich_and_click():
+    result, times = _importtime("-c", "import snib.cli")
+    assert result.returncode == 0
+    assert not [m for m in times if m.split(".")[0] in ("rich", "click")]
+
+
+def test_help_does_not_parse_config(tmp_path):
+    (tmp_path / "snibconfig.toml").write_text("this is [not toml")
+    result = subprocess.run(
+        [sys.executable, "-m", "snib", "scan", "--help"],
+        capture_output=True,
+        text=True,
+        cwd=tmp_path,
+    )
+    assert result.returncode == 0
+    assert "--task" in result.stdout
+
+
+# -------------------------------
+# Lazy choices
+# -------------------------------
+def test_task_choices_from_project_path(tmp_path):
+    (tmp_path / "snibconfig.toml").write_text(
+        '[instruction.task_dict]\nreview = "Review"\nport = "Port"\n'
+    )
+    assert get_task_choices(tmp_path) == ["review", "port"]
+    assert "debug" in get_task_choices(tmp_path / "missing")  # defaults
+
+
+def test_task_choices_default_to_cwd_at_call_time(tmp_path, monkeypatch):
+    (tmp_path / "snibconfig.toml").write_text(
+        '[instruction.task_dict]\nport = "Port"\n'
+    )
+    monkeypatch.chdir(tmp_path)
+    assert get_task_choices() == ["port"]
+
+
+def test_complete_preset():
+    assert complete_preset("py") == ["python"]
+
+
+def test_unknown_preset_is_rejected(tmp_path):
+    result = runner.invoke(app, ["init", "--path", str(tmp_path), "--preset", "nope"])
+    assert result.exit_code == 0
+    assert not (tmp_path / "snibconfig.toml").exists()
+
+
+def test_unknown_task_is_rejected(tmp_path):
+    assert runner.invoke(app, ["init", "--path", str(tmp_path)]).exit_code == 0
+    (tmp_path / "a.py").write_text("print(1)")
+
+    result = runner.invoke(app, ["scan", "--path", str(tmp_path), "--task", "nope"])
+    assert result.exit_code == 0
+    assert not list((tmp_path / "prompts").glob("prompt_*.txt"))
+
+    result = runner.invoke(
+        app, ["scan", "--path", str(tmp_path), "--task", "DEBUG", "--force"]
+    )
+    assert result.exit_code == 0
+    assert list((tmp_path / "prompts").glob("prompt_*.txt"))
+
+
+def test_watch_forwards_scan_options(tmp_path, monkeypatch):
+    assert runner.invoke(app, ["init", "--path", str(tmp_path)]).exit_code == 0
+    calls = []
+    monkeypatch.setattr(
+        "snib.scanner.Scanner.watch", lambda self, *args: calls.append(args)
+    )
+
+    result = runner.invoke(
+        app,
+        [
+            "watch",
+            "--path",
+            str(tmp_path),
+            "--walk-workers",
+            "4",
+            "--bytes-mode",
+            "--output-format",
+            "pack",
+            "--compression",
+            "gzip",
+            "--no-cache",
+        ],
+    )
+    assert result.exit_code == 0
+    # walk_workers ... compression, use_cache (see Scanner.watch)
+    assert calls[0][6] == 4
+    assert calls[0][10:14] == (True, "pack", "gzip", False)
+
+
+# PASSED
@@ -38,4 +38,102 @@ def test_formatter_size_formatting():
     assert "5.00 MB" in formatter._format_stats(stats)
 
 
+def test_formatter_marks_truncated_files():
+    formatter = Formatter()
+    section = Section(
+        type="file", path=Path("big.log"), content="...", original_size=40 * 1024**2
+    )
+    text = formatter.to_prompt_text([section])[0]
+    assert text.startswith("#[FILE] big.log (truncated, original size: 40.00 MB)\n")
+
+
+def test_formatter_excluded_stats_modes():
+    formatter = Formatter()
+    shallow = FilterStats(type="excluded", files=3, size=10, dirs=2, mode="shallow")
+    assert "2 pruned folder(s)" in formatter._format_stats(shallow)
+    off = FilterStats(type="excluded", mode="off")
+    assert formatter._format_stats(off) == "not computed"
+
+
+def test_formatter_duplicate_stub_and_stats():
+    formatter = Formatter()
+    stub = Section(type="file", path=Path("b/x.json"), duplicate_of=Path("a/x.json"))
+    assert formatter.to_prompt_text([stub]) == [
+        "#[FILE] b/x.json (identical to a/x.json)\n\n"
+    ]
+    assert formatter.iter_prompt_bytes([stub]).__next__() == (
+        b"#[FILE] b/x.json (identical to a/x.json)\n\n"
+    )
+
+    filters = Section(
+        type="filters",
+        include_stats=FilterStats("included", 2, 20),
+        exclude_stats=FilterStats("excluded"),
+        dedupe_stats=FilterStats("duplicate", 1, 10, tokens=3),
+    )
+    text = formatter.to_prompt_text([filters])[0]
+    assert "Duplicate files: files: 1, total size: 10 B" in text
+    assert "saved tokens: ~3" in text
+    assert text.endswith("\n\n")
+
+
+def test_formatter_skipped_file_stats():
+    formatter = Formatter()
+    filters = Section(
+        type="filters",
+        include_stats=FilterStats("included", 2, 20),
+        exclude_stats=FilterStats("excluded"),
+        binary_stats=FilterStats("binary", 1, 1024),
+        minified_stats=FilterStats("minified", 2, 30),
+        minified="summarize",
+    )
+    text = formatter.to_prompt_text([filters])[0]
+    assert "Binary files: files: 1, total size: 1.00 KB (skipped)\n" in text
+    assert "Minified files: files: 2, total size: 30 B (summarized)\n" in text
+
+    # nothing skipped: no extra lines
+    filters.binary_stats = FilterStats("binary")
+    filters.minified_stats = FilterStats("minified")
+    text = formatter.to_prompt_text([filters])[0]
+    assert "Binary files" not in text and "Minified files" not in text
+
+
+def test_compile_header_matches_info_section():
+    formatter = Formatter()
+    header = formatter.compile_header()
+
+    def reference(i, total, width):
+        lead = (
+            "Please do not give output until all prompt files are sent. "
+            if i == 1
+            else ""
+        )
+        content = f"{lead}Prompt file {i}/{total:<{width}}\n"
+        return formatter.to_prompt_text([Section(type="info", content=content)])[0]
+
+    for i, total, width in [(1, 2, 1), (2, 2, 1), (7, 12, 3), (12, 12, 2)]:
+        assert header(i, total, width) == reference(i, total, width)
+    assert len(header(1, 99, 2)) == len(header(1, 10, 2))
+    assert header(1, 1, 3) == ""
+
+
+def test_iter_prompt_bytes_matches_text():
+    formatter = Formatter()
+    sections = [
+        Section(type="task", content="Task text"),
+        Section(type="tree", content="project_tree"),
+        Section(type="file", path=Path("a.py"), content="print('caf\u00e9')"),
+        Section(type="file", path=Path("big.log"), content="x", original_size=4096),
+    ]
+    as_bytes = [
+        Section(type=s.type, path=s.path, original_size=s.original_size, content=c)
+        for s, c in zip(
+            sections,
+            ["Task text", "project_tree", "print('caf\u00e9')".encode(), b"x"],
+        )
+    ]
+    expected = [t.encode("utf-8") for t in formatter.iter_prompt_text(sections)]
+    assert list(formatter.iter_prompt_bytes(as_bytes)) == expected
+
+
 # PASSED
@@ -0,0 +1,72 @@
+import fnmatch
+
+import pytest
+
+from snib.config import SNIB_DEFAULT_CONFIG
+from snib.patterns import PatternSet, split_patterns
+
+
+def test_split_patterns_normalizes():
+    globs, prefixes = split_patterns(["*.py", "src\\snib\\", "utils.py"])
+    assert globs == ["*.py"]
+    assert prefixes == ["src/snib", "utils.py"]
+
+
+@pytest.mark.parametrize(
+    "rel_path",
+    [
+        "main.py",
+        "src/snib/scanner.py",
+        "archive.tar.gz",
+        "web/app.min.js",
+        "docs/readme.md",
+        ".py",
+        "Makefile",
+    ],
+)
+def test_extension_fast_path_matches_fnmatch(rel_path):
+    globs = SNIB_DEFAULT_CONFIG["filters"]["smart_include"] + ["*.tar.gz"]
+    name = rel_path.rsplit("/", 1)[-1]
+    expected = any(
+        fnmatch.fnmatch(name, g) or fnmatch.fnmatch(rel_path, g) for g in globs
+    )
+    assert PatternSet(globs).match(rel_path, name) == expected
+
+
+def test_merged_regex_globs():
+    patterns = PatternSet(["test_*.py", "src/*/cli.py", "file?.txt", "[ab]?.md"])
+    assert patterns.match("tests/test_utils.py")
+    assert patterns.match("src/snib/cli.py")
+    assert patterns.match("file1.txt")
+    assert patterns.match("a1.md")
+    assert not patterns.match("c1.md")
+    assert not patterns.match("src/cli.py")
+
+
+def test_globstar_semantics():
+    patterns = PatternSet(["**/conftest.py", "docs/**"])
+    assert patterns.match("conftest.py")  # zero directories
+    assert patterns.match("tests/unit/conftest.py")
+    assert patterns.match("docs")
+    assert patterns.match("docs/usage/cli.md")
+    assert not patterns.match("src/docs.py")
+
+
+def test_prefix_trie():
+    patterns = PatternSet(["__pycache__", "src/snib", "utils.py"])
+    assert patterns.match("__pycache__")
+    assert patterns.match("pkg/__pycache__/mod.pyc")
+    assert patterns.match("src/snib/scanner.py")
+    assert patterns.match("root/src/snib")  # path parts somewhere in path
+    assert patterns.match("src/snib/utils.py")
+    assert not patterns.match("src/snibby/scanner.py")
+    assert not patterns.match("src/other/scanner.py")
+
+
+def test_empty_pattern_set():
+    patterns = PatternSet([])
+    assert not patterns
+    assert not patterns.match("main.py")
+
+
+# PASSED
@@ -0,0 +1,226 @@
+import threading
+import time
+
+import pytest
+
+from snib.models import IndexEntry
+from snib.reader import (
+    SNIFF_SIZE,
+    FileReader,
+    is_minified,
+    sniff_encoding,
+    summarize_minified,
+)
+
+
+@pytest.fixture
+def files(tmp_path):
+    entries = []
+    for i in range(20):
+        content = f"file {i}\n" * (i + 1)
+        (tmp_path / f"f{i:02}.txt").write_text(content)
+        entries.append(IndexEntry(path=f"f{i:02}.txt", is_dir=False, size=len(content)))
+    return entries
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_read_all_keeps_order(tmp_path, files, workers):
+    reader = FileReader(tmp_path, workers=workers)
+    results = list(reader.read_all(files))
+    assert [e.path for e, _ in results] == [e.path for e in files]
+    assert results[3][1] == "file 3\n" * 4
+
+
+def test_read_all_bounds_buffered_bytes(tmp_path, files, monkeypatch):
+    reader = FileReader(tmp_path, workers=4, max_buffered_bytes=50)
+    in_flight = []
+    peak = []
+    lock = threading.Lock()
+    real_read = reader._read
+
+    def tracking_read(entry):
+        with lock:
+            in_flight.append(entry.size)
+            peak.append(sum(in_flight))
+        time.sleep(0.001)
+        return real_read(entry)
+
+    monkeypatch.setattr(reader, "_read", tracking_read)
+
+    for entry, _ in reader.read_all(files):
+        with lock:
+            in_flight.remove(entry.size)
+
+    # a single file may exceed the cap, but nothing is buffered alongside it
+    assert max(peak) <= max(50, max(e.size for e in files))
+
+
+@pytest.mark.parametrize(
+    "head,expected",
+    [
+        (b"print('hi')\n", "utf-8"),
+        ("h\u00e9llo".encode("utf-8")[:2], "utf-8"),  # cut multi-byte sequence
+        (b"\xef\xbb\xbfbom", "utf-8-sig"),
+        ("text".encode("utf-16"), "utf-16"),
+        ("text".encode("utf-16-le"), "utf-16-le"),
+        ("text".encode("utf-16-be"), "utf-16-be"),
+        ("caf\u00e9 cr\u00e8me".encode("latin-1"), "latin-1"),
+        (b"\x89PNG\r\n\x1a\n" + b"\x00" * 8, None),
+        (b"%PDF-1.7\n", None),
+        (b"abc\x00\x01\x02def\x00", None),
+        (bytes(range(1, 32)) * 4 + b"\xff", None),
+    ],
+)
+def test_sniff_encoding(head, expected):
+    assert sniff_encoding(head) == expected
+
+
+def test_read_skips_binary(tmp_path):
+    blob = b"\x7fELF" + b"\x00" * (4 * SNIFF_SIZE)
+    (tmp_path / "tool.bin").write_bytes(blob)
+    reader = FileReader(tmp_path)
+    entry = IndexEntry(path="tool.bin", is_dir=False, size=len(blob))
+    assert reader.read(entry) is None
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_sniff_all_classifies_binary_files(tmp_path, workers):
+    (tmp_path / "tool.bin").write_bytes(b"\x7fELF" + b"\x00" * 64)
+    (tmp_path / "a.txt").write_text("text")
+    entries = [
+        IndexEntry(path=name, is_dir=False) for name in ("tool.bin", "a.txt", "gone")
+    ]
+    reader = FileReader(tmp_path, workers=workers)
+    # unreadable files are not binary, `read` returns a placeholder for them
+    assert [(e.path, b) for e, b in reader.sniff_all(entries)] == [
+        ("tool.bin", True),
+        ("a.txt", False),
+        ("gone", False),
+    ]
+
+
+@pytest.mark.parametrize("encoding", ["utf-16", "latin-1", "utf-8-sig"])
+def test_read_decodes_other_encodings(tmp_path, encoding):
+    text = "caf\u00e9\r\nna\u00efve " * (SNIFF_SIZE // 4)
+    (tmp_path / "notes.txt").write_bytes(text.encode(encoding))
+    reader = FileReader(tmp_path)
+    content = reader.read(IndexEntry(path="notes.txt", is_dir=False))
+    assert content == text.replace("\r\n", "\n")  # universal newlines
+
+
+@pytest.mark.parametrize("as_bytes", [False, True])
+def test_read_replaces_invalid_utf8_after_head(tmp_path, as_bytes):
+    data = "\u00e9".encode("utf-8") + b"a" * SNIFF_SIZE + b"\xff" + "\u00fc".encode()
+    (tmp_path / "late.txt").write_bytes(data)
+    reader = FileReader(tmp_path, as_bytes=as_bytes)
+    content = reader.read(IndexEntry(path="late.txt", is_dir=False))
+    if as_bytes:
+        content = content.decode("utf-8")
+    # valid characters survive, only the invalid byte is replaced
+    assert content.startswith("\u00e9a")
+    assert content.endswith("a\ufffd\u00fc")
+
+
+def test_read_truncates_oversized_files(tmp_path):
+    lines = [f"line {i:06}\n" for i in range(100_000)]
+    (tmp_path / "big.log").write_text("".join(lines))
+    size = (tmp_path / "big.log").stat().st_size
+    entry = IndexEntry(path="big.log", is_dir=False, size=size)
+
+    reader = FileReader(tmp_path, max_file_size=1000)
+    assert reader.is_truncated(entry)
+    content = reader.read(entry)
+    head, tail = content.split("bytes truncated ...>\n\n")
+    assert head.startswith("line 000000\n")
+    assert tail.endswith("line 099999\n")
+    assert len(content.encode("utf-8")) < 1100
+
+
+def test_read_uses_current_size_of_shrunk_file(tmp_path):
+    (tmp_path / "log.txt").write_text("line\n" * 1000)
+    entry = IndexEntry(path="log.txt", is_dir=False, size=5000)
+    (tmp_path / "log.txt").write_text("short\n")  # shrank after the walk
+
+    reader = FileReader(tmp_path, max_file_size=1000)
+    assert reader.is_truncated(entry)  # by the index
+    assert reader.read(entry) == "short\n"
+
+    (tmp_path / "log.txt").write_text("x\n" * 600)  # 1200 bytes, still above the cap
+    content = reader.read(entry)
+    head, tail = content.split(" bytes truncated ...>\n\n")
+    assert head.endswith("<... 200")
+    assert len(content) < 1100
+
+
+def test_read_truncates_utf16_tail(tmp_path):
+    text = "".join(f"caf\u00e9 {i}\n" for i in range(5000))
+    (tmp_path / "notes.txt").write_bytes(text.encode("utf-16"))
+    size = (tmp_path / "notes.txt").stat().st_size
+    reader = FileReader(tmp_path, max_file_size=2000)
+    content = reader.read(IndexEntry(path="notes.txt", is_dir=False, size=size))
+    assert content.startswith("caf\u00e9 0\n")
+    assert content.endswith("caf\u00e9 4999\n")
+
+
+def test_max_file_size_overrides(tmp_path):
+    reader = FileReader(
+        tmp_path,
+        max_file_size=100,
+        max_file_size_overrides={"*.min.js": 10, "fixtures": 0},
+    )
+    big = 50
+    assert reader.is_truncated(IndexEntry("app.min.js", False, size=big))
+    assert not reader.is_truncated(IndexEntry("app.js", False, size=big))
+    assert not reader.is_truncated(IndexEntry("fixtures/dump.sql", False, size=10**9))
+    assert reader.is_truncated(IndexEntry("dump.sql", False, size=10**9))
+
+
+def test_read_unreadable_file(tmp_path):
+    reader = FileReader(tmp_path)
+    entry = IndexEntry(path="missing.txt", is_dir=False)
+    assert reader.read(entry) == "<Could not read missing.txt>\n"
+
+
+@pytest.mark.parametrize(
+    "path,text,expected",
+    [
+        ("app.min.js", "var a=1;", True),
+        ("data.json", '{"a": 1, "b": [' + "1," * 5000 + "1]}", True),
+        ("app.js", "var a = 1;\n" * 2000, False),
+        ("notes.md", "short\n", False),
+    ],
+)
+def test_is_minified(path, text, expected):
+    assert is_minified(path, text) == expected
+
+
+def test_summarize_minified():
+    summary = summarize_minified("x" * 1000, preview=10)
+    assert (
+        summary
+        == "<minified: 1,000 chars in 1 line(s), longest line 1,000 chars>\nxxxxxxxxxx...\n"
+    )
+
+
+@pytest.mark.parametrize(
+    "data, expected",
+    [
+        (b"plain ascii\r\nline\n", b"plain ascii\nline\n"),
+        ("caf\u00e9 \u2713\n".encode("utf-8"), "caf\u00e9 \u2713\n".encode("utf-8")),
+        ("caf\u00e9\n".encode("utf-16"), "caf\u00e9\n".encode("utf-8")),
+        (
+            b"a" * (SNIFF_SIZE + 10) + b"\xe9",
+            b"a" * (SNIFF_SIZE + 10) + "\ufffd".encode(),
+        ),
+    ],
+)
+def test_read_as_bytes(tmp_path, data, expected):
+    (tmp_path / "notes.txt").write_bytes(data)
+    entry = IndexEntry(path="notes.txt", is_dir=False, size=len(data))
+    content = FileReader(tmp_path, as_bytes=True).read(entry)
+    assert content == expected
+    # same content as the text mode, only encoded
+    assert content.decode("utf-8") == FileReader(tmp_path).read(entry)
+
+
+# PASSED
@@ -1,11 +1,15 @@
+import json
 import os
+import re
 from pathlib import Path
 
 import pytest
 
+from snib.cache import ScanCache
 from snib.config import SNIB_DEFAULT_CONFIG
 from snib.models import FilterStats, Section
 from snib.scanner import Scanner
+from snib.writer import read_pack_chunk
 
 
 @pytest.fixture
@@ -65,6 +69,30 @@ def test_calculate_filter_stats_counts(tmp_path, config_dict):
     assert stats.size == len("hello")
 
 
+@pytest.mark.parametrize(
+    "mode,files,dirs",
+    [("exact", 4, 0), ("shallow", 1, 2), ("off", 0, 0)],
+)
+def test_excluded_stats_modes(sample_project, config_dict, mode, files, dirs):
+    (sample_project / "node_modules" / "pkg").mkdir(parents=True)
+    (sample_project / "node_modules" / "pkg" / "index.js").write_text("x")
+    (sample_project / "node_modules" / "pkg" / "lib.js").write_text("y")
+    config_dict["filters"]["excluded_stats"] = mode
+    s = Scanner(sample_project, config_dict)
+    index = s._build_index(sample_project, ["*.py"], ["tests", "node_modules"])
+
+    # pruned directories are recorded but never descended into
+    assert "node_modules" in [e.path for e in index]
+    assert not any(e.path.startswith("node_modules/") for e in index)
+
+    included, excluded = s._partition_index(index)
+    pruned = [e for e in index if e.is_dir and not e.included]
+    stats = s._calculate_excluded_stats(excluded, pruned)
+    assert stats.mode == mode
+    assert stats.files == files  # b.txt (+ tests/test_a.py, 2x node_modules)
+    assert stats.dirs == dirs
+
+
 # ------------------
 # Integration-style tests
 # ------------------
@@ -87,20 +115,92 @@ def test_collect_sections_builds_sections(sample_project, config_dict):
     assert any(sec.type == "file" for sec in sections)
 
 
+def test_collect_sections_skips_binary_files(sample_project, config_dict):
+    (sample_project / "src" / "logo.png").write_bytes(b"\x89PNG\r\n\x1a\n\x00")
+    s = Scanner(sample_project, config_dict)
+    sections = s._collect_sections(
+        description="desc", include=["src"], exclude=[], force=True, task=""
+    )
+    paths = [sec.path.as_posix() for sec in sections if sec.type == "file"]
+    assert "src/a.py" in paths
+    assert "src/logo.png" not in paths
+
+
+@pytest.mark.parametrize("minified", ["split", "skip", "summarize"])
+def test_collect_sections_reports_skipped_files_in_filters(
+    sample_project, config_dict, minified
+):
+    (sample_project / "src" / "logo.png").write_bytes(b"\x89PNG\r\n\x1a\n\x00")
+    (sample_project / "src" / "bundle.min.js").write_text("var a=1;" * 100)
+    config_dict["filters"]["minified"] = minified
+    s = Scanner(sample_project, config_dict)
+    sections = s._collect_sections(
+        description="desc", include=["src"], exclude=[], force=True, task=""
+    )
+
+    filters = next(sec for sec in sections if sec.type == "filters")
+    assert filters.binary_stats.files == 1
+    assert filters.minified_stats.files == (0 if minified == "split" else 1)
+    # "Included files" only counts what is in the prompt
+    shown = {"a.py": 10, "b.txt": 6, "bundle.min.js": 800}
+    if minified == "skip":
+        del shown["bundle.min.js"]
+    assert filters.include_stats.files == len(shown)
+    assert filters.include_stats.size == sum(shown.values())
+    paths = {sec.path.name for sec in sections if sec.type == "file"}
+    assert paths == set(shown)
+
+
+def test_collect_sections_does_not_cap_file_size_by_default(
+    sample_project, config_dict
+):
+    (sample_project / "src" / "big.txt").write_text("line\n" * 300_000)  # 1.5 MB
+    s = Scanner(sample_project, config_dict)
+    sections = s._collect_sections(
+        description="desc", include=["src"], exclude=[], force=True, task=""
+    )
+    big = next(sec for sec in sections if sec.path and sec.path.name == "big.txt")
+    assert big.original_size is None
+    assert big.content == "line\n" * 300_000
+
+
+@pytest.mark.parametrize("mode", ["split", "skip", "summarize"])
+def test_collect_sections_minified_modes(sample_project, config_dict, mode):
+    (sample_project / "src" / "bundle.min.js").write_text("var a=1;" * 2000)
+    config_dict["filters"]["minified"] = mode
+    s = Scanner(sample_project, config_dict)
+    sections = s._collect_sections(
+        description="desc", include=["src"], exclude=[], force=True, task=""
+    )
+    files = {sec.path.as_posix(): sec.content for sec in sections if sec.type == "file"}
+    if mode == "skip":
+        assert "src/bundle.min.js" not in files
+    elif mode == "summarize":
+        assert files["src/bundle.min.js"].startswith(
+            "<minified: 16,000 chars in 1 line(s)"
+        )
+    else:
+        assert files["src/bundle.min.js"] == "var a=1;" * 2000
+    assert files["src/a.py"] == "print('a')"
+
+
 def test_scan_pipeline_writes_chunks(monkeypatch, sample_project, config_dict):
     s = Scanner(sample_project, config_dict)
 
     # Monkeypatch Formatter, Chunker, Writer to avoid heavy I/O
     class DummyFormatter:
-        def to_prompt_text(self, sections):
-            return ["formatted"]
+        def iter_prompt_text(self, sections):
+            yield "formatted"
+
+        def compile_header(self):
+            return lambda i, total, width: f"Prompt file {i}/{total}\n"
 
     class DummyChunker:
-        def __init__(self, size):
+        def __init__(self, size, token_budget=0, counter=None, layout="greedy", **kw):
             pass
 
-        def chunk(self, formatted):
-            return ["chunk1", "chunk2"]
+        def iter_chunks(self, formatted):
+            yield from ["chunk1", "chunk2"]
 
     written = {}
 
@@ -108,8 +208,10 @@ def test_scan_pipeline_writes_chunks(monkeypatch, sample_project, config_dict):
         def __init__(self, outdir):
             self.outdir = outdir
 
-        def write_chunks(self, chunks, force):
-            written["chunks"] = chunks
+        def write_stream(self, chunks, header, total_width, force):
+            written["chunks"] = [
+                header(i, 2, total_width) + c for i, c in enumerate(chunks, 1)
+            ]
             return [Path("f1"), Path("f2")]
 
     monkeypatch.setattr("snib.scanner.Formatter", DummyFormatter)
@@ -129,4 +231,373 @@ def test_scan_pipeline_writes_chunks(monkeypatch, sample_project, config_dict):
     assert any("Prompt file" in c or "chunk" in c for c in written["chunks"])
 
 
+def test_scan_reserves_header_digits_for_many_small_files(tmp_path, config_dict):
+    # 3000 one-byte files: headers and tree lines dominate the prompt size
+    for i in range(3000):
+        (tmp_path / f"f{i}.py").write_text("x")
+    (tmp_path / "prompts").mkdir()
+    Scanner(tmp_path, config_dict).scan(
+        "desc", ["*.py"], ["prompts"], 1000, True, "debug", use_cache=False
+    )
+
+    prompts = list((tmp_path / "prompts").glob("prompt_*.txt"))
+    assert len(prompts) > 9  # more than a byte-based estimate reserves
+    assert all(len(p.read_text()) <= 1000 for p in prompts)
+
+
+@pytest.mark.parametrize("output_format", ["files", "pack"])
+def test_scan_chunks_again_when_the_estimate_is_exceeded(
+    tmp_path, config_dict, monkeypatch, output_format
+):
+    (tmp_path / "a.py").write_text("x = 1\n" * 2000)
+    (tmp_path / "prompts").mkdir()
+    monkeypatch.setattr(Scanner, "_estimate_total", lambda self, *args: 1)
+    Scanner(tmp_path, config_dict).scan(
+        "desc",
+        ["*.py"],
+        ["prompts"],
+        1000,
+        True,
+        "debug",
+        output_format=output_format,
+        use_cache=False,
+    )
+
+    prompts = tmp_path / "prompts"
+    if output_format == "pack":
+        index = json.loads((prompts / "prompts.index.json").read_text())
+        chunks = [read_pack_chunk(prompts, c["index"]) for c in index["chunks"]]
+    else:
+        files = sorted(prompts.glob("prompt_*.txt"), key=lambda p: int(p.stem[7:]))
+        chunks = [p.read_bytes() for p in files]
+    # one reserved digit is too few: every header was written with two
+    assert len(chunks) > 9
+    assert all(len(c.decode()) <= 1000 for c in chunks)
+    assert f"1/{len(chunks)}".encode() in chunks[0]
+    assert not list(prompts.glob("*.tmp*"))
+
+
+def test_scan_bytes_mode_writes_same_prompts(sample_project, config_dict):
+    (sample_project / "src" / "c.py").write_text("s = 'caf\u00e9'\r\n" * 300)
+    config_dict["filters"]["excluded_stats"] = "off"  # prompts/ changes in between
+    s = Scanner(sample_project, config_dict)
+    prompts = sample_project / "prompts"
+    noise = re.compile(rb"#\[INFO\]\n[^\n]*\n\n|#\[FILE\] \S+ \(continued from \S+\)\n")
+
+    outputs = []
+    for bytes_mode in (False, True):
+        s.scan(
+            "desc", ["*.py"], ["prompts"], 2000, True, "debug", bytes_mode=bytes_mode
+        )
+        files = sorted(prompts.glob("prompt_*.txt"), key=lambda p: int(p.stem[7:]))
+        outputs.append([p.read_bytes() for p in files])
+
+    # same content, only the cuts differ (chunk_size counts UTF-8 bytes)
+    assert noise.sub(b"", b"".join(outputs[0])) == noise.sub(b"", b"".join(outputs[1]))
+    for data in outputs[1]:
+        assert len(data) <= 2000
+        data.decode("utf-8")
+
+
+def test_scan_pack_matches_prompt_files(sample_project, config_dict):
+    (sample_project / "src" / "c.py").write_text("x = 1\n" * 600)
+    config_dict["filters"]["excluded_stats"] = "off"
+    s = Scanner(sample_project, config_dict)
+    prompts = sample_project / "prompts"
+
+    s.scan("desc", ["*.py"], ["prompts"], 2000, True, "debug")
+    files = sorted(prompts.glob("prompt_*.txt"), key=lambda p: int(p.stem[7:]))
+    s.scan("desc", ["*.py"], ["prompts"], 2000, True, "debug", output_format="pack")
+
+    assert len(files) > 1
+    for n, path in enumerate(files, 1):
+        assert read_pack_chunk(prompts, n) == path.read_bytes()
+
+
+def test_scan_stdout_streams_without_prompts_folder(
+    sample_project, config_dict, capsysbinary
+):
+    (sample_project / "src" / "c.py").write_text("x = 1\n" * 600)
+    s = Scanner(sample_project, config_dict)
+
+    s.scan("desc", ["*.py"], [], 2000, False, "debug", stdout=True)
+
+    chunks = capsysbinary.readouterr().out.split(b"\0")
+    assert chunks.pop() == b""
+    assert len(chunks) > 1
+    assert all(len(c) <= 2000 and b"Prompt file" not in c for c in chunks)
+    assert chunks[0].startswith(b"#[DESCRIPTION]\ndesc")
+    assert not (sample_project / "prompts").exists()
+
+
+def test_scan_serves_unchanged_files_from_cache(
+    sample_project, config_dict, monkeypatch
+):
+    old = 10**18  # 2001, outside the racy window of the cache
+    for path in sample_project.rglob("*.*"):
+        os.utime(path, ns=(old, old))
+    config_dict["filters"]["excluded_stats"] = "off"  # prompts/ changes in between
+    s = Scanner(sample_project, config_dict)
+    prompts = sample_project / "prompts"
+
+    s.scan("desc", ["*.py"], ["prompts"], 2000, True, "debug")
+    first = (prompts / "prompt_1.txt").read_text()
+    assert (prompts / ".snib-cache" / "scan.sqlite").is_file()
+
+    monkeypatch.setattr(
+        "snib.reader.FileReader._read", lambda self, entry: pytest.fail(entry.path)
+    )
+    s.scan("desc", ["*.py"], ["prompts"], 2000, True, "debug")
+    assert (prompts / "prompt_1.txt").read_text() == first
+
+
+def test_scan_closes_cache_when_confirmation_is_declined(
+    sample_project, config_dict, monkeypatch
+):
+    import typer
+
+    (sample_project / "prompts").mkdir()
+    config_dict["filters"]["warning_include_limit"] = 0
+    closed = []
+    monkeypatch.setattr(ScanCache, "close", lambda self: closed.append(self))
+    monkeypatch.setattr("snib.scanner.logger.confirm", lambda *a, **kw: False)
+
+    with pytest.raises(typer.Exit):
+        Scanner(sample_project, config_dict).scan(
+            "desc", ["*.py"], ["prompts"], 2000, False, "debug"
+        )
+    assert len(closed) == 1
+
+
+def test_scan_without_cache(sample_project, config_dict):
+    s = Scanner(sample_project, config_dict)
+    s.scan("desc", ["*.py"], ["prompts"], 2000, True, "debug", use_cache=False)
+    assert not (sample_project / "prompts" / ".snib-cache" / "scan.sqlite").exists()
+
+
+def _age(root, ns=10**18):
+    # older than the racy window of the cache (files and directories)
+    for path in [root, *root.rglob("*")]:
+        os.utime(path, ns=(ns, ns))
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_build_index_reuses_unchanged_directories(
+    sample_project, config_dict, monkeypatch, workers
+):
+    (sample_project / "src" / "pkg").mkdir()
+    (sample_project / "src" / "pkg" / "c.py").write_text("c")
+    (sample_project / "prompts").mkdir()
+    _age(sample_project)
+    s = Scanner(sample_project, config_dict)
+    cache = ScanCache(sample_project / "prompts" / "scan.sqlite")
+    exclude = ["tests", "prompts"]
+
+    fingerprints = cache.load_dirs(["*.py"], exclude)
+    first = s._build_index(sample_project, ["*.py"], exclude, workers, fingerprints)
+    cache.save_dirs(fingerprints)
+    assert fingerprints.reused == 0
+
+    # file contents change without touching the directory mtime
+    (sample_project / "src" / "a.py").write_text("print('changed')")
+    os.utime(sample_project / "src" / "a.py", ns=(10**18, 10**18))
+    monkeypatch.setattr(
+        "snib.scanner.os.scandir", lambda path: pytest.fail(f"listed {path}")
+    )
+    fingerprints = cache.load_dirs(["*.py"], exclude)
+    second = s._build_index(sample_project, ["*.py"], exclude, workers, fingerprints)
+    cache.save_dirs(fingerprints)
+
+    assert fingerprints.reused == 3  # root, src, src/pkg
+    assert [(e.path, e.included) for e in second] == [
+        (e.path, e.included) for e in first
+    ]
+    sizes = {e.path: e.size for e in second}
+    assert sizes["src/a.py"] == len("print('changed')")
+    cache.close()
+
+
+def test_build_index_lists_changed_directories(sample_project, config_dict):
+    (sample_project / "prompts").mkdir()
+    _age(sample_project)
+    s = Scanner(sample_project, config_dict)
+    cache = ScanCache(sample_project / "prompts" / "scan.sqlite")
+    fingerprints = cache.load_dirs(["*.py"], ["prompts"])
+    s._build_index(sample_project, ["*.py"], ["prompts"], 1, fingerprints)
+    cache.save_dirs(fingerprints)
+
+    (sample_project / "src" / "new.py").write_text("new")  # bumps the src mtime
+    fingerprints = cache.load_dirs(["*.py"], ["prompts"])
+    index = s._build_index(sample_project, ["*.py"], ["prompts"], 1, fingerprints)
+    assert fingerprints.reused == 2  # root, tests
+    assert "src/new.py" in {e.path for e in index if e.included}
+
+    # other patterns, other verdicts: nothing is reused
+    fingerprints = cache.load_dirs(["*.txt"], ["prompts"])
+    index = s._build_index(sample_project, ["*.txt"], ["prompts"], 1, fingerprints)
+    assert fingerprints.reused == 0
+    assert {e.path for e in index if e.included and not e.is_dir} == {"src/b.txt"}
+    cache.close()
+
+
+def test_collect_files_reuses_pruned_directory_listings(
+    sample_project, config_dict, monkeypatch, tmp_path_factory
+):
+    vendor = sample_project / "vendor" / "lib"
+    vendor.mkdir(parents=True)
+    (vendor / "dep.js").write_text("dep")
+    _age(sample_project)
+    s = Scanner(sample_project, config_dict)
+    # outside the project, so no directory of the walk changes
+    cache = ScanCache(tmp_path_factory.mktemp("cache") / "scan.sqlite")
+    exclude = ["vendor"]
+    _, _, first = s._collect_files(["*.py"], exclude, True, cache=cache)
+
+    # changed in place: the directory mtime stays, the size does not
+    (vendor / "dep.js").write_text("dependency")
+    os.utime(vendor / "dep.js", ns=(10**18, 10**18))
+    monkeypatch.setattr(
+        "snib.scanner.os.scandir", lambda path: pytest.fail(f"listed {path}")
+    )
+    _, _, second = s._collect_files(["*.py"], exclude, True, cache=cache)
+
+    assert second.files == first.files
+    assert second.size == first.size + len("dependency") - len("dep")
+    cache.close()
+
+
+def test_scan_stores_directory_fingerprints(sample_project, config_dict):
+    (sample_project / "prompts").mkdir()
+    _age(sample_project)
+    s = Scanner(sample_project, config_dict)
+    s.scan("desc", ["*.py"], ["prompts"], 2000, True, "debug")
+
+    cache = ScanCache(sample_project / "prompts" / ".snib-cache" / "scan.sqlite")
+    assert cache._db.execute("SELECT COUNT(*) FROM dirs").fetchone()[0] == 3
+    cache.close()
+
+
+# ------------------
+# Deduplication
+# ------------------
+
+
+@pytest.mark.parametrize("bytes_mode", [False, True])
+def test_scan_dedupe_replaces_identical_files(tmp_path, config_dict, bytes_mode):
+    for name in ("a", "b", "c"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "package.json").write_text('{"name": "template"}\n' * 20)
+    (tmp_path / "c" / "package.json").write_text('{"name": "different"}\n' * 20)
+    (tmp_path / "prompts").mkdir()
+    s = Scanner(tmp_path, config_dict)
+    s.scan(
+        "desc",
+        ["*.json"],
+        ["prompts"],
+        100000,
+        True,
+        "debug",
+        bytes_mode=bytes_mode,
+        dedupe=True,
+    )
+
+    text = (tmp_path / "prompts" / "prompt_1.txt").read_text()
+    assert text.count('"template"') == 20
+    assert "#[FILE] b/package.json (identical to a/package.json)\n" in text
+    assert text.count('"different"') == 20
+    assert "Duplicate files: files: 1, total size: 420 B" in text
+    assert "saved tokens: ~" in text
+
+
+def _dedupe_project(root):
+    for name in ("a", "b"):
+        (root / name).mkdir()
+        (root / name / "p.json").write_text('{"name": "template"}\n')
+    (root / "prompts").mkdir()
+
+
+def test_scan_dedupe_pack_index_lists_real_paths(tmp_path, config_dict):
+    _dedupe_project(tmp_path)
+    s = Scanner(tmp_path, config_dict)
+    s.scan(
+        "desc",
+        ["*.json"],
+        ["prompts"],
+        2000,
+        True,
+        "debug",
+        output_format="pack",
+        dedupe=True,
+    )
+
+    index = json.loads((tmp_path / "prompts" / "prompts.index.json").read_text())
+    assert [c["files"] for c in index["chunks"]] == [["a/p.json", "b/p.json"]]
+    assert b"(identical to a/p.json)" in read_pack_chunk(tmp_path / "prompts", 1)
+
+
+def test_scan_dedupe_jsonl_lists_real_paths(tmp_path, config_dict, capsysbinary):
+    _dedupe_project(tmp_path)
+    s = Scanner(tmp_path, config_dict)
+    s.scan(
+        "desc",
+        ["*.json"],
+        ["prompts"],
+        2000,
+        False,
+        "debug",
+        stdout=True,
+        framing="jsonl",
+        dedupe=True,
+    )
+
+    records = [json.loads(r) for r in capsysbinary.readouterr().out.splitlines()]
+    assert [r["files"] for r in records] == [["a/p.json", "b/p.json"]]
+
+
+def test_dedupe_reads(tmp_path, config_dict, monkeypatch):
+    from snib.reader import FileReader
+
+    (tmp_path / "x.txt").write_text("same")
+    (tmp_path / "y.txt").write_text("same")
+    (tmp_path / "z.txt").write_text("unique size")
+    config_dict["performance"]["read_workers"] = 1
+    read = []
+    real_read = FileReader._read
+
+    def record(self, entry):
+        read.append(entry.path)
+        return real_read(self, entry)
+
+    monkeypatch.setattr(FileReader, "_read", record)
+    s = Scanner(tmp_path, config_dict)
+    files, inc, exc = s._collect_files(["*.txt"], [], True)
+    sections = list(s._iter_sections("", [], [], "", files, inc, exc, dedupe=True))
+
+    # only same-size files are hashed, no file is read twice (no scan cache)
+    assert read == ["x.txt", "y.txt", "z.txt"]
+    assert [(str(x.path), x.duplicate_of) for x in sections if x.type == "file"] == [
+        ("x.txt", None),
+        ("y.txt", Path("x.txt")),
+        ("z.txt", None),
+    ]
+
+
+@pytest.mark.parametrize("mode,stubs", [("skip", 0), ("summarize", 0), ("split", 1)])
+def test_dedupe_ignores_skipped_minified_files(tmp_path, config_dict, mode, stubs):
+    for name in ("a", "b"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "bundle.min.js").write_text("var a=1;" * 2000)
+    config_dict["filters"]["minified"] = mode
+    s = Scanner(tmp_path, config_dict)
+    files, inc, exc = s._collect_files(["*.js"], [], True)
+    sections = list(s._iter_sections("", [], [], "", files, inc, exc, dedupe=True))
+
+    # a stub never points to a file that is missing from the prompt
+    file_sections = [x for x in sections if x.type == "file"]
+    assert sum(x.duplicate_of is not None for x in file_sections) == stubs
+    assert len(file_sections) == (0 if mode == "skip" else 2)
+    filters = next(x for x in sections if x.type == "filters")
+    assert filters.dedupe_stats.files == stubs
+
+
 # PASSED
@@ -0,0 +1,116 @@
+import re
+
+from snib.chunker import Chunker
+from snib.splitter import block_starts, plan_pieces, split_file_section
+
+PYTHON_SOURCE = """import os
+
+
+def first():
+    return 1
+
+
+# helper comment
+@decorator
+def second():
+    value = {
+        "key": 1,
+    }
+    return value
+
+
+class Service:
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+"""
+
+JAVA_SOURCE = """package app;
+
+public class Main {
+    // entry point
+    @Override
+    public void run() {
+        String s = "not a { brace";
+    }
+
+    /* stop
+       everything } */
+    public void stop() {
+        if (true) {
+            return;
+        }
+    }
+}
+"""
+
+
+def lines_of(text):
+    return text.splitlines(keepends=True)
+
+
+def test_python_block_starts_via_ast():
+    lines = lines_of(PYTHON_SOURCE)
+    starts = block_starts("app.py", lines)
+    # comments and decorators stay with their function
+    assert lines[7].startswith("# helper comment")
+    assert starts[3] == 0  # def first
+    assert starts[7] == 0  # comment above @decorator / def second
+    assert starts[16] == 0  # class Service
+    assert starts[17] == 1 and starts[20] == 1  # methods
+    assert 11 not in starts  # inside the dict literal
+
+
+def test_brace_block_starts_ignore_strings_and_comments():
+    lines = lines_of(JAVA_SOURCE)
+    starts = block_starts("Main.java", lines)
+    assert starts[2] == 0  # public class Main
+    assert starts[3] == 1  # comment + annotation + run()
+    assert starts[9] == 1  # block comment + stop()
+    assert not any(i in starts for i in (4, 5, 6, 7, 10, 11, 13, 14))
+
+
+def test_plan_prefers_shallow_blocks():
+    sizes = [10] * 10
+    starts = {4: 0, 6: 1, 8: 1}
+    # top level at 4 fills half a piece: preferred over the deeper 6
+    assert plan_pieces(sizes, starts, limit=50) == [0, 4, 8]
+    # no block start fits: cut at the last fitting line
+    assert plan_pieces(sizes, {}, limit=30) == [0, 3, 6, 9]
+
+
+def test_split_file_section_markers():
+    section = "#[FILE] app.py\n" + PYTHON_SOURCE + "\n\n"
+    pieces = split_file_section(section, "app.py", 160, len)
+
+    assert pieces[0].startswith("#[FILE] app.py\nimport os")
+    assert all(len(p) <= 160 for p in pieces)
+    body = ""
+    for piece in pieces[1:]:
+        marker = re.match(
+            r"#\[FILE\] app\.py \(continued from app\.py:(\d+)\)\n", piece
+        )
+        assert marker
+        # marker names the last line of the previous pieces
+        assert int(marker.group(1)) == body.count("\n") + pieces[0].count("\n") - 1
+        body += piece[marker.end() :]
+    assert pieces[0][len("#[FILE] app.py\n") :] + body == PYTHON_SOURCE + "\n\n"
+    # every continuation starts at a definition (or its comment/decorator)
+    assert all(
+        p.split("\n", 2)[1].startswith(("def ", "# helper", "class ", "    def "))
+        for p in pieces[1:]
+    )
+
+
+def test_greedy_chunker_keeps_blocks_of_oversized_files_together():
+    section = "#[FILE] Main.java\n" + JAVA_SOURCE + "\n\n"
+    chunks = Chunker(chunk_size=330).chunk(["#[TASK]\nDebug\n\n", section])
+    assert len("".join(chunks)) > len(section)  # continuation markers added
+    assert all(len(c) <= 230 for c in chunks)
+    stop = next(c for c in chunks if "public void stop()" in c)
+    assert "/* stop" in stop and "return;" in stop
+
+
+# PASSED
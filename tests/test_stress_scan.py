@@ -4,6 +4,8 @@ from pathlib import Path
 
 import pytest
 
+from snib.cache import ScanCache
+from snib.chunker import Chunker
 from snib.config import SNIB_DEFAULT_CONFIG
 from snib.scanner import Scanner
 from snib.utils import check_include_in_exclude, detect_pattern_conflicts
@@ -12,12 +14,15 @@ from snib.utils import check_include_in_exclude, detect_pattern_conflicts
 # -------------------------------
 # Helper: Build large test projects
 # -------------------------------
-def create_large_project(root: Path, depth=3, width=5, extra_files=None):
+def create_large_project(
+    root: Path, depth=3, width=5, extra_files=None, files_per_dir=None
+):
+    files_per_dir = files_per_dir or width
     for d in range(depth):
         for w in range(width):
             folder = root / f"dir{d}_{w}"
             folder.mkdir(parents=True, exist_ok=True)
-            for i in range(width):
+            for i in range(files_per_dir):
                 (folder / f"file{i}.py").write_text(f"print('file{i}')")
                 (folder / f"file{i}.log").write_text("log data")
                 (folder / f"file{i}.js").write_text("console.log('hi')")
@@ -33,6 +38,17 @@ def normalize_path(p: Path, root: Path):
     return os.path.relpath(p, root).replace("\\", "/")
 
 
+def best_of(runs, func, *args):
+    """Fastest of several runs (less noisy than a single timing) and its result."""
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
 # -------------------------------
 # Parametrized test for different flag combinations
 # -------------------------------
@@ -145,4 +161,179 @@ def test_conflicting_patterns(tmp_path):
     assert not problematic, f"Problematic includes detected: {problematic}"
 
 
+# -------------------------------
+# Benchmark: the project is walked only once
+# -------------------------------
+def test_single_walk_benchmark(tmp_path, monkeypatch):
+    create_large_project(tmp_path, depth=5, width=10)
+    scanner = Scanner(tmp_path, config=SNIB_DEFAULT_CONFIG)
+
+    # count directory listings of the project root (rglob/os.walk/scandir all use it)
+    root_listings = []
+    real_scandir = os.scandir
+
+    def counting_scandir(path="."):
+        if os.fspath(path) == str(scanner.path):
+            root_listings.append(path)
+        return real_scandir(path)
+
+    monkeypatch.setattr(os, "scandir", counting_scandir)
+
+    start = time.time()
+    sections = scanner._collect_sections(
+        description="Walk benchmark",
+        include=["*.py"],
+        exclude=["*.log"],
+        task="test",
+        force=True,
+    )
+    duration = time.time() - start
+    print(f"\nScan finished in {duration:.2f}s with {len(root_listings)} walk(s)")
+
+    assert len(root_listings) == 1
+    assert sum(s.type == "file" for s in sections) == 5 * 10 * 10
+    tree = next(s for s in sections if s.type == "tree").content
+    assert "file0.py" in tree
+    assert "file0.log" not in tree
+
+
+# -------------------------------
+# Benchmark: parallel walk on a high-latency filesystem
+# -------------------------------
+@pytest.mark.benchmark
+def test_parallel_walk_latency_benchmark(tmp_path, monkeypatch):
+    create_large_project(tmp_path, depth=4, width=10, files_per_dir=2)
+    for w in range(10):  # some nesting, so work is queued while walking
+        nested = tmp_path / "dir0_0" / f"sub{w}" / "deep"
+        nested.mkdir(parents=True)
+        (nested / "nested.py").write_text("print('nested')")
+    scanner = Scanner(tmp_path, config=SNIB_DEFAULT_CONFIG)
+
+    # shim: every directory listing costs one simulated network round trip
+    real_scandir = os.scandir
+
+    def slow_scandir(path="."):
+        time.sleep(0.005)
+        return real_scandir(path)
+
+    monkeypatch.setattr(os, "scandir", slow_scandir)
+
+    def walk(workers):
+        return scanner._build_index(scanner.path, ["*.py"], ["*.log"], workers)
+
+    serial_time, serial_index = best_of(2, walk, 1)
+    parallel_time, parallel_index = best_of(2, walk, 8)
+    print(
+        f"\nSerial walk: {serial_time:.3f}s, 8 workers: {parallel_time:.3f}s "
+        f"({serial_time / parallel_time:.1f}x)"
+    )
+
+    # same deterministic order as the serial walker
+    assert parallel_index == serial_index
+    assert parallel_time < serial_time / 2  # ~6x locally
+
+
+# -------------------------------
+# Benchmark: rescan of a large tree where nothing changed
+# -------------------------------
+@pytest.mark.benchmark
+def test_unchanged_rescan_benchmark(tmp_path, monkeypatch):
+    root = tmp_path / "project"
+    # 100 directories with 300 files each, plus 20 pruned ones with 500 files
+    create_large_project(root, depth=10, width=10, files_per_dir=100)
+    for d in range(20):
+        folder = root / "node_modules" / f"lib{d}"
+        folder.mkdir(parents=True)
+        for i in range(500):
+            (folder / f"index{i}.js").write_text("module.exports = {}")
+    for path in [root, *root.rglob("*")]:  # older than the racy window
+        os.utime(path, ns=(10**18, 10**18))
+    scanner = Scanner(root, config=SNIB_DEFAULT_CONFIG)
+    cache_path = tmp_path / "cache" / "scan.sqlite"
+
+    def collect():
+        cache = ScanCache(cache_path)
+        try:
+            return scanner._collect_files(["*.py"], ["node_modules"], True, 1, cache)
+        finally:
+            cache.close()
+
+    cold_time, cold = best_of(1, collect)
+    real_scandir = os.scandir
+    listed = []
+
+    def counting_scandir(path="."):
+        listed.append(path)
+        return real_scandir(path)
+
+    monkeypatch.setattr(os, "scandir", counting_scandir)
+    warm_time, warm = best_of(3, collect)
+    print(
+        f"\n40,000 files: first scan {cold_time:.2f}s, "
+        f"unchanged rescan {warm_time:.2f}s ({cold_time / warm_time:.1f}x)"
+    )
+
+    # walked and pruned directories are served from their fingerprints
+    assert not listed
+    assert warm[1] == cold[1] and warm[2] == cold[2]
+    assert warm[2].files == 20_000 + 20 * 500
+    assert warm_time < cold_time
+
+
+# -------------------------------
+# Scaling: include/exclude partitioning stays near-linear
+# -------------------------------
+@pytest.mark.benchmark
+def test_partition_scales_linearly(tmp_path):
+    small_root = tmp_path / "small"
+    large_root = tmp_path / "large"
+    # 3 files per (dir, index): 25 * 5 * 34 * 3 = 12,750 vs. 25 * 20 * 34 * 3 = 51,000
+    create_large_project(small_root, depth=25, width=5, files_per_dir=34)
+    create_large_project(large_root, depth=25, width=20, files_per_dir=34)
+
+    def scan(root):
+        scanner = Scanner(root, config=SNIB_DEFAULT_CONFIG)
+        return scanner._collect_sections(
+            description="Scaling test",
+            include=["*.py"],
+            exclude=["*.log"],
+            task="test",
+            force=True,
+        )
+
+    small_time, _ = best_of(3, scan, small_root)  # the first run warms up caches
+    large_time, large_sections = best_of(2, scan, large_root)
+    print(
+        f"\n12,750 files: {small_time:.2f}s, 51,000 files: {large_time:.2f}s "
+        f"(ratio {large_time / small_time:.1f}x for 4x files)"
+    )
+
+    filters = next(s for s in large_sections if s.type == "filters")
+    assert filters.include_stats.files == 17_000
+    assert filters.exclude_stats.files == 34_000
+    # quadratic partitioning would be ~16x; allow generous noise above 4x
+    assert large_time < small_time * 10
+
+
+# -------------------------------
+# Benchmark: chunking 100 MB of short lines into long-context chunks
+# -------------------------------
+@pytest.mark.benchmark
+def test_chunker_100mb_benchmark(reference_chunk):
+    line = "x = compute(a, b)  # short line\n"  # 32 chars
+    section = line * 8_192  # 256 KB per file section (fits a chunk, no syntax split)
+    sections = [f"#[FILE] src/mod{i}.py\n" + section for i in range(400)]
+    chunk_size = 500_000
+
+    old_time, old_chunks = best_of(2, reference_chunk, sections, chunk_size)
+    new_time, new_chunks = best_of(2, Chunker(chunk_size).chunk, sections)
+    print(
+        f"\n100 MB, chunk_size={chunk_size}: line concat {old_time:.2f}s, "
+        f"part buffers {new_time:.2f}s ({old_time / new_time:.1f}x)"
+    )
+
+    assert new_chunks == old_chunks
+    assert new_time < old_time / 2  # ~10x locally
+
+
 # PASSED
@@ -0,0 +1,96 @@
+import base64
+
+import pytest
+
+from snib.tokenizer import (
+    BPETokenizer,
+    HeuristicTokenizer,
+    TokenCounter,
+    Tokenizer,
+    load_tokenizer,
+)
+
+
+def write_vocab(path, tokens):
+    # tiktoken format: every single byte plus the given merges, in rank order
+    vocab = [bytes([b]) for b in range(256)] + tokens
+    path.write_bytes(
+        b"\n".join(
+            base64.b64encode(t) + b" " + str(i).encode() for i, t in enumerate(vocab)
+        )
+    )
+    return path
+
+
+def test_heuristic_calibrated_per_extension():
+    tokenizer = HeuristicTokenizer()
+    text = "x" * 420
+    assert tokenizer.count(text, "README.md") == 100  # 4.2 chars/token
+    assert tokenizer.count(text, "data.json") == 150  # 2.8 chars/token
+    assert tokenizer.count(text) == 120  # default 3.5 chars/token
+    assert HeuristicTokenizer({".md": 2.0}).count(text, "README.md") == 210
+
+
+def test_bpe_counts_merges(tmp_path):
+    vocab = write_vocab(
+        tmp_path / "tiny.tiktoken", [b"de", b"def", b" f", b" fo", b" foo"]
+    )
+    tokenizer = BPETokenizer(vocab)
+    assert tokenizer.count("def") == 1
+    assert tokenizer.count("def foo") == 2  # "def", " foo"
+    assert tokenizer.count("xyz") == 3  # single bytes only
+    assert tokenizer.count("é") == 2  # two UTF-8 bytes
+    assert tokenizer.name.startswith("bpe:")
+
+
+def test_load_tokenizer(tmp_path):
+    assert isinstance(load_tokenizer("heuristic"), HeuristicTokenizer)
+    write_vocab(tmp_path / "tiny.tiktoken", [])
+    assert isinstance(load_tokenizer("tiny.tiktoken", tmp_path), BPETokenizer)
+    with pytest.raises(ValueError):
+        load_tokenizer("missing.tiktoken", tmp_path)
+    (tmp_path / "broken.tiktoken").write_text("not a vocabulary line\n")
+    with pytest.raises(ValueError):
+        load_tokenizer("broken.tiktoken", tmp_path)
+
+
+def test_load_tokenizer_resolves_cwd_at_call_time(tmp_path, monkeypatch):
+    write_vocab(tmp_path / "tiny.tiktoken", [])
+    monkeypatch.chdir(tmp_path)
+    assert isinstance(load_tokenizer("tiny.tiktoken"), BPETokenizer)
+
+
+def test_token_counter_caches_by_content_hash(tmp_path):
+    class CountingTokenizer(Tokenizer):
+        name = "counting"
+
+        def __init__(self):
+            self.calls = 0
+
+        def count(self, text, path=None):
+            self.calls += 1
+            return len(text.split())
+
+    cache_path = tmp_path / ".snib-cache" / "tokens.json"
+    first = CountingTokenizer()
+    counter = TokenCounter(first, cache_path)
+    assert counter.count("a b c") == 3
+    assert counter.count("a b c") == 3
+    counter.save()
+    assert first.calls == 1
+
+    # repeat scan: unchanged content is not tokenized again
+    second = CountingTokenizer()
+    counter = TokenCounter(second, cache_path)
+    assert counter.count("a b c") == 3
+    assert counter.count("d e") == 2
+    assert second.calls == 1
+    assert (counter.hits, counter.misses) == (1, 1)
+
+
+def test_tokenizer_is_abstract():
+    with pytest.raises(TypeError):
+        Tokenizer()
+
+
+# PASSED
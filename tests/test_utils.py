@@ -2,7 +2,12 @@ from pathlib import Path
 
 import pytest
 
-from snib.utils import build_tree, check_include_in_exclude, detect_pattern_conflicts
+from snib.utils import (
+    build_tree,
+    check_include_in_exclude,
+    detect_pattern_conflicts,
+    render_tree,
+)
 
 
 # -------------------------------
@@ -62,6 +67,47 @@ def test_build_tree_basic(tmp_path):
     assert "file2.js" not in tree_excl_str
 
 
+def test_build_tree_from_selected_files(tmp_path):
+    # no filesystem access needed when files are given
+    tree = build_tree(tmp_path, files=["src/b.py", "src/a.py", "main.py"])
+    assert tree == [
+        tmp_path.name,
+        "├── src",
+        "│   ├── a.py",
+        "│   └── b.py",
+        "└── main.py",
+    ]
+
+
+# -------------------------------
+# render_tree limits
+# -------------------------------
+def test_render_tree_collapses_large_directories():
+    paths = [f"big/file{i:04}.py" for i in range(3412 + 3)] + ["main.py"]
+    tree = render_tree("project", paths, max_entries=3)
+    assert tree == [
+        "project",
+        "├── big",
+        "│   ├── file0000.py",
+        "│   ├── file0001.py",
+        "│   ├── file0002.py",
+        "│   └── … 3,412 more files",
+        "└── main.py",
+    ]
+
+
+def test_render_tree_caps_depth():
+    paths = ["a/b/c/deep.py", "a/b/c/d/deeper.py", "a/top.py"]
+    tree = render_tree("project", paths, max_depth=2)
+    assert tree == [
+        "project",
+        "└── a",
+        "    ├── b",
+        "    │   └── … 2 more files",
+        "    └── top.py",
+    ]
+
+
 # -------------------------------
 # Edge case: empty project
 # -------------------------------
@@ -0,0 +1,131 @@
+import sys
+
+import pytest
+
+from snib.config import SNIB_DEFAULT_CONFIG
+from snib.patterns import PatternSet
+from snib.scanner import Scanner
+from snib.watcher import (
+    ALL_CHANGED,
+    InotifyWatcher,
+    PollingWatcher,
+    Watcher,
+    open_watcher,
+    wait_for_changes,
+)
+
+
+class ScriptedWatcher(Watcher):
+    # returns the scripted batches, then nothing (or raises a scripted error)
+    def __init__(self, batches):
+        self.batches = list(batches)
+        self.closed = False
+
+    def read(self, timeout):
+        if not self.batches:
+            return set()
+        batch = self.batches.pop(0)
+        if isinstance(batch, BaseException):
+            raise batch
+        return batch
+
+    def close(self):
+        self.closed = True
+
+
+# -------------------------------
+# Debouncing
+# -------------------------------
+def test_wait_for_changes_collects_a_burst():
+    watcher = ScriptedWatcher([set(), {"a.py"}, {"b.py"}, {"a.py"}, set(), {"c.py"}])
+    assert wait_for_changes(watcher, 0.01) == {"a.py", "b.py"}
+    assert wait_for_changes(watcher, 0.01) == {"c.py"}
+
+
+# -------------------------------
+# Backends
+# -------------------------------
+def test_polling_watcher_reports_changed_paths():
+    states = [{"a.py": (1, 1), "b.py": (1, 1)}, {"a.py": (2, 2), "c.py": (1, 1)}]
+    watcher = PollingWatcher(lambda: states.pop(0) if len(states) > 1 else states[0])
+    watcher.interval = 0.01
+    assert watcher.read(None) == {"a.py", "b.py", "c.py"}
+    assert watcher.read(0.02) == set()
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify")
+def test_inotify_watcher_follows_new_directories(tmp_path):
+    (tmp_path / "prompts").mkdir()
+    watcher = InotifyWatcher(tmp_path, PatternSet(["prompts"]))
+    try:
+        (tmp_path / "prompts" / "prompt_1.txt").write_text("ignored")
+        (tmp_path / "src").mkdir()
+        assert "src" in wait_for_changes(watcher, 0.05)
+
+        (tmp_path / "src" / "a.py").write_text("print(1)")
+        assert wait_for_changes(watcher, 0.05) == {"src/a.py"}
+    finally:
+        watcher.close()
+
+
+def test_watcher_is_abstract():
+    with pytest.raises(TypeError):
+        Watcher()
+
+
+def test_open_watcher_poll_backend(tmp_path):
+    watcher = open_watcher(tmp_path, PatternSet([]), lambda: {}, backend="poll")
+    assert isinstance(watcher, PollingWatcher)
+
+
+# -------------------------------
+# Scanner.watch
+# -------------------------------
+def test_scanner_watch_regenerates_on_change(tmp_path, monkeypatch):
+    import copy
+
+    (tmp_path / "a.py").write_text("print(1)")
+    scanner = Scanner(tmp_path, copy.deepcopy(SNIB_DEFAULT_CONFIG))
+    prompt = tmp_path / "prompts" / "prompt_1.txt"
+
+    def change_then_stop(*args, **kwargs):
+        (tmp_path / "a.py").write_text("print(2)")
+        return ScriptedWatcher([{"a.py"}, set(), KeyboardInterrupt()])
+
+    monkeypatch.setattr("snib.scanner.open_watcher", change_then_stop)
+    scanner.watch("desc", ["*.py"], ["prompts"], 2000, True, "debug")
+
+    assert "print(2)" in prompt.read_text()
+
+
+@pytest.mark.parametrize(
+    "batch,updates",
+    [
+        ({"notes.txt"}, 1),  # not included: no update
+        ({"notes.txt", "a.py"}, 2),
+        ({"removed"}, 2),  # may have been a directory with included files
+        ({"pkg"}, 2),  # new directory
+        ({ALL_CHANGED}, 2),  # lost events
+    ],
+)
+def test_scanner_watch_ignores_changes_outside_include(
+    tmp_path, monkeypatch, batch, updates
+):
+    import copy
+
+    (tmp_path / "a.py").write_text("print(1)")
+    (tmp_path / "notes.txt").write_text("notes")
+    (tmp_path / "pkg").mkdir()
+    scanner = Scanner(tmp_path, copy.deepcopy(SNIB_DEFAULT_CONFIG))
+    scans = []
+    monkeypatch.setattr(scanner, "scan", lambda *args, **kwargs: scans.append(args))
+    monkeypatch.setattr(
+        "snib.scanner.open_watcher",
+        lambda *args, **kwargs: ScriptedWatcher([batch, set(), KeyboardInterrupt()]),
+    )
+    scanner.watch("desc", ["*.py"], ["prompts"], 2000, True, "debug")
+
+    assert len(scans) == updates  # the initial scan + updates
+
+
+# PASSED
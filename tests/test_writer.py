@@ -1,6 +1,9 @@
+import io
+import json
+
 import pytest
 
-from snib.writer import Writer
+from snib.writer import Writer, read_pack_chunk, stream_chunks
 
 
 def test_write_and_clear(tmp_path):
@@ -15,4 +18,190 @@ def test_write_and_clear(tmp_path):
     assert not any(tmp_path.glob("prompt_*.txt"))
 
 
+def _header(i, total, width):
+    return f"Prompt file {i}/{total:<{width}}\n"
+
+
+def test_write_stream_patches_headers(tmp_path):
+    writer = Writer(tmp_path)
+    files = writer.write_stream(
+        iter(["a\n", "b\n", "c\n"]), _header, total_width=2, force=True
+    )
+    assert [f.name for f in files] == ["prompt_1.txt", "prompt_2.txt", "prompt_3.txt"]
+    assert files[0].read_text() == "Prompt file 1/3 \na\n"
+    assert files[2].read_text() == "Prompt file 3/3 \nc\n"
+
+
+def test_write_stream_writes_while_streaming(tmp_path):
+    writer = Writer(tmp_path)
+    seen = []
+
+    def chunks():
+        yield "a"
+        yield "b"
+        # earlier chunks are on disk (as temporary files) before the next one
+        seen.append(sorted(p.name for p in tmp_path.glob("prompt_*")))
+        yield "c"
+
+    writer.write_stream(chunks(), _header, total_width=1, force=True)
+    assert seen == [["prompt_1.txt.tmp", "prompt_2.txt.tmp"]]
+    assert sorted(p.name for p in tmp_path.glob("prompt_*")) == [
+        "prompt_1.txt",
+        "prompt_2.txt",
+        "prompt_3.txt",
+    ]
+
+
+def test_write_stream_single_chunk_has_no_header(tmp_path):
+    writer = Writer(tmp_path)
+
+    def header(i, total, width):
+        return "" if total <= 1 else _header(i, total, width)
+
+    files = writer.write_stream(iter(["only"]), header, total_width=3, force=True)
+    assert files[0].read_text() == "only"
+
+
+def test_write_stream_total_exceeds_reserved_width(tmp_path):
+    writer = Writer(tmp_path)
+    chunks = [f"{i}\n" for i in range(1, 13)]
+    files = writer.write_stream(iter(chunks), _header, total_width=1, force=True)
+    assert len(files) == 12
+    assert files[0].read_text() == "Prompt file 1/12\n1\n"
+    assert files[11].read_text() == "Prompt file 12/12\n12\n"
+
+
+def test_write_stream_rewrites_only_changed_files(tmp_path):
+    writer = Writer(tmp_path)
+    writer.write_stream(iter(["a\n", "b\n", "c\n"]), _header, force=True)
+    before = {p.name: p.stat().st_mtime_ns for p in tmp_path.glob("prompt_*.txt")}
+    inodes = {p.name: p.stat().st_ino for p in tmp_path.glob("prompt_*.txt")}
+
+    files = writer.write_stream(iter(["a\n", "B\n", "c\n"]), _header, force=True)
+
+    assert [f.read_text() for f in files][1] == "Prompt file 2/3\nB\n"
+    assert (
+        tmp_path.joinpath("prompt_1.txt").stat().st_mtime_ns == before["prompt_1.txt"]
+    )
+    assert tmp_path.joinpath("prompt_3.txt").stat().st_ino == inodes["prompt_3.txt"]
+    assert tmp_path.joinpath("prompt_2.txt").stat().st_ino != inodes["prompt_2.txt"]
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_write_stream_removes_stale_files_and_updates_headers(tmp_path):
+    writer = Writer(tmp_path)
+    writer.write_stream(iter(["a\n", "b\n", "c\n"]), _header, force=True)
+
+    files = writer.write_stream(iter(["a\n", "b\n"]), _header, force=True)
+
+    # same content, but the total in the headers changed
+    assert [f.read_text() for f in files] == [
+        "Prompt file 1/2\na\n",
+        "Prompt file 2/2\nb\n",
+    ]
+    assert not tmp_path.joinpath("prompt_3.txt").exists()
+
+
+def test_write_stream_without_manifest_compares_content(tmp_path):
+    writer = Writer(tmp_path)
+    writer.write_stream(iter(["a\n", "b\n"]), _header, force=True)
+    writer.manifest_path.unlink()
+    inode = tmp_path.joinpath("prompt_1.txt").stat().st_ino
+
+    writer.write_stream(iter(["a\n", "b\n"]), _header, force=True)
+    assert tmp_path.joinpath("prompt_1.txt").stat().st_ino == inode
+    assert writer.manifest_path.exists()
+
+
+def test_write_stream_ignores_edited_files(tmp_path):
+    writer = Writer(tmp_path)
+    writer.write_stream(iter(["a\n", "b\n"]), _header, force=True)
+    tmp_path.joinpath("prompt_1.txt").write_text("edited by hand, longer")
+
+    writer.write_stream(iter(["a\n", "b\n"]), _header, force=True)
+    assert tmp_path.joinpath("prompt_1.txt").read_text() == "Prompt file 1/2\na\n"
+
+
+def test_write_stream_accepts_bytes(tmp_path):
+    writer = Writer(tmp_path)
+    files = writer.write_stream(
+        iter(["caf\u00e9\n".encode(), b"b\n"]), _header, force=True
+    )
+    assert files[0].read_text(encoding="utf-8") == "Prompt file 1/2\ncaf\u00e9\n"
+    assert writer.write_chunks([b"x", "y"], force=True)[1].read_bytes() == b"y"
+
+
+@pytest.mark.parametrize("compression", ["none", "gzip", "lzma"])
+def test_write_pack_with_index(tmp_path, compression):
+    writer = Writer(tmp_path)
+    chunks = [
+        "#[TASK]\nDebug\n\n#[FILE] a.py\nprint('a')\n",
+        "print('still a')\n\n#[FILE] b.py (continued from b.py:3)\nb\n",
+        "#[FILE] c.py\nc\n".encode(),
+    ]
+    pack = writer.write_pack(iter(chunks), _header, force=True, compression=compression)
+
+    index = json.loads((tmp_path / "prompts.index.json").read_text())
+    assert index["pack"] == pack.name and index["compression"] == compression
+    assert [c["files"] for c in index["chunks"]] == [
+        ["a.py"],
+        ["a.py", "b.py"],
+        ["c.py"],
+    ]
+    assert read_pack_chunk(tmp_path, 2) == b"Prompt file 2/3\n" + chunks[1].encode()
+    assert read_pack_chunk(tmp_path, 3) == b"Prompt file 3/3\n" + chunks[2]
+    assert not list(tmp_path.glob("*.tmp*"))
+    with pytest.raises(IndexError):
+        read_pack_chunk(tmp_path, 4)
+
+
+def test_write_pack_total_exceeds_reserved_width(tmp_path):
+    writer = Writer(tmp_path)
+    chunks = [f"{i}\n" for i in range(1, 13)]
+    writer.write_pack(iter(chunks), _header, total_width=1, force=True)
+    assert read_pack_chunk(tmp_path, 1) == b"Prompt file 1/12\n1\n"
+    assert read_pack_chunk(tmp_path, 12) == b"Prompt file 12/12\n12\n"
+
+
+def test_write_pack_replaces_other_compression(tmp_path):
+    writer = Writer(tmp_path)
+    writer.write_pack(iter(["a"]), _header, force=True, compression="gzip")
+    writer.write_pack(iter(["a", "b"]), _header, force=True)
+    assert sorted(p.name for p in tmp_path.glob("prompts.pack*")) == ["prompts.pack"]
+    assert read_pack_chunk(tmp_path, 2) == b"Prompt file 2/2\nb"
+
+
+def test_stream_chunks_nul_framing():
+    out = io.BytesIO()
+    assert stream_chunks(iter(["a\n", "caf\u00e9".encode()]), out) == 2
+    assert out.getvalue().split(b"\0") == [b"a\n", "caf\u00e9".encode(), b""]
+
+
+def test_stream_chunks_jsonl_framing():
+    out = io.BytesIO()
+    chunks = ["#[FILE] a.py\nx = 1\n", "y = 2\n\n#[FILE] b.py\nz\n"]
+    stream_chunks(iter(chunks), out, framing="jsonl")
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [r["index"] for r in records] == [1, 2]
+    assert [r["files"] for r in records] == [["a.py"], ["a.py", "b.py"]]
+    assert [r["text"] for r in records] == chunks
+
+
+def test_stream_chunks_stops_on_closed_pipe():
+    class ClosedPipe(io.BytesIO):
+        def flush(self):
+            if self.tell() > 3:  # after the first chunk
+                raise BrokenPipeError
+
+    produced = []
+
+    def chunks():
+        for c in ["ab", "cd", "ef"]:
+            produced.append(c)
+            yield c
+
+    assert stream_chunks(chunks(), ClosedPipe()) == 1
+    assert produced == ["ab", "cd"]
+
+
 # PASSED